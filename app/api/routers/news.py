@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import get_current_active_user, get_current_active_superuser
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.news import News, NewsCreate, NewsUpdate, NewsSearchParams
+from app.schemas.news import News, NewsCreate, NewsUpdate, NewsSearchParams, RelatedNews
 from app.services.news import (
     create_news,
     delete_news,
@@ -16,6 +16,7 @@ from app.services.news import (
     search_news,
     update_news,
     get_news_by_keyword,
+    get_related_news,
     add_keyword_to_news,
     remove_keyword_from_news,
 )
@@ -101,6 +102,30 @@ async def read_news_item(
     return news
 
 
+@router.get("/{news_id}/related", response_model=List[RelatedNews])
+async def read_related_news(
+    *,
+    db: AsyncSession = Depends(get_db),
+    news_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    获取与指定新闻内容相似的新闻
+    """
+    news = await get_news(db, news_id=news_id)
+    if not news:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="新闻不存在",
+        )
+    related = await get_related_news(db, news=news, limit=limit)
+    return [
+        RelatedNews(**News.model_validate(item).model_dump(), similarity=similarity)
+        for item, similarity in related
+    ]
+
+
 @router.put("/{news_id}", response_model=News)
 async def update_news_item(
     *,
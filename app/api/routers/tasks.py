@@ -7,6 +7,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import get_current_active_user, get_current_active_superuser
 from app.db.session import get_db
 from app.models.user import User
+from app.workers.crawler.adaptive import adaptive_schedule
+from app.workers.crawler.cache import shared_stats as response_cache_stats
+from app.workers.crawler.proxy import proxy_pool
+from app.workers.crawler.rate_limit import rate_limiter
+from app.workers.crawler.seen import seen_urls
+from app.workers.crawler.sources import get_enabled_sources
 from app.workers.tasks.crawl import crawl_news
 from app.services.keyword import get_keyword
 
@@ -42,7 +48,7 @@ async def start_crawl_task(
         )
     
     # 启动爬虫任务
-    task = crawl_news.delay(keyword.text, source, max_pages)
+    task = crawl_news.delay(keyword.text, source, max_pages, keyword_ids=[str(keyword.id)])
     
     return {
         "task_id": task.id,
@@ -51,6 +57,25 @@ async def start_crawl_task(
     }
 
 
+@router.get("/crawler/status", response_model=Dict[str, Any])
+async def get_crawler_status(
+    *,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    获取爬虫状态（仅限管理员）: 已抓取URL过滤器的条数和估算误判率、响应缓存命中率、
+    各数据源令牌桶的当前令牌数、代理池中各代理的成功/失败次数和健康度、
+    各搜索词的产出速率、抓取间隔和距下次抓取的秒数
+    """
+    return {
+        "seen_urls": await seen_urls.stats(),
+        "response_cache": await response_cache_stats(),
+        "rate_limits": {plugin.name: await rate_limiter.fill_level(plugin.name) for plugin in get_enabled_sources()},
+        "proxies": await proxy_pool.stats(),
+        "schedule": await adaptive_schedule.stats(),
+    }
+
+
 @router.get("/status/{task_id}", response_model=Dict[str, Any])
 async def get_task_status(
     *,
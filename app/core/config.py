@@ -1,6 +1,6 @@
 import os
 import secrets
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -68,9 +68,103 @@ class Settings(BaseSettings):
     PROXY_ENABLED: bool = False
     PROXY_API_URL: Optional[str] = None
     PROXY_API_KEY: Optional[str] = None
-    CRAWL_DELAY: int = 2
+    PROXY_REFRESH_INTERVAL: int = 300  # 代理列表最短刷新间隔（秒）
+    PROXY_MIN_POOL_SIZE: int = 5  # 代理池少于该数量时从API重新加载
+    PROXY_REFERENCE_LATENCY: float = 1.0  # 健康度计算的参考延迟（秒），延迟等于该值时健康度减半
+    PROXY_LATENCY_ALPHA: float = 0.3  # 代理延迟指数移动平均的平滑系数
+    PROXY_MAX_CONSECUTIVE_FAILURES: int = 3  # 连续失败达到该次数后隔离代理
+    PROXY_QUARANTINE_SECONDS: int = 600  # 代理隔离时间（秒）
+    PROXY_MIN_SAMPLES: int = 20  # 判断代理成功率所需的最少请求数
+    PROXY_MIN_SUCCESS_RATE: float = 0.3  # 成功率低于该值的代理移出代理池
+    CRAWL_ENABLED_SOURCES: List[str] = ["baidu", "google", "bing", "sogou"]  # source=all时并发抓取的数据源
+    CRAWL_DELAY: int = 2  # 未单独配置速率的数据源按每CRAWL_DELAY秒一个请求限速
+    CRAWL_RATE_LIMITS: Dict[str, float] = {}  # 各数据源的请求速率（每秒请求数），如 {"baidu": 0.5}
+    CRAWL_RATE_BURST: int = 3  # 令牌桶容量，即允许的突发请求数
+    CRAWL_REQUEST_TIMEOUT: int = 10  # 单次请求超时（秒）
+    CRAWL_MAX_CONNECTIONS: int = 100  # 每个worker进程的连接池上限
+    CRAWL_PER_HOST_CONCURRENCY: int = 4  # 每个主机的并发连接上限
+    CRAWL_DNS_CACHE_TTL: int = 300  # DNS缓存时间（秒）
+    CRAWL_KEEPALIVE_TIMEOUT: int = 60  # 空闲长连接保持时间（秒）
+    CRAWL_CACHE_ENABLED: bool = True  # 是否启用响应磁盘缓存
+    CRAWL_CACHE_DIR: str = "data/crawl_cache"  # 响应缓存目录
+    CRAWL_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 响应缓存大小上限（字节），超出后按LRU淘汰
+    CRAWL_CACHE_DEFAULT_TTL: int = 600  # 响应缓存默认新鲜期（秒）
+    CRAWL_CACHE_TTL: Dict[str, int] = {}  # 各数据源的响应缓存新鲜期（秒），如 {"google": 1800}
+    CRAWL_SCHEDULE_TICK: int = 60  # 自适应调度检查到期搜索词的间隔（秒）
+    CRAWL_SCHEDULE_MIN_INTERVAL: int = 600  # 单个搜索词的最小抓取间隔（秒）
+    CRAWL_SCHEDULE_MAX_INTERVAL: int = 86400  # 单个搜索词的最大抓取间隔（秒）
+    CRAWL_SCHEDULE_INITIAL_INTERVAL: int = 3600  # 还没有产出数据的搜索词的抓取间隔（秒）
+    CRAWL_SCHEDULE_TARGET_YIELD: float = 5.0  # 期望每次抓取获得的新新闻数
+    CRAWL_SCHEDULE_YIELD_ALPHA: float = 0.3  # 产出速率指数移动平均的平滑系数
+    CRAWL_SCHEDULE_PRIORITY_WEIGHTS: Dict[str, float] = {
+        "1": 0.5, "2": 0.75, "3": 1.0, "4": 1.5, "5": 2.0,
+    }  # 关键词优先级对应的抓取频率权重，权重越大抓取越频繁
+    CIRCUIT_FAILURE_THRESHOLD: int = 3  # 连续检测到封禁多少次后熔断数据源
+    CIRCUIT_FAILURE_WINDOW: int = 600  # 封禁计数的有效期（秒），期间没有新的封禁则清零
+    CIRCUIT_OPEN_SECONDS: int = 600  # 熔断后的冷却时间（秒），探测失败时加倍
+    CIRCUIT_MAX_OPEN_SECONDS: int = 7200  # 最长冷却时间（秒）
+    CIRCUIT_BLOCK_FINGERPRINTS: List[str] = [
+        "<title>百度安全验证</title>", "wappass.baidu.com/static/captcha", "/antispider/",
+        "unusual traffic from your computer network", "g-recaptcha",
+    ]  # 封禁/验证码页面的内容特征（应足够具体，避免误伤正常的搜索结果）
+    SEEN_URL_FILTER_CAPACITY: int = 1000000  # 已抓取URL布隆过滤器首层容量
+    SEEN_URL_FILTER_ERROR_RATE: float = 0.001  # 已抓取URL布隆过滤器首层误判率
+    ARTICLE_FETCH_ENABLED: bool = True  # 是否抓取新闻全文
+    ARTICLE_CONCURRENCY: int = 20  # 全文抓取的总并发数
+    ARTICLE_PER_DOMAIN_CONCURRENCY: int = 2  # 全文抓取时每个域名的并发数
+    ARTICLE_MAX_BYTES: int = 2 * 1024 * 1024  # 单篇全文最多下载的字节数，超出部分截断
+    CRAWL_RATE_LIMIT_ENABLED: bool = True  # 是否启用共享限速（离线回放基准测试时关闭）
+    CIRCUIT_BREAKER_ENABLED: bool = True  # 是否启用数据源熔断器
+    CRAWL_WATERMARK_ENABLED: bool = True  # 是否按抓取水位提前停止翻页
+    CRAWL_RECORD_DIR: Optional[str] = None  # 设置后把真实HTTP响应录制到该目录（gzip压缩的JSONL），用于离线回放
+    CRAWL_HTML_PARSER: str = "lxml"  # 结果页解析器: lxml 或 html.parser（旧BeautifulSoup实现）
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
+    # Analysis
+    NLTK_DATA_DIR: str = "data/nltk_data"  # NLTK数据目录（相对路径基于项目根目录）
+    NLP_PRELOAD: List[str] = ["vader", "zh_sentiment"]  # worker启动时预加载的NLP资源
+    SENTIMENT_BACKEND: str = "auto"  # 情感分析后端: auto（按文本语言选择）、vader（英文）、zh（中文词典）或 transformer（本地模型）
+    SENTIMENT_LEXICON_DIR: Optional[str] = None  # 中文情感词典目录，默认使用app/workers/nlp/lexicon
+    TRANSFORMER_MODEL_PATH: Optional[str] = None  # transformer后端的本地模型目录（Hugging Face格式），依赖见requirements-transformer.txt
+    TRANSFORMER_RUNTIME: str = "torch"  # 推理方式: torch 或 onnx（模型目录下导出的model.onnx）
+    TRANSFORMER_QUANTIZE: bool = False  # 是否使用int8量化（torch为动态量化，onnx使用model.quant.onnx）
+    TRANSFORMER_MAX_LENGTH: int = 256  # 输入截断的最大token数
+    TRANSFORMER_NUM_THREADS: Optional[int] = None  # 推理线程数，多进程分析时建议设为1
+    TRANSFORMER_MAX_BATCH_SIZE: int = 16  # 微批处理的最大批大小
+    TRANSFORMER_MAX_WAIT_MS: float = 10.0  # 微批处理凑批的最长等待时间（毫秒）
+    ANALYSIS_BATCH_SIZE: int = 50  # 每个批量分析任务处理的新闻条数
+    ANALYSIS_POOL_ENABLED: bool = False  # 批量分析是否使用多进程（worker先加载资源再fork，子进程共享内存）
+    ANALYSIS_POOL_PROCESSES: Optional[int] = None  # 分析子进程数，默认为可用CPU核数
+    ANALYSIS_POOL_CHUNK_SIZE: int = 10  # 每次分发给子进程的新闻条数
+    ANALYSIS_POOL_TIMEOUT: int = 300  # 一批新闻在进程池中的最长处理时间（秒），超时后终止子进程并在当前进程重新处理
+    NER_ENABLED: bool = False  # 是否识别新闻中的人物、机构和地点（需要本地spaCy模型）
+    SPACY_MODEL_PATH: Optional[str] = None  # spaCy模型目录（如zh_core_web_sm安装包中的模型目录）
+    SPACY_BATCH_SIZE: int = 64  # nlp.pipe每批的文档数
+    SPACY_N_PROCESS: int = 1  # nlp.pipe的进程数（在分析进程池中时固定为1）
+    SPACY_MAX_CHARS: int = 10000  # 每篇新闻参与实体识别的最大字数
+    SPACY_MAX_ENTITIES: int = 20  # 每类实体最多保存的个数
+    SUMMARY_SENTENCES: int = 3  # 摘要句数
+    SUMMARY_MAX_SENTENCES: int = 300  # 句子数超过该值时不计算TextRank，直接取导语
+    SUMMARY_MAX_CHARS: int = 50000  # 字数超过该值时不计算TextRank，直接取导语
+    SUMMARY_TIME_BUDGET: float = 0.05  # 每篇摘要的计算时间上限（秒），超时取导语
+    ANALYSIS_CACHE_ENABLED: bool = True  # 是否按内容哈希缓存情感分数和摘要
+    ANALYSIS_CACHE_VERSION: str = "2"  # 分析结果版本，修改情感词典、模型或摘要算法后递增，旧缓存自动失效
+    ANALYSIS_CACHE_TTL: int = 7 * 24 * 3600  # Redis中分析结果的保留时间（秒）
+    ANALYSIS_CACHE_LOCAL_SIZE: int = 10000  # 每个进程内LRU缓存的条数
+    KEYWORD_MATCH_ENABLED: bool = True  # 入库时是否按标题和正文自动关联出现的关键词
+    KEYWORD_MATCH_MIN_LENGTH: int = 2  # 参与自动关联的关键词最短长度（字符）
+    SIMHASH_ENABLED: bool = True  # 是否检测转载的近似重复新闻
+    SIMHASH_MAX_DISTANCE: int = 3  # 视为近似重复的最大汉明距离（不超过3时分段索引可保证不漏检）
+    SIMHASH_MIN_SHINGLES: int = 20  # 文本片段少于该数量时不做近似重复检测
+    SIMHASH_TTL: int = 7 * 24 * 3600  # 指纹索引保留时间（秒）
+    RELATED_INDEX_ENABLED: bool = True  # 入库时是否把新闻加入相关新闻索引
+    RELATED_INDEX_DIR: str = "data/related_index"  # 相关新闻索引目录（API和worker需共享）
+    RELATED_INDEX_DIM: int = 256  # 特征哈希维度，修改后需执行 python -m app.services.related backfill 补建
+    RELATED_MAX_CHARS: int = 20000  # 每篇新闻参与向量化的最大字数
+    RELATED_INDEX_LISTS: int = 1024  # 倒排列表数，建议约为索引行数的平方根；行数达到其10倍后由调度器每小时检查并自动训练（也可执行 python -m app.services.related train）
+    RELATED_SEARCH_PROBES: int = 32  # 查询时计算的倒排列表数，越大召回越全、越慢
+    RELATED_MIN_SIMILARITY: float = 0.1  # 相关新闻的最低余弦相似度
+
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     ENABLE_PROMETHEUS: bool = True
@@ -0,0 +1,37 @@
+import os
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# 同步客户端（连接池线程安全，fork后由redis-py按pid自动重建连接）
+redis_client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD or None,
+    decode_responses=True,
+)
+
+# 异步客户端绑定事件循环，每个进程单独创建
+_async_pid: Optional[int] = None
+_async_client: Optional[aioredis.Redis] = None
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    获取当前进程的异步Redis客户端
+    """
+    global _async_pid, _async_client
+    if _async_client is None or _async_pid != os.getpid():
+        _async_pid = os.getpid()
+        _async_client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD or None,
+            decode_responses=True,
+        )
+    return _async_client
@@ -58,6 +58,14 @@ class News(NewsInDBBase):
     pass
 
 
+# 相关新闻
+class RelatedNews(News):
+    """
+    相关新闻模式，附带与原新闻的相似度
+    """
+    similarity: float
+
+
 # 存储在数据库中的新闻附加属性
 class NewsInDB(NewsInDBBase):
     """
@@ -1,3 +1,6 @@
+import logging
+import re
+import unicodedata
 from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
@@ -5,9 +8,44 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.redis import get_async_redis
 from app.models.keyword import Keyword
 from app.schemas.keyword import KeywordCreate, KeywordUpdate
 
+logger = logging.getLogger(__name__)
+
+# 关键词变更版本号和变更日志（"版本号:关键词ID"），关键词匹配器据此增量更新
+KEYWORD_VERSION_KEY = "keywords:version"
+KEYWORD_CHANGES_KEY = "keywords:changes"
+KEYWORD_CHANGES_MAX = 10000
+_NOTIFY_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], version .. ':' .. ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+return version
+"""
+
+
+def normalize_keyword_text(text: str) -> str:
+    """
+    规范化关键词文本（全角转半角、忽略大小写、合并空白），用于合并相同的搜索词
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+async def notify_keyword_changed(keyword_id: UUID) -> None:
+    """
+    记录关键词变更，递增版本号并追加到变更日志
+    
+    Redis不可用时只记录日志，匹配器会在版本号不连续时全量重建。
+    """
+    try:
+        await get_async_redis().eval(
+            _NOTIFY_SCRIPT, 2, KEYWORD_VERSION_KEY, KEYWORD_CHANGES_KEY, str(keyword_id), KEYWORD_CHANGES_MAX
+        )
+    except Exception as e:
+        logger.warning(f"记录关键词变更失败: {str(e)}")
+
 
 async def get_keyword(db: AsyncSession, *, keyword_id: UUID) -> Optional[Keyword]:
     """
@@ -18,7 +56,7 @@ async def get_keyword(db: AsyncSession, *, keyword_id: UUID) -> Optional[Keyword
 
 
 async def get_keywords(
-    db: AsyncSession, *, user_id: Optional[UUID] = None, skip: int = 0, limit: int = 100, is_active: Optional[bool] = None
+    db: AsyncSession, *, user_id: Optional[UUID] = None, skip: int = 0, limit: Optional[int] = 100, is_active: Optional[bool] = None
 ) -> List[Keyword]:
     """
     获取关键词列表
@@ -27,7 +65,7 @@ async def get_keywords(
         db: 数据库会话
         user_id: 用户ID，如果为None则获取所有用户的关键词
         skip: 跳过的记录数
-        limit: 返回的最大记录数
+        limit: 返回的最大记录数，为None时不限制
         is_active: 是否只返回活跃的关键词
     
     Returns:
@@ -44,7 +82,9 @@ async def get_keywords(
         query = query.where(Keyword.is_active == is_active)
     
     # 分页
-    query = query.offset(skip).limit(limit)
+    query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -66,6 +106,7 @@ async def create_keyword(
     db.add(db_obj)
     await db.commit()
     await db.refresh(db_obj)
+    await notify_keyword_changed(db_obj.id)
     return db_obj
 
 
@@ -87,6 +128,7 @@ async def update_keyword(
     db.add(db_obj)
     await db.commit()
     await db.refresh(db_obj)
+    await notify_keyword_changed(db_obj.id)
     return db_obj
 
 
@@ -98,4 +140,5 @@ async def delete_keyword(db: AsyncSession, *, keyword_id: UUID) -> Keyword:
     keyword = result.scalars().first()
     await db.delete(keyword)
     await db.commit()
+    await notify_keyword_changed(keyword_id)
     return keyword 
\ No newline at end of file
@@ -1,14 +1,18 @@
+import asyncio
+import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 from sqlalchemy import select, and_, or_, desc
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.news import News, news_keyword
 from app.models.keyword import Keyword
 from app.schemas.news import NewsCreate, NewsUpdate, NewsSearchParams
+from app.services.related import find_related
 
 
 async def get_news(db: AsyncSession, *, news_id: UUID) -> Optional[News]:
@@ -109,6 +113,26 @@ async def get_news_by_keyword(
     return result.scalars().all()
 
 
+async def get_related_news(
+    db: AsyncSession, *, news: News, limit: int = 10
+) -> List[Tuple[News, float]]:
+    """
+    获取相关新闻（按相似度降序），索引中已删除的新闻会被跳过
+    """
+    # 向量化和相似度计算是CPU密集操作，放到线程中执行以免阻塞事件循环
+    matches = await asyncio.to_thread(find_related, news.title, news.content, limit, news.id)
+    if not matches:
+        return []
+    
+    result = await db.execute(
+        select(News)
+        .where(News.id.in_([news_id for news_id, _ in matches]))
+        .options(selectinload(News.keywords))
+    )
+    found = {item.id: item for item in result.scalars().all()}
+    return [(found[news_id], similarity) for news_id, similarity in matches if news_id in found]
+
+
 async def create_news(
     db: AsyncSession, *, news_in: NewsCreate, keyword_ids: Optional[List[UUID]] = None
 ) -> News:
@@ -147,6 +171,78 @@ async def create_news(
     return db_obj
 
 
+def _to_datetime(value: Any) -> Optional[datetime]:
+    """
+    将任务消息中的时间字段转换为datetime
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+async def save_news_items(db: AsyncSession, *, news_items: List[Dict[str, Any]]) -> Dict[str, UUID]:
+    """
+    批量保存分析后的新闻，并按新闻中的keyword_ids写入关键词关联
+    
+    已存在的URL不会重复创建，只补充关键词关联。
+    
+    Returns:
+        URL到新闻ID的映射
+    """
+    rows = {}
+    for item in news_items:
+        url = item.get("url")
+        if not url or len(url) > 512 or url in rows:
+            continue
+        rows[url] = {
+            "id": uuid.uuid4(),
+            "title": (item.get("title") or "")[:255],
+            "content": item.get("content"),
+            "summary": item.get("summary"),
+            "url": url,
+            "source": (item.get("source") or "")[:100],
+            "published_at": _to_datetime(item.get("published_at")),
+            "author": (item.get("author") or "")[:100] or None,
+            "sentiment_score": item.get("sentiment_score"),
+            "meta_data": item.get("meta_data"),
+            "crawled_at": _to_datetime(item.get("crawled_at")) or datetime.utcnow(),
+        }
+    if not rows:
+        return {}
+    
+    await db.execute(
+        insert(News).values(list(rows.values())).on_conflict_do_nothing(index_elements=[News.url])
+    )
+    result = await db.execute(select(News.id, News.url).where(News.url.in_(list(rows))))
+    news_ids = {url: news_id for news_id, url in result.all()}
+    
+    links = {
+        (news_ids[item["url"]], UUID(str(keyword_id)))
+        for item in news_items
+        if item.get("url") in news_ids
+        for keyword_id in item.get("keyword_ids") or []
+    }
+    # keyword_ids来自抓取任务派发时，之后被删除的关键词会违反外键约束并导致整批失败
+    if links:
+        result = await db.execute(
+            select(Keyword.id).where(Keyword.id.in_({keyword_id for _, keyword_id in links}))
+        )
+        existing = set(result.scalars().all())
+        links = {(news_id, keyword_id) for news_id, keyword_id in links if keyword_id in existing}
+    if links:
+        await db.execute(
+            insert(news_keyword)
+            .values([{"news_id": news_id, "keyword_id": keyword_id} for news_id, keyword_id in links])
+            .on_conflict_do_nothing()
+        )
+    
+    await db.commit()
+    return news_ids
+
+
 async def update_news(
     db: AsyncSession, *, db_obj: News, obj_in: Union[NewsUpdate, Dict[str, Any]]
 ) -> News:
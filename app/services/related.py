@@ -0,0 +1,434 @@
+"""
+相关新闻索引
+
+每篇新闻按特征哈希（英文单词、中文相邻两字，带符号哈希到RELATED_INDEX_DIM维，与HashingVectorizer相同）
+得到L2归一化的向量，以float16逐行追加到内存映射文件，新闻ID按相同顺序写入ID文件。
+查询把候选行转成float32与查询向量做点积（即余弦相似度），用argpartition取前k个。
+
+逐行计算全部向量的耗时与新闻数成正比（百万条时每次查询要转换和计算2.5亿个float16）。
+索引行数达到RELATED_INDEX_LISTS * MIN_ROWS_PER_LIST后训练倒排列表：
+球面k-means得到RELATED_INDEX_LISTS个中心，每行记录所属中心（列表文件，每行2字节），
+查询只计算与查询向量最接近的RELATED_SEARCH_PROBES个列表中的行，百万条时只需计算约3%的行。
+之后追加的新闻按已有中心直接分配列表，不需要重建；训练后追加、尚未分配列表的行逐行计算。
+训练由调度器定期启动的train_related_index任务在需要时（见RelatedIndex.needs_training）自动执行，
+也可以手动执行 python -m app.services.related train。
+
+worker入库后追加新新闻，API进程按文件大小发现新行并重新映射。
+写入在文件锁内进行，先写向量再写ID和列表，读取时行数取较小者，因此不会读到写了一半的行。
+"""
+import asyncio
+import fcntl
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ID_BYTES = 16
+# 逐行计算时每块的行数
+CHUNK_ROWS = 16384
+# 标题中的词按该倍数计入词频
+TITLE_WEIGHT = 2
+# 追加时只在最近这些行中检查重复ID（任务重试），更早的重复在查询时去掉
+DEDUP_WINDOW = 100000
+# 多取的候选数，用于去掉查询的新闻本身和重复ID
+_EXTRA_CANDIDATES = 8
+# 训练倒排列表时每个中心至少需要的行数，以及每个中心最多使用的样本数
+MIN_ROWS_PER_LIST = 10
+SAMPLE_ROWS_PER_LIST = 64
+
+# 英文按单词，中文取连续汉字再切成相邻两字
+_TOKEN = re.compile(r"[a-z0-9]+|[一-鿿]+")
+
+
+def _terms(text: str, weight: int = 1, counts: Optional[Counter] = None) -> Counter:
+    counts = Counter() if counts is None else counts
+    for token in _TOKEN.findall(text.lower()):
+        if token[0] < "一" or len(token) == 1:
+            counts[token] += weight
+        else:
+            for i in range(len(token) - 1):
+                counts[token[i:i + 2]] += weight
+    return counts
+
+
+def vectorize(title: Optional[str], content: Optional[str], dim: Optional[int] = None) -> np.ndarray:
+    """
+    新闻的哈希特征向量（float32，L2归一化；没有可用词时为零向量）
+
+    词频取1 + log(tf)；哈希使用crc32（跨进程稳定），最高位决定符号，以抵消哈希冲突带来的偏差。
+    """
+    dim = dim or settings.RELATED_INDEX_DIM
+    counts = _terms(title or "", TITLE_WEIGHT)
+    _terms((content or "")[:settings.RELATED_MAX_CHARS], 1, counts)
+    if not counts:
+        return np.zeros(dim, dtype=np.float32)
+
+    hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in counts), dtype=np.uint32, count=len(counts))
+    weights = np.fromiter((1.0 + math.log(count) for count in counts.values()), dtype=np.float64, count=len(counts))
+    signs = np.where(hashes & np.uint32(0x80000000), -1.0, 1.0)
+    vector = np.bincount((hashes % np.uint32(dim)).astype(np.intp), weights=signs * weights, minlength=dim)
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+
+def _id_bytes(news_id: Union[UUID, str]) -> bytes:
+    return (news_id if isinstance(news_id, UUID) else UUID(str(news_id))).bytes
+
+
+def _top(scores: np.ndarray, count: int) -> np.ndarray:
+    """
+    得分最高的count个位置（无序）
+    """
+    if len(scores) <= count:
+        return np.arange(len(scores))
+    return np.argpartition(scores, len(scores) - count)[-count:]
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    每行向量最接近的中心编号（分块计算，避免一次生成过大的矩阵）
+    """
+    nearest = np.empty(len(vectors), dtype=np.int16)
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + CHUNK_ROWS], dtype=np.float32)
+        nearest[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return nearest
+
+
+def _append(path: str, size: int, data: bytes) -> None:
+    """
+    把文件截到size字节（去掉上次中断的写入留下的半行）后追加data
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        os.lseek(fd, size, os.SEEK_SET)
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+class RelatedIndex:
+    """
+    追加式的相关新闻向量索引（每种维度一组文件）
+    """
+
+    def __init__(self, directory: Optional[str] = None, dim: Optional[int] = None) -> None:
+        self.directory = directory or settings.RELATED_INDEX_DIR
+        self.dim = dim or settings.RELATED_INDEX_DIM
+        self.vectors_path = os.path.join(self.directory, f"vectors.{self.dim}.f16")
+        self.ids_path = os.path.join(self.directory, f"ids.{self.dim}.bin")
+        self.centroids_path = os.path.join(self.directory, f"centroids.{self.dim}.npy")
+        self.lists_path = os.path.join(self.directory, f"lists.{self.dim}.i16")
+        self.lock_path = os.path.join(self.directory, f"index.{self.dim}.lock")
+        self._row_bytes = self.dim * 2
+        self._lock = threading.Lock()
+        self._count = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._ids: Optional[np.ndarray] = None
+        self._centroids_version: Optional[Tuple[int, int]] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None
+
+    def _rows_on_disk(self) -> int:
+        try:
+            return min(os.path.getsize(self.vectors_path) // self._row_bytes, os.path.getsize(self.ids_path) // ID_BYTES)
+        except OSError:
+            return 0
+
+    def _lists_on_disk(self, count: int) -> int:
+        try:
+            return min(os.path.getsize(self.lists_path) // 2, count)
+        except OSError:
+            return 0
+
+    def _load_centroids(self) -> Optional[np.ndarray]:
+        """
+        读取倒排列表中心（文件被重新训练替换后重新读取）
+        """
+        try:
+            stat = os.stat(self.centroids_path)
+        except OSError:
+            self._centroids_version = self._centroids = None
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if version != self._centroids_version:
+            self._centroids = np.load(self.centroids_path)
+            self._centroids_version = version
+            self._lists = None
+        return self._centroids
+
+    def _open(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        映射当前的向量、ID和列表文件（文件变长或重新训练后重新映射）
+
+        Returns:
+            (向量, ID, 中心, 前若干行所属的列表)，索引为空时向量为None，未训练时中心和列表为None
+        """
+        with self._lock:
+            count = self._rows_on_disk()
+            if count != self._count:
+                if count:
+                    self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(count, self.dim))
+                    self._ids = np.memmap(self.ids_path, dtype=f"S{ID_BYTES}", mode="r", shape=(count,))
+                else:
+                    self._vectors = self._ids = None
+                self._count = count
+
+            centroids = self._load_centroids()
+            assigned = self._lists_on_disk(count) if centroids is not None else 0
+            if not assigned:
+                self._lists = None
+            elif self._lists is None or len(self._lists) != assigned:
+                self._lists = np.memmap(self.lists_path, dtype=np.int16, mode="r", shape=(assigned,))
+            return self._vectors, self._ids, centroids, self._lists
+
+    def __len__(self) -> int:
+        return self._rows_on_disk()
+
+    def add(self, news_ids: Sequence[Union[UUID, str]], vectors: np.ndarray) -> int:
+        """
+        追加新闻向量，跳过零向量和最近已加入的ID；已训练倒排列表时同时记录每行所属的列表
+
+        Returns:
+            实际追加的条数
+        """
+        if not len(news_ids):
+            return 0
+        keys = np.array([_id_bytes(news_id) for news_id in news_ids], dtype=f"S{ID_BYTES}")
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        keep = np.abs(vectors).sum(axis=1) > 0
+        # 同一批中的重复ID只保留第一个
+        _, first = np.unique(keys, return_index=True)
+        keep &= np.isin(np.arange(len(keys)), first)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            count = self._rows_on_disk()
+            if count:
+                start = max(0, count - DEDUP_WINDOW)
+                recent = np.fromfile(self.ids_path, dtype=f"S{ID_BYTES}", count=count - start, offset=start * ID_BYTES)
+                keep &= ~np.isin(keys, recent)
+            if not keep.any():
+                return 0
+
+            vectors = vectors[keep]
+            _append(self.vectors_path, count * self._row_bytes, vectors.astype(np.float16).tobytes())
+            _append(self.ids_path, count * ID_BYTES, keys[keep].tobytes())
+            # 之前的行都已分配列表时才追加，否则新行和未分配的行一起留给下次训练
+            centroids = self._load_centroids()
+            if centroids is not None and self._lists_on_disk(count) == count:
+                _append(self.lists_path, count * 2, _nearest(vectors, centroids).tobytes())
+        return len(vectors)
+
+    def needs_training(self, lists: Optional[int] = None) -> bool:
+        """
+        是否应该训练倒排列表：行数已达到训练所需，且尚未训练、列表数配置已修改，
+        或未分配列表的行（训练中断或列表文件损坏）已足够多
+        """
+        lists = lists or settings.RELATED_INDEX_LISTS
+        vectors, _, centroids, assigned = self._open()
+        count = 0 if vectors is None else len(vectors)
+        if count < lists * MIN_ROWS_PER_LIST:
+            return False
+        if centroids is None or len(centroids) != lists:
+            return True
+        return count - (0 if assigned is None else len(assigned)) >= lists * MIN_ROWS_PER_LIST
+
+    def train(self, lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> int:
+        """
+        用球面k-means训练倒排列表中心，并重新分配所有行（替换已有的中心和列表）
+
+        Returns:
+            已分配列表的行数
+        """
+        lists = lists or settings.RELATED_INDEX_LISTS
+        if not 0 < lists <= np.iinfo(np.int16).max:
+            raise ValueError(f"列表数必须在1到{np.iinfo(np.int16).max}之间: {lists}")
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            count = self._rows_on_disk()
+            if count < lists * MIN_ROWS_PER_LIST:
+                raise ValueError(f"索引只有 {count} 行，训练 {lists} 个列表至少需要 {lists * MIN_ROWS_PER_LIST} 行")
+            vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(count, self.dim))
+
+            start = time.perf_counter()
+            rng = np.random.default_rng(seed)
+            sample_size = min(count, lists * SAMPLE_ROWS_PER_LIST)
+            sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))], dtype=np.float32)
+            centroids = sample[rng.choice(sample_size, lists, replace=False)]
+            for _ in range(iterations):
+                nearest = _nearest(sample, centroids).astype(np.intp)
+                order = np.argsort(nearest, kind="stable")
+                members, offsets = np.unique(nearest[order], return_index=True)
+                # 空的中心保持不变
+                centroids[members] = np.add.reduceat(sample[order], offsets, axis=0)
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+            # 先写临时文件再替换，读取方按中心文件的inode和修改时间发现变化
+            tmp_lists = f"{self.lists_path}.tmp"
+            tmp_centroids = f"{self.centroids_path}.tmp.npy"
+            _nearest(vectors, centroids).tofile(tmp_lists)
+            np.save(tmp_centroids, centroids.astype(np.float32))
+            os.replace(tmp_lists, self.lists_path)
+            os.replace(tmp_centroids, self.centroids_path)
+        logger.info(f"相关新闻索引训练完成: {count} 行，{lists} 个列表，耗时 {time.perf_counter() - start:.1f}s")
+        return count
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude: Optional[Union[UUID, str]] = None,
+        min_similarity: float = 0.0,
+        probes: Optional[int] = None,
+    ) -> List[Tuple[UUID, float]]:
+        """
+        与查询向量余弦相似度最高的k篇新闻
+
+        已训练时只计算最接近的probes个列表中的行和尚未分配列表的行，probes为0时计算全部行。
+
+        Returns:
+            按相似度降序排列的(新闻ID, 相似度)，不含exclude和相似度低于min_similarity的新闻
+        """
+        vectors, ids, centroids, lists = self._open()
+        if vectors is None or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        probes = settings.RELATED_SEARCH_PROBES if probes is None else probes
+        candidates = k + _EXTRA_CANDIDATES
+
+        rows_parts = []
+        scores_parts = []
+        scan_from = 0
+        if lists is not None and probes > 0:
+            selected = np.zeros(len(centroids), dtype=bool)
+            selected[_top(centroids @ query, probes)] = True
+            rows = np.flatnonzero(selected[lists])
+            scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+            top = _top(scores, candidates)
+            rows_parts.append(rows[top])
+            scores_parts.append(scores[top])
+            scan_from = len(lists)
+        for start in range(scan_from, len(vectors), CHUNK_ROWS):
+            scores = np.asarray(vectors[start:start + CHUNK_ROWS], dtype=np.float32) @ query
+            top = _top(scores, candidates)
+            rows_parts.append(top + start)
+            scores_parts.append(scores[top])
+        if not rows_parts:
+            return []
+
+        rows = np.concatenate(rows_parts)
+        scores = np.concatenate(scores_parts)
+        excluded = _id_bytes(exclude) if exclude is not None else None
+        results: List[Tuple[UUID, float]] = []
+        seen = set()
+        for index in np.argsort(-scores):
+            score = float(scores[index])
+            if score < min_similarity or len(results) >= k:
+                break
+            key = bytes(ids[rows[index]]).ljust(ID_BYTES, b"\x00")
+            if key == excluded or key in seen:
+                continue
+            seen.add(key)
+            results.append((UUID(bytes=key), round(score, 4)))
+        return results
+
+
+# 共享的相关新闻索引（目录和维度来自配置）
+related_index = RelatedIndex()
+
+
+def find_related(
+    title: Optional[str], content: Optional[str], k: int = 10, exclude: Optional[Union[UUID, str]] = None
+) -> List[Tuple[UUID, float]]:
+    """
+    查找与给定标题和正文最相似的已索引新闻
+    """
+    start = time.perf_counter()
+    results = related_index.search(
+        vectorize(title, content, related_index.dim), k, exclude=exclude, min_similarity=settings.RELATED_MIN_SIMILARITY
+    )
+    logger.debug(f"相关新闻查询: 索引 {len(related_index)} 条，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+    return results
+
+
+def index_news(news_items: Sequence[Dict]) -> int:
+    """
+    把带id的新闻追加到相关新闻索引
+
+    Returns:
+        实际追加的条数
+    """
+    items = [item for item in news_items if item.get("id")]
+    if not items:
+        return 0
+    vectors = np.stack([vectorize(item.get("title"), item.get("content"), related_index.dim) for item in items])
+    return related_index.add([item["id"] for item in items], vectors)
+
+
+async def backfill(batch_size: int = 1000) -> int:
+    """
+    把数据库中尚未索引的新闻（转载除外）加入索引，用于首次启用或修改维度后补建
+
+    Returns:
+        追加的条数
+    """
+    from sqlalchemy import select
+
+    from app.db.session import AsyncSessionLocal
+    from app.models.news import News
+
+    count = len(related_index)
+    existing = np.fromfile(related_index.ids_path, dtype=f"S{ID_BYTES}", count=count) if count else None
+    added = 0
+    last_id = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            query = select(News.id, News.title, News.content, News.meta_data).order_by(News.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(News.id > last_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            items = [
+                {"id": row.id, "title": row.title, "content": row.content}
+                for row in rows
+                if not (row.meta_data or {}).get("duplicate_of")
+            ]
+            if existing is not None and items:
+                keys = np.array([item["id"].bytes for item in items], dtype=f"S{ID_BYTES}")
+                items = [item for item, found in zip(items, np.isin(keys, existing)) if not found]
+            added += index_news(items)
+            logger.info(f"相关新闻索引补建: 已追加 {added} 条")
+    return added
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "backfill":
+        print(f"追加 {asyncio.run(backfill())} 条，索引共 {len(related_index)} 条")
+    elif command == "train":
+        print(f"已为 {related_index.train()} 行分配列表")
+    else:
+        print("用法: python -m app.services.related backfill|train")
+        sys.exit(2)
@@ -0,0 +1,189 @@
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# 认领到期的搜索词：仍处于到期状态（分数不大于now）的才按调用方算好的时间顺延并返回，
+# 多个调度进程同时检查时每个到期的搜索词只会被一个进程取出
+_CLAIM_DUE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local claimed = {}
+for i = 2, #ARGV, 2 do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) <= now then
+        redis.call('ZADD', KEYS[1], ARGV[i + 1], ARGV[i])
+        claimed[#claimed + 1] = ARGV[i]
+    end
+end
+return claimed
+"""
+
+
+class AdaptiveSchedule:
+    """
+    按新闻产出自适应调整每个搜索词的抓取间隔
+
+    每个搜索词在每个数据源上的产出速率（新新闻数/小时）用指数移动平均跟踪，
+    下次抓取间隔 = 目标产出 / (各数据源速率之和 × 优先级权重)，限制在[最小间隔, 最大间隔]内。
+    这样热门搜索词会被频繁抓取，几乎没有新新闻的搜索词只消耗很少的请求。
+
+    键结构:
+        {prefix}:yield:{query}   各数据源的产出速率和上次抓取时间（hash）
+        {prefix}:due             下次抓取时间（zset，分数为时间戳）
+        {prefix}:weight          优先级权重（hash）
+    """
+
+    def __init__(self, prefix: str = "crawl:schedule") -> None:
+        self.prefix = prefix
+        # 脚本对象绑定注册时的客户端，按进程注册（同RedisTokenBucket）
+        self._script_pid: Optional[int] = None
+        self._script = None
+
+    def _yield_key(self, query: str) -> str:
+        return f"{self.prefix}:yield:{query}"
+
+    @staticmethod
+    def priority_weight(priorities: Iterable[str]) -> float:
+        """
+        多个关键词共用一个搜索词时取最高的优先级权重
+        """
+        weights = [settings.CRAWL_SCHEDULE_PRIORITY_WEIGHTS.get(str(priority), 1.0) for priority in priorities]
+        return max(weights, default=1.0)
+
+    @staticmethod
+    def interval_for(rates: Dict[str, float], weight: float = 1.0) -> float:
+        """
+        根据各数据源的产出速率计算抓取间隔（秒）
+        """
+        rate = sum(rates.values()) * weight
+        if rate <= 0:
+            return float(settings.CRAWL_SCHEDULE_MAX_INTERVAL)
+        interval = settings.CRAWL_SCHEDULE_TARGET_YIELD / rate * 3600
+        return min(max(interval, settings.CRAWL_SCHEDULE_MIN_INTERVAL), settings.CRAWL_SCHEDULE_MAX_INTERVAL)
+
+    async def rates(self, query: str) -> Dict[str, float]:
+        """
+        获取搜索词在各数据源上的产出速率（新新闻数/小时）
+        """
+        values = await get_async_redis().hgetall(self._yield_key(query))
+        return {field[:-5]: float(value) for field, value in values.items() if field.endswith(":rate")}
+
+    async def interval(self, query: str) -> float:
+        """
+        搜索词当前的抓取间隔（秒），还没有产出数据时使用初始间隔
+        """
+        client = get_async_redis()
+        rates = await self.rates(query)
+        if not rates:
+            return float(settings.CRAWL_SCHEDULE_INITIAL_INTERVAL)
+        weight = float(await client.hget(f"{self.prefix}:weight", query) or 1.0)
+        return self.interval_for(rates, weight)
+
+    async def record_yield(self, query: str, new_counts: Dict[str, int], now: Optional[float] = None) -> float:
+        """
+        记录一次抓取的新新闻数，更新产出速率并安排下次抓取
+
+        首次抓取某个数据源时只记录时间（首批结果包含历史积压，不代表产出速率）。
+
+        Args:
+            query: 规范化后的搜索词
+            new_counts: 本次抓取成功的各数据源的新新闻数
+            now: 当前时间戳
+
+        Returns:
+            下次抓取间隔（秒）
+        """
+        now = time.time() if now is None else now
+        client = get_async_redis()
+        key = self._yield_key(query)
+        values = await client.hgetall(key)
+        alpha = settings.CRAWL_SCHEDULE_YIELD_ALPHA
+
+        updates = {}
+        for source, count in new_counts.items():
+            last = values.get(f"{source}:last")
+            updates[f"{source}:last"] = now
+            if last is None:
+                continue
+            # 按实际间隔折算为每小时速率，间隔过短时按最小间隔计算，避免放大噪声
+            hours = max(now - float(last), settings.CRAWL_SCHEDULE_MIN_INTERVAL) / 3600
+            sample = count / hours
+            current = values.get(f"{source}:rate")
+            rate = sample if current is None else float(current) + alpha * (sample - float(current))
+            updates[f"{source}:rate"] = rate
+
+        if updates:
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(key, mapping=updates)
+            pipe.expire(key, settings.CRAWL_SCHEDULE_MAX_INTERVAL * 4)
+            await pipe.execute()
+
+        interval = await self.interval(query)
+        await client.zadd(f"{self.prefix}:due", {query: now + interval})
+        logger.info(
+            f"搜索词 '{query}' 本次新增 {sum(new_counts.values())} 条新闻，"
+            f"下次抓取间隔 {interval / 60:.0f} 分钟"
+        )
+        return interval
+
+    async def sync(self, weights: Dict[str, float], now: Optional[float] = None) -> None:
+        """
+        同步活跃搜索词: 新搜索词立即到期，已停用的搜索词移出调度，并更新优先级权重
+        """
+        now = time.time() if now is None else now
+        client = get_async_redis()
+        scheduled = {query for query, _ in await client.zrange(f"{self.prefix}:due", 0, -1, withscores=True)}
+        removed = [query for query in scheduled if query not in weights]
+
+        pipe = client.pipeline(transaction=True)
+        new = {query: now for query in weights if query not in scheduled}
+        if new:
+            pipe.zadd(f"{self.prefix}:due", new)
+        if removed:
+            pipe.zrem(f"{self.prefix}:due", *removed)
+            pipe.hdel(f"{self.prefix}:weight", *removed)
+        if weights:
+            pipe.hset(f"{self.prefix}:weight", mapping=weights)
+        await pipe.execute()
+
+    async def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """
+        取出已到期的搜索词，并暂时按当前间隔顺延，避免抓取完成前被重复调度
+        """
+        now = time.time() if now is None else now
+        due = await get_async_redis().zrangebyscore(f"{self.prefix}:due", "-inf", now)
+        if not due:
+            return []
+        args = [now]
+        for query in due:
+            args.extend([query, now + await self.interval(query)])
+        if self._script is None or self._script_pid != os.getpid():
+            self._script_pid = os.getpid()
+            self._script = get_async_redis().register_script(_CLAIM_DUE_SCRIPT)
+        return list(await self._script(keys=[f"{self.prefix}:due"], args=args))
+
+    async def stats(self) -> List[Dict]:
+        """
+        获取所有搜索词的调度状态，按下次抓取时间排序
+        """
+        client = get_async_redis()
+        now = time.time()
+        result = []
+        for query, due_at in await client.zrange(f"{self.prefix}:due", 0, -1, withscores=True):
+            rates = await self.rates(query)
+            result.append({
+                "query": query,
+                "rates": rates,
+                "interval": await self.interval(query),
+                "due_in": max(due_at - now, 0.0),
+            })
+        return result
+
+
+# 全局自适应调度
+adaptive_schedule = AdaptiveSchedule()
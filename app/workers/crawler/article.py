@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from lxml import etree
+
+from app.core.config import settings
+from app.workers.crawler.engine import get_session
+from app.workers.crawler.extract import parse_html, text_of
+from app.workers.nlp.normalize import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 不包含正文的标签
+_BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "iframe", "form", "nav", "header", "footer", "aside", "button", "select",
+)
+_PARAGRAPHS = etree.XPath(".//p")
+_READ_CHUNK_SIZE = 16 * 1024
+
+
+class ArticleFetchStats:
+    """
+    全文抓取统计
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.fetched = 0
+        self.failed = 0
+        self.truncated = 0
+        self.bytes = 0
+
+    def as_dict(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "truncated": self.truncated,
+            "bytes": self.bytes,
+            "seconds": elapsed,
+            "articles_per_second": self.fetched / elapsed,
+            "bytes_per_second": self.bytes / elapsed,
+        }
+
+
+async def _download(url: str, max_bytes: int) -> Tuple[bytes, Optional[str], bool]:
+    """
+    流式下载页面，超过max_bytes后截断，内存占用不超过上限
+
+    Returns:
+        (页面字节, 响应头声明的编码, 是否被截断)
+    """
+    session = await get_session()
+    async with session.get(url) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and "html" not in content_type.lower():
+            raise ValueError(f"不是HTML页面: {content_type}")
+
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(_READ_CHUNK_SIZE):
+            remaining = max_bytes - size
+            if len(chunk) >= remaining:
+                chunks.append(chunk[:remaining])
+                size += remaining
+                truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks), response.charset, truncated
+
+
+def extract_article_text(body: bytes, encoding: Optional[str] = None) -> str:
+    """
+    去除导航、脚本等模板内容，提取正文文本
+
+    以段落文本总长度最大的父元素作为正文容器，没有段落时退回到整个body的文本。
+    """
+    root = parse_html(body, encoding)
+    if root is None:
+        return ""
+
+    etree.strip_elements(root, *_BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+
+    scores: Dict[etree._Element, int] = {}
+    for paragraph in _PARAGRAPHS(root):
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + len(text_of(paragraph).strip())
+
+    if scores:
+        container = max(scores, key=scores.get)
+        paragraphs = [normalize_text(text_of(paragraph)) for paragraph in container.iterchildren("p")]
+        text = "\n".join(paragraph for paragraph in paragraphs if paragraph)
+        if text:
+            return text
+
+    body_elements = root.xpath("//body")
+    return normalize_text(text_of(body_elements[0] if body_elements else root))
+
+
+async def fetch_articles(news_items: List[Dict]) -> List[Dict]:
+    """
+    并发抓取新闻全文，替换只有摘要片段的content
+
+    全局并发受ARTICLE_CONCURRENCY限制，同一域名的并发受ARTICLE_PER_DOMAIN_CONCURRENCY限制，
+    单页下载量不超过ARTICLE_MAX_BYTES。抓取失败的新闻保留原摘要。
+    """
+    stats = ArticleFetchStats()
+    global_limit = asyncio.Semaphore(settings.ARTICLE_CONCURRENCY)
+    domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def fetch_one(news_item: Dict) -> Dict:
+        url = news_item.get("url", "")
+        domain = urlsplit(url).hostname or ""
+        domain_limit = domain_limits.setdefault(domain, asyncio.Semaphore(settings.ARTICLE_PER_DOMAIN_CONCURRENCY))
+
+        async with domain_limit, global_limit:
+            try:
+                body, encoding, truncated = await _download(url, settings.ARTICLE_MAX_BYTES)
+            except Exception as e:
+                stats.failed += 1
+                logger.debug(f"抓取新闻全文失败 {url}: {str(e)}")
+                return news_item
+
+        stats.bytes += len(body)
+        stats.truncated += int(truncated)
+        try:
+            text = extract_article_text(body, encoding)
+        except Exception as e:
+            # 只有注释或XML声明的页面会让lxml抛出ParserError
+            stats.failed += 1
+            logger.debug(f"提取新闻正文失败 {url}: {str(e)}")
+            return news_item
+        if len(text) <= len(news_item.get("content") or ""):
+            return news_item
+
+        stats.fetched += 1
+        return {**news_item, "content": text}
+
+    outcomes = await asyncio.gather(*(fetch_one(item) for item in news_items), return_exceptions=True)
+    results = []
+    for news_item, outcome in zip(news_items, outcomes):
+        if isinstance(outcome, BaseException):
+            stats.failed += 1
+            logger.warning(f"抓取新闻全文出错 {news_item.get('url')}: {str(outcome)}")
+            results.append(news_item)
+        else:
+            results.append(outcome)
+
+    summary = stats.as_dict()
+    logger.info(
+        f"全文抓取完成: 成功 {summary['fetched']} 篇，失败 {summary['failed']} 篇，截断 {summary['truncated']} 篇，"
+        f"{summary['articles_per_second']:.1f} 篇/秒，{summary['bytes_per_second'] / 1024:.1f} KB/秒"
+    )
+    return results
@@ -0,0 +1,215 @@
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 表示被封禁或限流的HTTP状态码
+# 503也常见于上游临时故障，只有页面同时命中封禁特征时才算封禁
+BLOCK_STATUSES = frozenset({403, 429})
+# 只在页面开头查找验证码特征
+_FINGERPRINT_BYTES = 64 * 1024
+
+# 累计封禁次数并在达到阈值或探测失败时打开熔断器。
+# 计数和状态判断在同一个脚本中完成，并发的worker不会重复熔断或漏掉熔断；
+# 关闭状态下的计数带过期时间，很久以前的零星封禁不会和新的封禁累加。
+# 返回本次打开的冷却时间，没有打开时返回0。
+_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local threshold = tonumber(ARGV[3])
+local open_seconds = tonumber(ARGV[4])
+local max_open_seconds = tonumber(ARGV[5])
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local cooldown
+if state == 'open' then
+    if tonumber(redis.call('HGET', KEYS[1], 'open_until') or '0') > now then
+        return '0'
+    end
+    cooldown = math.min(tonumber(redis.call('HGET', KEYS[1], 'cooldown') or open_seconds) * 2, max_open_seconds)
+elseif failures >= threshold then
+    cooldown = open_seconds
+else
+    redis.call('HSET', KEYS[1], 'reason', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[6])
+    return '0'
+end
+redis.call('HSET', KEYS[1], 'state', 'open', 'reason', ARGV[2], 'cooldown', tostring(cooldown),
+    'open_until', tostring(now + cooldown))
+redis.call('PERSIST', KEYS[1])
+redis.call('DEL', KEYS[2])
+return tostring(cooldown)
+"""
+
+
+class SourceBlockedError(Exception):
+    """
+    数据源被封禁或熔断器处于打开状态
+    """
+
+    def __init__(self, source: str, retry_after: float = 0.0, reason: str = "") -> None:
+        self.source = source
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"数据源 {source} 已熔断{f'（{reason}）' if reason else ''}，{retry_after:.0f} 秒后重试")
+
+
+def detect_block(status: int, body: bytes = b"") -> Optional[str]:
+    """
+    根据状态码和页面内容特征判断是否为封禁/验证码页面
+
+    Returns:
+        封禁原因，正常页面返回None
+    """
+    if status in BLOCK_STATUSES:
+        return f"HTTP {status}"
+
+    head = body[:_FINGERPRINT_BYTES].decode("utf-8", errors="ignore").lower()
+    for fingerprint in settings.CIRCUIT_BLOCK_FINGERPRINTS:
+        if fingerprint.lower() in head:
+            if status == 503:
+                return f"HTTP 503，命中封禁特征 '{fingerprint}'"
+            return f"命中封禁特征 '{fingerprint}'"
+    return None
+
+
+class CircuitBreaker:
+    """
+    按数据源共享的熔断器，状态保存在Redis中
+
+    连续检测到封禁达到阈值后打开（计数在CIRCUIT_FAILURE_WINDOW秒内没有新的封禁时清零），
+    打开期间所有抓取直接失败；
+    冷却时间结束后进入半开状态，只放行一个探测请求：
+    探测成功则关闭，失败则以加倍的冷却时间重新打开。
+    """
+
+    def __init__(self, prefix: str = "crawl:breaker") -> None:
+        self.prefix = prefix
+        # 脚本对象绑定注册时的客户端，按进程注册（同RedisTokenBucket）
+        self._script_pid: Optional[int] = None
+        self._script = None
+
+    def _key(self, source: str) -> str:
+        return f"{self.prefix}:{source}"
+
+    async def state(self, source: str) -> Dict:
+        """
+        获取数据源的熔断器状态
+
+        Returns:
+            包含state、failures、retry_after（距离允许探测的秒数）的字典
+        """
+        data = await get_async_redis().hgetall(self._key(source))
+        state = data.get("state", CLOSED)
+        retry_after = 0.0
+        if state == OPEN:
+            retry_after = max(0.0, float(data.get("open_until", 0)) - time.time())
+            if retry_after == 0:
+                state = HALF_OPEN
+        return {
+            "source": source,
+            "state": state,
+            "failures": int(data.get("failures", 0)),
+            "retry_after": retry_after,
+            "reason": data.get("reason", ""),
+        }
+
+    async def is_available(self, source: str) -> bool:
+        """
+        数据源当前是否允许抓取（关闭或可以探测）
+        """
+        try:
+            return (await self.state(source))["state"] != OPEN
+        except Exception as e:
+            logger.warning(f"读取熔断器状态失败: {str(e)}")
+            return True
+
+    async def before_request(self, source: str) -> bool:
+        """
+        请求前检查，熔断器打开时抛出SourceBlockedError
+
+        半开状态下只有拿到探测锁的请求会被放行。
+
+        Returns:
+            是否为探测请求（请求结束时必须调用record_success、record_failure或release_probe之一）
+        """
+        try:
+            current = await self.state(source)
+        except Exception as e:
+            logger.warning(f"读取熔断器状态失败: {str(e)}")
+            return False
+
+        if current["state"] == CLOSED:
+            return False
+        if current["state"] == OPEN:
+            raise SourceBlockedError(source, current["retry_after"], current["reason"])
+
+        # 半开：同一时间只允许一个探测请求
+        acquired = await get_async_redis().set(
+            f"{self._key(source)}:probe", 1, nx=True, ex=settings.CRAWL_REQUEST_TIMEOUT * 3
+        )
+        if not acquired:
+            raise SourceBlockedError(source, 0.0, "等待探测结果")
+        return True
+
+    async def release_probe(self, source: str) -> None:
+        """
+        探测请求没有得到结果（超时、连接错误等，不能判断是否仍被封禁），释放探测锁，熔断器保持半开
+        """
+        try:
+            await get_async_redis().delete(f"{self._key(source)}:probe")
+        except Exception as e:
+            logger.warning(f"释放熔断器探测锁失败: {str(e)}")
+
+    async def record_success(self, source: str) -> None:
+        """
+        请求成功，关闭熔断器并清零失败计数
+        """
+        client = get_async_redis()
+        try:
+            if await client.exists(self._key(source)):
+                previous = await client.hget(self._key(source), "state")
+                await client.delete(self._key(source), f"{self._key(source)}:probe")
+                if previous and previous != CLOSED:
+                    logger.info(f"数据源 {source} 已恢复，熔断器关闭")
+        except Exception as e:
+            logger.warning(f"更新熔断器状态失败: {str(e)}")
+
+    async def record_failure(self, source: str, reason: str) -> None:
+        """
+        检测到封禁，累计失败次数，达到阈值或探测失败时打开熔断器
+        """
+        if self._script is None or self._script_pid != os.getpid():
+            self._script_pid = os.getpid()
+            self._script = get_async_redis().register_script(_FAILURE_SCRIPT)
+        key = self._key(source)
+        try:
+            cooldown = float(await self._script(
+                keys=[key, f"{key}:probe"],
+                args=[
+                    time.time(),
+                    reason,
+                    settings.CIRCUIT_FAILURE_THRESHOLD,
+                    settings.CIRCUIT_OPEN_SECONDS,
+                    settings.CIRCUIT_MAX_OPEN_SECONDS,
+                    settings.CIRCUIT_FAILURE_WINDOW,
+                ],
+            ))
+        except Exception as e:
+            logger.warning(f"更新熔断器状态失败: {str(e)}")
+            return
+        if cooldown > 0:
+            logger.warning(f"数据源 {source} 疑似被封禁（{reason}），熔断 {cooldown:.0f} 秒")
+
+
+# 全局熔断器
+circuit_breaker = CircuitBreaker()
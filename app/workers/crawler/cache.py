@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# 每次淘汰读取的条目数
+_EVICT_BATCH = 100
+# 超过上限后淘汰到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET = 0.9
+
+
+class CachedResponse(NamedTuple):
+    """
+    缓存的响应
+    """
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ResponseCache:
+    """
+    爬虫响应的磁盘缓存
+
+    使用SQLite保存响应体和校验信息，同一台机器上的worker进程共享；
+    总大小超过上限时按最近访问时间淘汰（LRU）。
+    新鲜期内的请求直接返回缓存，过期后带If-None-Match/If-Modified-Since发起条件请求。
+    总大小和条目数保存在meta表中，随写入和淘汰在同一事务内增减，不需要每次汇总整张表。
+
+    SQLite调用是阻塞的（写锁等待最长10秒），在事件循环中应使用aget/aput/arefresh，
+    它们在线程中执行，不会阻塞其他并发请求。
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._published: Dict[str, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        获取当前进程的数据库连接（fork后重新连接）
+        """
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, body BLOB NOT NULL, encoding TEXT, etag TEXT, last_modified TEXT, "
+                "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # 已有缓存库升级时汇总一次
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) "
+                "SELECT 'bytes', COALESCE(SUM(size), 0) FROM responses"
+            )
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'entries', COUNT(*) FROM responses")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        读取缓存并更新访问时间
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT url, body, encoding, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            return CachedResponse(*row)
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """
+        写入缓存，必要时淘汰最久未访问的条目
+        """
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(url, body, encoding, etag, last_modified, fetched_at, accessed_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, body, encoding, etag, last_modified, now, now, len(body)),
+                )
+                self._add_totals(conn, len(body) - (old[0] if old else 0), 0 if old else 1)
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self.counters["stores"] += 1
+
+    def refresh(self, url: str) -> None:
+        """
+        条件请求返回304时，刷新缓存的抓取时间
+        """
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+            )
+
+    @staticmethod
+    def _add_totals(conn: sqlite3.Connection, size: int, entries: int) -> None:
+        conn.execute("UPDATE meta SET value = value + ? WHERE key = 'bytes'", (size,))
+        conn.execute("UPDATE meta SET value = value + ? WHERE key = 'entries'", (entries,))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """
+        总大小超过上限时按LRU分批淘汰，直到降到上限的_EVICT_TARGET以下（需在写事务中调用）
+        """
+        total = conn.execute("SELECT value FROM meta WHERE key = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * _EVICT_TARGET
+        while total > target:
+            rows = conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            freed = 0
+            for url, size in rows:
+                evicted.append((url,))
+                freed += size
+                if total - freed <= target:
+                    break
+            conn.executemany("DELETE FROM responses WHERE url = ?", evicted)
+            self._add_totals(conn, -freed, -len(evicted))
+            self.counters["evictions"] += len(evicted)
+            total -= freed
+
+    async def aget(self, url: str) -> Optional[CachedResponse]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(
+        self,
+        url: str,
+        body: bytes,
+        encoding: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        await asyncio.to_thread(self.put, url, body, encoding, etag, last_modified)
+
+    async def arefresh(self, url: str) -> None:
+        await asyncio.to_thread(self.refresh, url)
+
+    def ttl(self, source: str) -> int:
+        """
+        数据源的新鲜期（秒）
+        """
+        return settings.CRAWL_CACHE_TTL.get(source, settings.CRAWL_CACHE_DEFAULT_TTL)
+
+    def stats(self) -> Dict:
+        """
+        获取当前进程的命中统计和缓存占用
+        """
+        with self._lock:
+            totals = dict(self._connect().execute("SELECT key, value FROM meta").fetchall())
+        return {
+            **self.counters,
+            "hit_rate": _hit_rate(self.counters),
+            "entries": totals.get("entries", 0),
+            "bytes": totals.get("bytes", 0),
+            "max_bytes": self.max_bytes,
+        }
+
+    async def publish(self) -> Dict:
+        """
+        把当前进程自上次上报以来的计数累加到Redis，并返回所有worker的累计统计
+        """
+        local = await asyncio.to_thread(self.stats)
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=False)
+        for name, value in self.counters.items():
+            delta = value - self._published.get(name, 0)
+            if delta:
+                pipe.hincrby(STATS_KEY, name, delta)
+        pipe.hset(STATS_KEY, mapping={"entries": local["entries"], "bytes": local["bytes"], "max_bytes": self.max_bytes})
+        await pipe.execute()
+        self._published = dict(self.counters)
+        return await shared_stats()
+
+
+def _hit_rate(counters: Dict) -> float:
+    requests = counters.get("hits", 0) + counters.get("revalidated", 0) + counters.get("misses", 0)
+    return (counters.get("hits", 0) + counters.get("revalidated", 0)) / requests if requests else 0.0
+
+
+# Redis中所有worker累计的缓存统计
+STATS_KEY = "crawl:cache:stats"
+
+
+async def shared_stats() -> Dict:
+    """
+    读取所有worker上报的累计命中统计和最近一次上报的缓存占用
+    """
+    values = {name: int(value) for name, value in (await get_async_redis().hgetall(STATS_KEY)).items()}
+    return {**values, "hit_rate": _hit_rate(values)}
+
+
+# 全局响应缓存
+response_cache = ResponseCache(
+    path=os.path.join(settings.CRAWL_CACHE_DIR, "responses.db"),
+    max_bytes=settings.CRAWL_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import logging
+import os
+import ssl
+import threading
+from typing import Any, Awaitable, Dict, NamedTuple, Optional, TypeVar
+
+import aiohttp
+from celery.signals import worker_process_shutdown
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 默认请求头
+DEFAULT_HEADERS = {
+    "User-Agent": settings.USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
+}
+
+# 当前请求的上下文标签（数据源、关键词、页码），录制时写入存档
+request_tags: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("request_tags", default={})
+
+
+# 4xx/5xx响应保留的正文字节数（用于识别封禁/验证码页面）
+ERROR_BODY_BYTES = 64 * 1024
+
+
+class HTTPStatusError(aiohttp.ClientResponseError):
+    """
+    4xx/5xx响应，body为响应正文的开头部分
+    """
+
+    def __init__(self, *args: Any, body: bytes = b"", **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.body = body
+
+
+class FetchResult(NamedTuple):
+    """
+    抓取结果
+    """
+    status: int
+    body: bytes
+    encoding: Optional[str]
+    headers: Dict[str, str]
+
+
+# 每个进程一个事件循环和一个连接池会话，fork之后按pid重新创建
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_session: Optional[aiohttp.ClientSession] = None
+_ssl_context: Optional[ssl.SSLContext] = None
+_transport: Optional["Transport"] = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取当前进程的爬虫事件循环
+    """
+    global _pid, _loop, _session
+    with _lock:
+        if _pid != os.getpid() or _loop is None or _loop.is_closed():
+            # fork出的子进程不能复用父进程的循环和连接
+            _pid = os.getpid()
+            _loop = asyncio.new_event_loop()
+            _session = None
+        return _loop
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    在当前进程的爬虫事件循环中同步执行协程（供Celery任务调用）
+    """
+    return get_loop().run_until_complete(coro)
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    """
+    所有连接共享同一个SSL上下文，以便复用TLS会话缓存
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    获取当前进程共享的HTTP会话
+
+    会话使用长连接连接池，并按主机限制并发，DNS解析结果在进程内缓存，
+    因此同一worker处理的多个任务会复用TCP/TLS连接。
+    """
+    global _session
+    get_loop()
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings.CRAWL_MAX_CONNECTIONS,
+            limit_per_host=settings.CRAWL_PER_HOST_CONCURRENCY,
+            ttl_dns_cache=settings.CRAWL_DNS_CACHE_TTL,
+            keepalive_timeout=settings.CRAWL_KEEPALIVE_TIMEOUT,
+            ssl=_get_ssl_context(),
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=settings.CRAWL_REQUEST_TIMEOUT),
+        )
+    return _session
+
+
+class Transport:
+    """
+    HTTP传输层，默认通过共享会话发起真实请求
+
+    录制/回放等替代实现见app.workers.crawler.replay。
+    """
+
+    async def fetch(
+        self,
+        url: str,
+        *,
+        proxy: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> FetchResult:
+        session = await get_session()
+        async with session.get(url, proxy=proxy, headers=headers) as response:
+            if response.status == 304:
+                return FetchResult(304, b"", response.charset, dict(response.headers))
+            if response.status >= 400:
+                raise HTTPStatusError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=response.reason or "",
+                    headers=response.headers,
+                    body=await response.content.read(ERROR_BODY_BYTES),
+                )
+            return FetchResult(response.status, await response.read(), response.charset, dict(response.headers))
+
+
+def get_transport() -> Transport:
+    """
+    获取当前使用的传输层
+
+    配置了CRAWL_RECORD_DIR时，真实请求的结果会同时录制到存档中。
+    """
+    global _transport
+    if _transport is None:
+        _transport = Transport()
+        if settings.CRAWL_RECORD_DIR:
+            from app.workers.crawler.replay import RecordingTransport
+            _transport = RecordingTransport(_transport, settings.CRAWL_RECORD_DIR)
+    return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> None:
+    """
+    替换传输层（如回放存档），传None恢复默认
+    """
+    global _transport
+    _transport = transport
+
+
+async def fetch_response(
+    url: str,
+    *,
+    proxy: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> FetchResult:
+    """
+    抓取页面并返回状态码、原始字节和响应头
+
+    304（未修改）不视为错误，其他4xx/5xx状态抛出异常。
+    """
+    return await get_transport().fetch(url, proxy=proxy, headers=headers)
+
+
+async def close_session() -> None:
+    """
+    关闭当前进程的HTTP会话
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(**kwargs):
+    """
+    Worker进程退出时关闭连接池
+    """
+    if _loop is not None and not _loop.is_closed() and _pid == os.getpid():
+        try:
+            _loop.run_until_complete(close_session())
+        except Exception as e:
+            logger.warning(f"关闭爬虫会话失败: {str(e)}")
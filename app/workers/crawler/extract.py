@@ -0,0 +1,97 @@
+import codecs
+import re
+from typing import Dict, Optional
+
+from lxml import etree, html as lxml_html
+
+# 在文档头部查找<meta charset>声明的范围
+_SNIFF_BYTES = 2048
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+
+# 每种编码复用一个解析器实例
+_parsers: Dict[str, lxml_html.HTMLParser] = {}
+
+
+def normalize_encoding(encoding: Optional[str]) -> Optional[str]:
+    """
+    将编码名称规范化为Python编解码器名称，无法识别时返回None
+
+    GBK/GB2312统一按GB18030解码，兼容国内站点常见的声明错误。
+    """
+    if not encoding:
+        return None
+    try:
+        name = codecs.lookup(encoding.strip()).name
+    except LookupError:
+        return None
+    if name in ("gbk", "gb2312"):
+        return "gb18030"
+    return name
+
+
+def sniff_encoding(body: bytes, declared: Optional[str] = None, default: str = "utf-8") -> str:
+    """
+    确定页面编码：优先使用响应头声明，其次是文档头部的meta声明，最后使用默认编码
+
+    不做基于统计的字符集猜测。
+    """
+    encoding = normalize_encoding(declared)
+    if encoding:
+        return encoding
+
+    if body.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+
+    match = _META_CHARSET.search(body[:_SNIFF_BYTES])
+    if match:
+        encoding = normalize_encoding(match.group(1).decode("ascii", "ignore"))
+        if encoding:
+            return encoding
+
+    return default
+
+
+def parse_html(body: bytes, encoding: Optional[str] = None) -> Optional[etree._Element]:
+    """
+    使用lxml按指定编码解析HTML，空文档返回None
+    """
+    if not body or not body.strip():
+        return None
+
+    encoding = sniff_encoding(body, encoding)
+    parser = _parsers.get(encoding)
+    if parser is None:
+        parser = lxml_html.HTMLParser(encoding=encoding)
+        _parsers[encoding] = parser
+
+    return lxml_html.document_fromstring(body, parser=parser)
+
+
+def decode_html(body: bytes, encoding: Optional[str] = None) -> str:
+    """
+    按确定的编码将页面解码为文本
+    """
+    return body.decode(sniff_encoding(body, encoding), errors="replace")
+
+
+def class_xpath(tag: str, css_class: str) -> str:
+    """
+    生成与CSS选择器 tag.css_class 等价的XPath条件
+    """
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+def compile_xpath(path: str) -> etree.XPath:
+    """
+    预编译XPath表达式，避免每次解析时重复编译
+    """
+    return etree.XPath(path)
+
+
+def text_of(element: Optional[etree._Element]) -> str:
+    """
+    获取元素的文本内容（与BeautifulSoup的.text一致，不含注释）
+    """
+    if element is None:
+        return ""
+    return element.text_content()
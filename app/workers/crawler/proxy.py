@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.workers.crawler.engine import get_session
+
+logger = logging.getLogger(__name__)
+
+# 原子地更新代理的成功/失败次数、连续失败次数和延迟的指数移动平均；
+# 代理已移出代理池时不更新（返回-1），避免迟到的上报重新创建已删除的统计
+_REPORT_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[2], ARGV[4]) == 0 then
+    return -1
+end
+local alpha = tonumber(ARGV[3])
+if ARGV[1] == '1' then
+    redis.call('HINCRBY', KEYS[1], 'success', 1)
+    redis.call('HSET', KEYS[1], 'consecutive_failures', 0)
+    local latency = tonumber(ARGV[2])
+    local current = tonumber(redis.call('HGET', KEYS[1], 'latency'))
+    if current == nil then
+        current = latency
+    else
+        current = current + alpha * (latency - current)
+    end
+    redis.call('HSET', KEYS[1], 'latency', tostring(current))
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'failure', 1)
+return redis.call('HINCRBY', KEYS[1], 'consecutive_failures', 1)
+"""
+
+
+class ProxyPool:
+    """
+    基于健康度的代理池
+
+    代理列表从PROXY_API_URL加载，各代理的成功率和延迟保存在Redis中，所有worker共享。
+    选择代理时按健康度加权随机，连续失败的代理被隔离一段时间，
+    样本足够且成功率过低的代理直接移出代理池。
+
+    键结构:
+        {prefix}:pool            代理集合
+        {prefix}:stats:{proxy}   代理统计（hash）
+        {prefix}:quarantine      隔离中的代理（zset，分数为解除隔离的时间）
+    """
+
+    def __init__(self, prefix: str = "crawl:proxy") -> None:
+        self.prefix = prefix
+        # 脚本对象绑定注册时的客户端，按进程注册（同RedisTokenBucket）
+        self._script_pid: Optional[int] = None
+        self._script = None
+
+    def _stats_key(self, proxy: str) -> str:
+        return f"{self.prefix}:stats:{proxy}"
+
+    @staticmethod
+    def _parse_proxies(payload: str) -> List[str]:
+        """
+        解析代理API的返回，支持JSON列表（字符串或含ip/port的对象）以及每行一个代理的文本
+        """
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = [line.strip() for line in payload.splitlines()]
+
+        if isinstance(data, dict):
+            data = data.get("data") or data.get("proxies") or []
+
+        proxies = []
+        for entry in data:
+            if isinstance(entry, dict):
+                if entry.get("proxy"):
+                    entry = entry["proxy"]
+                elif entry.get("ip") and entry.get("port"):
+                    entry = f"{entry['ip']}:{entry['port']}"
+                else:
+                    continue
+            entry = str(entry).strip()
+            if not entry:
+                continue
+            proxies.append(entry if "://" in entry else f"http://{entry}")
+        return proxies
+
+    async def refresh(self, force: bool = False) -> int:
+        """
+        从代理API加载代理列表
+
+        多个worker同时触发时只有一个会真正请求API。
+
+        Returns:
+            代理池中的代理数
+        """
+        client = get_async_redis()
+        if not settings.PROXY_API_URL:
+            return await client.scard(f"{self.prefix}:pool")
+
+        lock_key = f"{self.prefix}:refresh_lock"
+        if not await client.set(lock_key, 1, nx=True, ex=settings.PROXY_REFRESH_INTERVAL) and not force:
+            return await client.scard(f"{self.prefix}:pool")
+
+        session = await get_session()
+        params = {"key": settings.PROXY_API_KEY} if settings.PROXY_API_KEY else None
+        async with session.get(settings.PROXY_API_URL, params=params) as response:
+            response.raise_for_status()
+            proxies = self._parse_proxies(await response.text())
+
+        if not proxies:
+            logger.warning("代理API没有返回可用代理")
+            return await client.scard(f"{self.prefix}:pool")
+
+        # 用API返回的列表替换代理池，保留仍在列表中的代理的历史统计
+        current = set(proxies)
+        old = await client.smembers(f"{self.prefix}:pool")
+        removed = [proxy for proxy in old if proxy not in current]
+        pipe = client.pipeline(transaction=True)
+        pipe.sadd(f"{self.prefix}:pool", *proxies)
+        if removed:
+            pipe.srem(f"{self.prefix}:pool", *removed)
+            pipe.zrem(f"{self.prefix}:quarantine", *removed)
+            pipe.delete(*[self._stats_key(proxy) for proxy in removed])
+        await pipe.execute()
+
+        logger.info(f"代理池已刷新，共 {len(proxies)} 个代理，移除 {len(removed)} 个")
+        return len(proxies)
+
+    @staticmethod
+    def health(stats: Dict[str, str]) -> float:
+        """
+        计算代理健康度：平滑后的成功率除以延迟惩罚
+        """
+        success = int(stats.get("success", 0))
+        failure = int(stats.get("failure", 0))
+        success_rate = (success + 1) / (success + failure + 2)
+        latency = float(stats.get("latency", settings.PROXY_REFERENCE_LATENCY))
+        return success_rate / (1 + latency / settings.PROXY_REFERENCE_LATENCY)
+
+    async def pick(self) -> Optional[str]:
+        """
+        按健康度加权随机选择一个代理，代理池为空时返回None
+        """
+        client = get_async_redis()
+        proxies = list(await client.smembers(f"{self.prefix}:pool"))
+        if len(proxies) < settings.PROXY_MIN_POOL_SIZE:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"刷新代理池失败: {str(e)}")
+            proxies = list(await client.smembers(f"{self.prefix}:pool"))
+
+        now = time.time()
+        # 顺便清理已解除隔离的代理
+        await client.zremrangebyscore(f"{self.prefix}:quarantine", "-inf", now)
+        quarantined = set(await client.zrange(f"{self.prefix}:quarantine", 0, -1))
+        proxies = [proxy for proxy in proxies if proxy not in quarantined]
+        if not proxies:
+            return None
+
+        pipe = client.pipeline(transaction=False)
+        for proxy in proxies:
+            pipe.hgetall(self._stats_key(proxy))
+        weights = [self.health(stats) for stats in await pipe.execute()]
+        return random.choices(proxies, weights=weights, k=1)[0]
+
+    async def report(self, proxy: str, success: bool, latency: float = 0.0) -> None:
+        """
+        上报一次请求结果
+
+        Args:
+            proxy: 代理地址
+            success: 请求是否成功
+            latency: 请求耗时（秒）
+        """
+        client = get_async_redis()
+        if self._script is None or self._script_pid != os.getpid():
+            self._script_pid = os.getpid()
+            self._script = client.register_script(_REPORT_SCRIPT)
+        try:
+            consecutive_failures = int(await self._script(
+                keys=[self._stats_key(proxy), f"{self.prefix}:pool"],
+                args=["1" if success else "0", latency, settings.PROXY_LATENCY_ALPHA, proxy],
+            ))
+            if success or consecutive_failures < 0:
+                return
+
+            stats = await client.hgetall(self._stats_key(proxy))
+            success_count = int(stats.get("success", 0))
+            failure_count = int(stats.get("failure", 0))
+            total = success_count + failure_count
+            if total >= settings.PROXY_MIN_SAMPLES and success_count / total < settings.PROXY_MIN_SUCCESS_RATE:
+                # 样本足够且成功率过低，移出代理池
+                await self.evict(proxy)
+                logger.info(f"代理 {proxy} 成功率过低，已移出代理池")
+            elif consecutive_failures >= settings.PROXY_MAX_CONSECUTIVE_FAILURES:
+                await client.zadd(
+                    f"{self.prefix}:quarantine", {proxy: time.time() + settings.PROXY_QUARANTINE_SECONDS}
+                )
+                logger.info(f"代理 {proxy} 连续失败 {consecutive_failures} 次，隔离 {settings.PROXY_QUARANTINE_SECONDS} 秒")
+        except Exception as e:
+            logger.warning(f"上报代理状态失败: {str(e)}")
+
+    async def evict(self, proxy: str) -> None:
+        """
+        将代理移出代理池
+        """
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=True)
+        pipe.srem(f"{self.prefix}:pool", proxy)
+        pipe.zrem(f"{self.prefix}:quarantine", proxy)
+        pipe.delete(self._stats_key(proxy))
+        await pipe.execute()
+
+    async def stats(self) -> List[Dict]:
+        """
+        获取所有代理的状态，按健康度从高到低排序
+        """
+        client = get_async_redis()
+        now = time.time()
+        proxies = list(await client.smembers(f"{self.prefix}:pool"))
+        await client.zremrangebyscore(f"{self.prefix}:quarantine", "-inf", now)
+        quarantine = dict(await client.zrange(f"{self.prefix}:quarantine", 0, -1, withscores=True))
+        pipe = client.pipeline(transaction=False)
+        for proxy in proxies:
+            pipe.hgetall(self._stats_key(proxy))
+
+        result = []
+        for proxy, stats in zip(proxies, await pipe.execute()):
+            result.append({
+                "proxy": proxy,
+                "success": int(stats.get("success", 0)),
+                "failure": int(stats.get("failure", 0)),
+                "latency": float(stats["latency"]) if "latency" in stats else None,
+                "health": self.health(stats),
+                "quarantined": quarantine.get(proxy, 0) > now,
+            })
+        return sorted(result, key=lambda item: item["health"], reverse=True)
+
+
+# 全局代理池
+proxy_pool = ProxyPool()
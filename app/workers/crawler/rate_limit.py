@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# 令牌桶脚本：按经过的时间补充令牌后预占请求的令牌。
+# 令牌不足时桶变为负数，返回调用方需要等待的秒数，
+# 因此等待者按到达顺序依次获得时间片，无需轮询。
+# 时间取Redis服务器的TIME，各worker主机的时钟偏差不会导致多补或少补令牌；
+# Redis 5以下在脚本中调用TIME这类非确定性命令前需要开启命令复制。
+_ACQUIRE_SCRIPT = """
+if redis.replicate_commands then
+    pcall(redis.replicate_commands)
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+if now > ts then
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    ts = now
+end
+tokens = tokens - requested
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(ts))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate + wait) + 60)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """
+    基于Redis的分布式令牌桶限速器
+
+    每个数据源一个桶，所有爬虫worker共享，
+    因此增加worker不会增加对目标站点的请求频率。
+    """
+
+    def __init__(self, prefix: str = "crawl:ratelimit") -> None:
+        self.prefix = prefix
+        # 脚本对象绑定注册时的客户端，异步客户端每个进程单独创建，脚本也按进程注册
+        self._script_pid: Optional[int] = None
+        self._script = None
+
+    def _key(self, source: str) -> str:
+        return f"{self.prefix}:{source}"
+
+    def get_rate(self, source: str) -> float:
+        """
+        获取数据源的速率（每秒令牌数），未单独配置时按CRAWL_DELAY换算
+        """
+        rate = settings.CRAWL_RATE_LIMITS.get(source)
+        if rate:
+            return float(rate)
+        return 1.0 / max(settings.CRAWL_DELAY, 0.001)
+
+    def get_capacity(self, source: str) -> float:
+        """
+        获取数据源的桶容量（允许的突发请求数）
+        """
+        return float(max(settings.CRAWL_RATE_BURST, 1))
+
+    async def acquire(self, source: str, tokens: float = 1.0) -> float:
+        """
+        异步等待直到获得令牌
+
+        Args:
+            source: 数据源
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数
+        """
+        if self._script is None or self._script_pid != os.getpid():
+            self._script_pid = os.getpid()
+            self._script = get_async_redis().register_script(_ACQUIRE_SCRIPT)
+        try:
+            wait = float(await self._script(
+                keys=[self._key(source)],
+                args=[self.get_rate(source), self.get_capacity(source), tokens],
+            ))
+        except Exception as e:
+            # Redis不可用时退化为本地延迟，保证不会无限制地请求
+            logger.warning(f"限速器不可用，使用本地延迟: {str(e)}")
+            wait = tokens / self.get_rate(source)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def fill_level(self, source: str) -> Dict[str, float]:
+        """
+        获取数据源当前的令牌数量
+
+        Returns:
+            包含tokens(当前令牌数，负数表示排队中的请求)、capacity和rate的字典
+        """
+        client = get_async_redis()
+        rate = self.get_rate(source)
+        capacity = self.get_capacity(source)
+        pipe = client.pipeline(transaction=False)
+        pipe.hmget(self._key(source), "tokens", "ts")
+        pipe.time()
+        (tokens, ts), (seconds, microseconds) = await pipe.execute()
+        if tokens is None or ts is None:
+            level = capacity
+        else:
+            # 与令牌桶脚本一样按Redis服务器时间计算
+            elapsed = max(0.0, seconds + microseconds / 1e6 - float(ts))
+            level = min(capacity, float(tokens) + elapsed * rate)
+        return {"tokens": level, "capacity": capacity, "rate": rate}
+
+
+# 全局限速器实例
+rate_limiter = RedisTokenBucket()
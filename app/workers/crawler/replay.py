@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from app.workers.crawler.engine import ERROR_BODY_BYTES, FetchResult, HTTPStatusError, Transport, request_tags
+
+logger = logging.getLogger(__name__)
+
+# 录制时保留的响应头
+_RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Date")
+
+
+def _response_error(url: str, status: int, message: str = "", body: bytes = b"") -> HTTPStatusError:
+    """
+    构造与真实传输层一致的异常
+    """
+    request_info = aiohttp.RequestInfo(URL(url), "GET", CIMultiDictProxy(CIMultiDict()), URL(url))
+    return HTTPStatusError(request_info, (), status=status, message=message, body=body)
+
+
+def read_archive(paths: List[str]) -> Iterator[Dict]:
+    """
+    读取一个或多个存档（支持通配符和目录），逐条返回记录
+
+    记录字段: url, status, encoding, headers, body（base64）, elapsed, recorded_at, tags
+    """
+    for pattern in paths:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.jsonl.gz")
+        for path in sorted(glob.glob(pattern)):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class RecordingTransport(Transport):
+    """
+    包装真实传输层，把每次请求的结果追加到gzip压缩的JSONL存档
+
+    每个进程写自己的文件，避免多个worker同时写同一个gzip流；
+    每条记录是独立的gzip成员，进程被杀死也不会损坏已写入的记录。
+    """
+
+    def __init__(self, inner: Transport, directory: str) -> None:
+        self.inner = inner
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, f"crawl-{os.getpid()}.jsonl.gz")
+
+    def _write(self, record: Dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(self._path(), "ab") as f:
+                f.write(line)
+
+    async def fetch(
+        self,
+        url: str,
+        *,
+        proxy: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> FetchResult:
+        start = time.monotonic()
+        record = {"url": url, "recorded_at": time.time(), "tags": request_tags.get()}
+        try:
+            result = await self.inner.fetch(url, proxy=proxy, headers=headers)
+        except aiohttp.ClientResponseError as e:
+            # 4xx/5xx也录制下来，回放时按原状态码抛出
+            body = getattr(e, "body", b"")[:ERROR_BODY_BYTES]
+            record.update(
+                status=e.status,
+                encoding=None,
+                headers={},
+                body=base64.b64encode(body).decode("ascii"),
+                elapsed=time.monotonic() - start,
+            )
+            self._safe_write(record)
+            raise
+
+        record.update(
+            status=result.status,
+            encoding=result.encoding,
+            headers={name: result.headers[name] for name in _RECORDED_HEADERS if name in result.headers},
+            body=base64.b64encode(result.body).decode("ascii"),
+            elapsed=time.monotonic() - start,
+        )
+        self._safe_write(record)
+        return result
+
+    def _safe_write(self, record: Dict) -> None:
+        try:
+            self._write(record)
+        except Exception as e:
+            logger.warning(f"录制HTTP响应失败: {str(e)}")
+
+
+class ReplayTransport(Transport):
+    """
+    从存档回放HTTP响应，不访问网络
+
+    同一URL录制了多次时按顺序轮流返回。可以注入延迟和错误，
+    随机数使用固定种子，相同参数下的回放结果完全一致。
+
+    Args:
+        records: 存档记录
+        latency: 每次请求的固定延迟（秒），None表示按录制时的耗时乘以latency_scale
+        latency_scale: 录制耗时的缩放比例，0表示不等待
+        error_rate: 注入错误的概率
+        error_status: 注入的错误状态码，0表示注入超时
+        seed: 随机种子
+    """
+
+    def __init__(
+        self,
+        records: List[Dict],
+        latency: Optional[float] = None,
+        latency_scale: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._records: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        for record in records:
+            self._records.setdefault(record["url"], []).append(record)
+        self.counters = {"served": 0, "bytes": 0, "injected_errors": 0, "missing": 0}
+
+    @classmethod
+    def from_archive(cls, paths: List[str], **kwargs) -> "ReplayTransport":
+        return cls(list(read_archive(paths)), **kwargs)
+
+    def add(self, url: str, body: bytes, status: int = 200, encoding: Optional[str] = "utf-8", **extra) -> None:
+        """
+        添加一条记录（用于生成合成存档）
+        """
+        self._records.setdefault(url, []).append({
+            "url": url,
+            "status": status,
+            "encoding": encoding,
+            "headers": {},
+            "body": base64.b64encode(body).decode("ascii"),
+            "elapsed": 0.0,
+            **extra,
+        })
+
+    def records(self) -> Iterator[Dict]:
+        for records in self._records.values():
+            yield from records
+
+    async def fetch(
+        self,
+        url: str,
+        *,
+        proxy: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> FetchResult:
+        records = self._records.get(url)
+        if not records:
+            self.counters["missing"] += 1
+            raise _response_error(url, 404, "存档中没有该URL")
+
+        index = self._cursor.get(url, 0)
+        self._cursor[url] = index + 1
+        record = records[index % len(records)]
+
+        delay = self.latency if self.latency is not None else record.get("elapsed", 0.0) * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.counters["injected_errors"] += 1
+            if not self.error_status:
+                raise asyncio.TimeoutError()
+            raise _response_error(url, self.error_status, "注入的错误")
+
+        status = record["status"]
+        if status >= 400:
+            raise _response_error(url, status, body=base64.b64decode(record.get("body") or ""))
+
+        body = base64.b64decode(record["body"]) if status != 304 else b""
+        self.counters["served"] += 1
+        self.counters["bytes"] += len(body)
+        return FetchResult(status, body, record.get("encoding"), dict(record.get("headers") or {}))
@@ -0,0 +1,318 @@
+import hashlib
+import logging
+import math
+from typing import AsyncIterable, AsyncIterator, Dict, List, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.workers.crawler.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class ScalableBloomFilter:
+    """
+    存储在Redis中的可扩展布隆过滤器
+
+    由若干层位图组成，每层写满设计容量后追加一层更大、误判率更低的新层，
+    因此总体误判率始终不超过 error_rate / (1 - tightening)。
+    所有层的位图都以字符串形式保存在Redis中，通过BITFIELD批量读写。
+
+    键结构:
+        {prefix}:generation        当前代数（重建时递增后切换）
+        {prefix}:rebuilding        正在重建的代数（重建期间新增元素同时写入新旧两代）
+        {prefix}:{gen}:layers      当前层数
+        {prefix}:{gen}:count       各层已写入的元素数（hash）
+        {prefix}:{gen}:layer:{i}   第i层位图
+    """
+
+    def __init__(
+        self,
+        prefix: str = "crawl:seen",
+        initial_capacity: int = 1000000,
+        error_rate: float = 0.001,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ) -> None:
+        self.prefix = prefix
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+
+    def layer_params(self, index: int) -> Tuple[int, int, int]:
+        """
+        计算第index层的参数
+
+        Returns:
+            (容量, 位数, 哈希函数个数)
+        """
+        capacity = self.initial_capacity * self.growth ** index
+        error = self.error_rate * self.tightening ** index
+        bits = int(math.ceil(-capacity * math.log(error) / (math.log(2) ** 2)))
+        hashes = max(1, int(round(bits / capacity * math.log(2))))
+        return capacity, bits, hashes
+
+    @staticmethod
+    def _positions(value: str, bits: int, hashes: int) -> List[int]:
+        """
+        双重哈希计算元素在位图中的位置
+        """
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % bits for i in range(hashes)]
+
+    def _key(self, generation: int, name: str) -> str:
+        return f"{self.prefix}:{generation}:{name}"
+
+    async def _generation(self) -> int:
+        """
+        获取当前代数
+        """
+        return int(await get_async_redis().get(f"{self.prefix}:generation") or 0)
+
+    async def _layers(self, generation: int) -> int:
+        """
+        获取指定代数的层数
+        """
+        return int(await get_async_redis().get(self._key(generation, "layers")) or 1)
+
+    async def contains_many(self, values: Sequence[str]) -> List[bool]:
+        """
+        批量判断元素是否已存在（可能误判为存在，不会漏判）
+        """
+        if not values:
+            return []
+
+        generation = await self._generation()
+        layers = await self._layers(generation)
+        pipe = get_async_redis().pipeline(transaction=False)
+        for value in values:
+            for index in range(layers):
+                _, bits, hashes = self.layer_params(index)
+                args = []
+                for position in self._positions(value, bits, hashes):
+                    args.extend(("GET", "u1", position))
+                pipe.execute_command("BITFIELD", self._key(generation, f"layer:{index}"), *args)
+        results = await pipe.execute()
+
+        found = []
+        for i in range(len(values)):
+            layer_results = results[i * layers:(i + 1) * layers]
+            found.append(any(all(bits) for bits in layer_results))
+        return found
+
+    async def add_many(self, values: Sequence[str]) -> List[bool]:
+        """
+        批量添加元素，并判断添加前是否已存在
+
+        旧层只读取，新元素写入最新一层；同一次BITFIELD中先读旧值再置位，
+        因此并发的worker不会同时把同一元素判断为新元素。
+
+        Returns:
+            每个元素添加前是否已存在
+        """
+        if not values:
+            return []
+        generation, rebuilding = await get_async_redis().mget(
+            f"{self.prefix}:generation", f"{self.prefix}:rebuilding"
+        )
+        generation = int(generation or 0)
+        existed = await self._add(generation, values)
+        # 重建期间新代尚未生效，同时写入新代，否则切换后会丢失重建期间入库的URL
+        if rebuilding is not None and int(rebuilding) != generation:
+            await self._add(int(rebuilding), values)
+        return existed
+
+    async def _add(self, generation: int, values: Sequence[str]) -> List[bool]:
+        """
+        向指定代数添加元素
+        """
+        client = get_async_redis()
+        layers = await self._layers(generation)
+        current = layers - 1
+        capacity, current_bits, current_hashes = self.layer_params(current)
+
+        pipe = client.pipeline(transaction=False)
+        for value in values:
+            for index in range(current):
+                _, bits, hashes = self.layer_params(index)
+                args = []
+                for position in self._positions(value, bits, hashes):
+                    args.extend(("GET", "u1", position))
+                pipe.execute_command("BITFIELD", self._key(generation, f"layer:{index}"), *args)
+            args = []
+            for position in self._positions(value, current_bits, current_hashes):
+                args.extend(("SET", "u1", position, 1))
+            pipe.execute_command("BITFIELD", self._key(generation, f"layer:{current}"), *args)
+        results = await pipe.execute()
+
+        existed = []
+        added = 0
+        for i in range(len(values)):
+            layer_results = results[i * layers:(i + 1) * layers]
+            seen = any(all(bits) for bits in layer_results)
+            existed.append(seen)
+            if not all(layer_results[-1]) and not seen:
+                added += 1
+
+        if added:
+            count = await client.hincrby(self._key(generation, "count"), str(current), added)
+            if count >= capacity:
+                await self._grow(generation, current)
+
+        return existed
+
+    async def _grow(self, generation: int, current: int) -> None:
+        """
+        当前层写满后追加新层（多个worker同时触发时只追加一次）
+        """
+        client = get_async_redis()
+        if await client.set(self._key(generation, f"grow:{current}"), 1, nx=True):
+            await client.set(self._key(generation, "layers"), current + 2)
+            logger.info(f"已抓取URL过滤器第 {current + 1} 层已满，追加第 {current + 2} 层")
+
+    async def stats(self) -> Dict:
+        """
+        获取过滤器状态，包括按各层实际置位比例估算的误判率
+        """
+        client = get_async_redis()
+        generation = await self._generation()
+        layers = await self._layers(generation)
+        counts = await client.hgetall(self._key(generation, "count"))
+
+        layer_stats = []
+        no_false_positive = 1.0
+        for index in range(layers):
+            capacity, bits, hashes = self.layer_params(index)
+            set_bits = await client.bitcount(self._key(generation, f"layer:{index}"))
+            false_positive_rate = (set_bits / bits) ** hashes
+            no_false_positive *= 1 - false_positive_rate
+            layer_stats.append({
+                "capacity": capacity,
+                "count": int(counts.get(str(index), 0)),
+                "bits": bits,
+                "hashes": hashes,
+                "fill_ratio": set_bits / bits,
+                "false_positive_rate": false_positive_rate,
+            })
+
+        return {
+            "generation": generation,
+            "layers": layer_stats,
+            "count": sum(layer["count"] for layer in layer_stats),
+            "false_positive_rate": 1 - no_false_positive,
+        }
+
+    async def rebuild(
+        self, values: AsyncIterable[str], batch_size: int = 1000, marker_ttl: int = 3600
+    ) -> int:
+        """
+        用给定元素重建过滤器
+
+        新数据写入下一代键，写完后再切换代数并删除旧键，重建期间旧过滤器照常可用。
+        重建开始前记下新代数，期间add_many同时写入新旧两代；
+        标记带过期时间并随批次续期，重建进程异常退出时不会一直双写。
+
+        Returns:
+            写入的元素数
+        """
+        client = get_async_redis()
+        rebuilding_key = f"{self.prefix}:rebuilding"
+        old_generation = await self._generation()
+        generation = old_generation + 1
+        await self._delete_generation(generation)
+        await client.set(rebuilding_key, generation, ex=marker_ttl)
+
+        total = 0
+        batch = []
+        try:
+            async for value in values:
+                batch.append(value)
+                if len(batch) >= batch_size:
+                    await self._add(generation, batch)
+                    await client.expire(rebuilding_key, marker_ttl)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                await self._add(generation, batch)
+                total += len(batch)
+
+            await client.set(f"{self.prefix}:generation", generation)
+        except BaseException:
+            await client.delete(rebuilding_key)
+            await self._delete_generation(generation)
+            raise
+        await client.delete(rebuilding_key)
+        await self._delete_generation(old_generation)
+        logger.info(f"已抓取URL过滤器重建完成，共 {total} 条，代数 {generation}")
+        return total
+
+    async def _delete_generation(self, generation: int) -> None:
+        """
+        删除指定代数的所有键
+        """
+        client = get_async_redis()
+        keys = [key async for key in client.scan_iter(match=self._key(generation, "*"))]
+        if keys:
+            await client.delete(*keys)
+
+
+# 全局已抓取URL过滤器
+seen_urls = ScalableBloomFilter(
+    initial_capacity=settings.SEEN_URL_FILTER_CAPACITY,
+    error_rate=settings.SEEN_URL_FILTER_ERROR_RATE,
+)
+
+
+async def filter_unseen(news_items: List[Dict]) -> List[Dict]:
+    """
+    按规范化URL过滤掉已入库过的新闻
+
+    这里只查询不写入: URL在新闻入库后才由mark_seen加入过滤器，
+    抓取重试、分析失败或入库失败的新闻下次抓取时仍会被处理。
+    Redis不可用时不做过滤，由入库时的URL唯一约束兜底。
+    """
+    if not news_items:
+        return []
+
+    urls = [canonicalize_url(item.get("url", "")) for item in news_items]
+    try:
+        existed = await seen_urls.contains_many(urls)
+    except Exception as e:
+        logger.warning(f"已抓取URL过滤器不可用，跳过过滤: {str(e)}")
+        return news_items
+
+    return [item for item, seen in zip(news_items, existed) if not seen]
+
+
+async def mark_seen(urls: Sequence[str]) -> None:
+    """
+    把已入库新闻的URL加入过滤器（失败只记录日志，可由rebuild_seen_urls修复）
+    """
+    canonical_urls = [url for url in (canonicalize_url(url) for url in urls) if url]
+    if not canonical_urls:
+        return
+    try:
+        await seen_urls.add_many(canonical_urls)
+    except Exception as e:
+        logger.warning(f"写入已抓取URL过滤器失败: {str(e)}")
+
+
+async def rebuild_seen_urls() -> int:
+    """
+    从news.url列重建已抓取URL过滤器
+    """
+    from sqlalchemy import select
+
+    from app.db.session import AsyncSessionLocal
+    from app.models.news import News
+
+    async def canonical_urls() -> AsyncIterator[str]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(select(News.url).execution_options(yield_per=1000))
+            async for url in result:
+                yield canonicalize_url(url)
+
+    return await seen_urls.rebuild(canonical_urls())
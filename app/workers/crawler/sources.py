@@ -0,0 +1,492 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple, Type
+from urllib.parse import quote, urljoin
+from xml.etree import ElementTree
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+from app.services.keyword import normalize_keyword_text
+from app.workers.crawler.breaker import SourceBlockedError, circuit_breaker, detect_block
+from app.workers.crawler.cache import response_cache
+from app.workers.crawler.engine import fetch_response, request_tags
+from app.workers.crawler.extract import class_xpath, compile_xpath, decode_html, parse_html, text_of
+from app.workers.crawler.proxy import proxy_pool
+from app.workers.crawler.rate_limit import rate_limiter
+from app.workers.crawler.watermark import watermarks
+from app.workers.nlp.normalize import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class NewsSource:
+    """
+    新闻数据源插件基类
+
+    子类实现build_url和parse即可，分页抓取、限速和错误处理由基类完成。
+    """
+    # 数据源名称（注册表中的键）
+    name: str = ""
+    # 新闻来源缺失时使用的默认名称
+    default_source: str = ""
+    # 数据源支持的最大页数
+    max_pages: int = 10
+    # 结果是否按发布时间从新到旧排列（只有这样才能按水位提前停止翻页）
+    time_sorted: bool = False
+
+    def build_url(self, keyword: str, page: int) -> str:
+        """
+        构造第page页（从0开始）的搜索地址
+        """
+        raise NotImplementedError
+
+    def parse(self, body: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        """
+        解析结果页，返回新闻数据字典列表
+
+        Args:
+            body: 页面原始字节
+            encoding: 响应头声明的编码
+        """
+        raise NotImplementedError
+
+    async def fetch_page(self, keyword: str, page: int, proxy: Optional[str] = None) -> List[Dict]:
+        """
+        抓取并解析一页结果
+        """
+        tags = request_tags.set({"source": self.name, "keyword": keyword, "page": page})
+        try:
+            url = self.build_url(keyword, page)
+            body, encoding = await self.fetch(url, proxy=proxy)
+            return self.parse(body, encoding)
+
+        except SourceBlockedError:
+            # 数据源被封禁时直接失败，不再抓取后续页面
+            raise
+
+        except Exception as e:
+            logger.error(f"抓取{self.name}新闻第 {page + 1} 页失败: {str(e)}")
+            return []
+
+        finally:
+            request_tags.reset(tags)
+
+    async def fetch(self, url: str, proxy: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        抓取页面，优先使用响应缓存
+
+        新鲜期内的缓存直接返回，不消耗限速令牌；过期缓存发起条件请求，304时沿用缓存。
+
+        Returns:
+            (页面字节, 编码)
+        """
+        cached = await response_cache.aget(url) if settings.CRAWL_CACHE_ENABLED else None
+        if cached is not None and cached.age < response_cache.ttl(self.name):
+            response_cache.counters["hits"] += 1
+            return cached.body, cached.encoding
+
+        # 熔断器打开时直接失败
+        breaker_enabled = settings.CIRCUIT_BREAKER_ENABLED
+        probing = await circuit_breaker.before_request(self.name) if breaker_enabled else False
+
+        try:
+            headers = {}
+            if cached is not None:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+
+            # 等待该数据源的共享令牌，避免被封
+            if settings.CRAWL_RATE_LIMIT_ENABLED:
+                await rate_limiter.acquire(self.name)
+
+            # 未指定代理时从代理池按健康度选择，并上报结果
+            pooled_proxy = None
+            if proxy is None and settings.PROXY_ENABLED:
+                pooled_proxy = proxy = await proxy_pool.pick()
+
+            start = time.monotonic()
+            try:
+                result = await fetch_response(url, proxy=proxy, headers=headers)
+            except Exception as e:
+                if pooled_proxy:
+                    await proxy_pool.report(pooled_proxy, False)
+                reason = detect_block(e.status, getattr(e, "body", b"")) if isinstance(e, aiohttp.ClientResponseError) else None
+                if reason and breaker_enabled:
+                    await circuit_breaker.record_failure(self.name, reason)
+                    raise SourceBlockedError(self.name, reason=reason) from e
+                raise
+
+            reason = detect_block(result.status, result.body)
+            if pooled_proxy:
+                await proxy_pool.report(pooled_proxy, reason is None, time.monotonic() - start)
+            if breaker_enabled:
+                if reason:
+                    await circuit_breaker.record_failure(self.name, reason)
+                    raise SourceBlockedError(self.name, reason=reason)
+                await circuit_breaker.record_success(self.name)
+        except SourceBlockedError:
+            raise
+        except BaseException:
+            # 探测请求因封禁以外的原因失败（超时、连接错误、取消等）时释放探测锁，由下一个请求重新探测
+            if probing:
+                await circuit_breaker.release_probe(self.name)
+            raise
+
+        if result.status == 304 and cached is not None:
+            response_cache.counters["revalidated"] += 1
+            await response_cache.arefresh(url)
+            return cached.body, cached.encoding
+
+        if settings.CRAWL_CACHE_ENABLED:
+            response_cache.counters["misses"] += 1
+            await response_cache.aput(
+                url,
+                result.body,
+                encoding=result.encoding,
+                etag=result.headers.get("ETag"),
+                last_modified=result.headers.get("Last-Modified"),
+            )
+        return result.body, result.encoding
+
+    async def crawl(self, keyword: str, max_pages: int = 3, proxy: Optional[str] = None) -> List[Dict]:
+        """
+        抓取多页结果
+
+        结果按时间排序的数据源已有水位时按页顺序抓取，一旦某页的新闻全部处于水位以下就停止翻页；
+        其他情况并发抓取所有页。水位在新闻入库后推进（见advance_watermarks），这里只读取。
+        """
+        max_pages = min(max_pages, self.max_pages)
+        watermark = None
+        if settings.CRAWL_WATERMARK_ENABLED and self.time_sorted:
+            watermark = await watermarks.get(self.name, normalize_keyword_text(keyword))
+
+        if watermark is None:
+            pages = await asyncio.gather(
+                *(self.fetch_page(keyword, page, proxy) for page in range(max_pages))
+            )
+            return [item for page_items in pages for item in page_items]
+
+        news_items = []
+        for page in range(max_pages):
+            page_items = await self.fetch_page(keyword, page, proxy)
+            news_items.extend(page_items)
+            if page_items and all(watermark.covers(item) for item in page_items):
+                pages_saved = max_pages - page - 1
+                if pages_saved:
+                    logger.info(f"{self.name} 关键词 '{keyword}' 第 {page + 1} 页已无新新闻，节省 {pages_saved} 页")
+                    await watermarks.record_pages_saved(self.name, pages_saved)
+                break
+        return news_items
+
+
+# 数据源注册表
+SOURCES: Dict[str, NewsSource] = {}
+
+
+def register_source(cls: Type[NewsSource]) -> Type[NewsSource]:
+    """
+    注册数据源插件的类装饰器
+    """
+    SOURCES[cls.name] = cls()
+    return cls
+
+
+def get_source(name: str) -> Optional[NewsSource]:
+    """
+    按名称获取数据源
+    """
+    return SOURCES.get(name)
+
+
+def get_enabled_sources() -> List[NewsSource]:
+    """
+    获取配置中启用的数据源
+    """
+    sources = []
+    for name in settings.CRAWL_ENABLED_SOURCES:
+        source = SOURCES.get(name)
+        if source is None:
+            logger.warning(f"未注册的数据源: {name}")
+            continue
+        sources.append(source)
+    return sources
+
+
+def _parse_chinese_date(text: str) -> Optional[datetime]:
+    """
+    解析“2023年10月1日”或“2023-10-01”格式的日期
+    """
+    try:
+        time_str = text.replace("年", "-").replace("月", "-").replace("日", "")
+        return datetime.strptime(time_str, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+@register_source
+class BaiduNewsSource(NewsSource):
+    """
+    百度新闻
+    """
+    name = "baidu"
+    default_source = "百度新闻"
+    time_sorted = True
+
+    def build_url(self, keyword: str, page: int) -> str:
+        return f"https://news.baidu.com/ns?word={quote(keyword)}&pn={page * 10}&cl=2&ct=1&tn=news&rn=10&ie=utf-8&bt=0&et=0"
+
+    # 预编译的选择器，与原BeautifulSoup选择器一一对应
+    _results = compile_xpath("//" + class_xpath("div", "result"))
+    _title = compile_xpath(".//h3//a")
+    _summary = compile_xpath(".//" + class_xpath("div", "c-summary"))
+    _author = compile_xpath(".//" + class_xpath("div", "c-author"))
+
+    def parse(self, body: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        if settings.CRAWL_HTML_PARSER == "html.parser":
+            return self.parse_soup(decode_html(body, encoding))
+
+        root = parse_html(body, encoding)
+        if root is None:
+            return []
+
+        news_items = []
+        for div in self._results(root):
+            try:
+                title_elems = self._title(div)
+                if not title_elems:
+                    continue
+                title_elem = title_elems[0]
+
+                title = text_of(title_elem).strip()
+                news_url = title_elem.attrib["href"]
+
+                content_elems = self._summary(div)
+                content = text_of(content_elems[0]).strip() if content_elems else ""
+
+                author_elems = self._author(div)
+                news_items.append(
+                    self._build_item(title, news_url, content, text_of(author_elems[0]) if author_elems else None)
+                )
+
+            except Exception as e:
+                logger.warning(f"解析新闻项失败: {str(e)}")
+                continue
+
+        return news_items
+
+    def parse_soup(self, html: str) -> List[Dict]:
+        """
+        使用BeautifulSoup html.parser解析（兼容旧实现，用于对照和回退）
+        """
+        news_items = []
+        soup = BeautifulSoup(html, "html.parser")
+        news_divs = soup.select("div.result")
+
+        for div in news_divs:
+            try:
+                title_elem = div.select_one("h3 a")
+                if not title_elem:
+                    continue
+
+                title = title_elem.text.strip()
+                news_url = title_elem["href"]
+
+                content_elem = div.select_one("div.c-summary")
+                content = content_elem.text.strip() if content_elem else ""
+
+                source_time = div.select_one("div.c-author")
+                news_items.append(
+                    self._build_item(title, news_url, content, source_time.text if source_time else None)
+                )
+
+            except Exception as e:
+                logger.warning(f"解析新闻项失败: {str(e)}")
+                continue
+
+        return news_items
+
+    def _build_item(self, title: str, news_url: str, content: str, source_time: Optional[str]) -> Dict:
+        """
+        根据解析出的字段构造新闻数据字典
+        """
+        source = ""
+        published_at = None
+
+        if source_time:
+            parts = source_time.strip().split()
+            if len(parts) >= 2:
+                source = parts[0]
+                published_at = _parse_chinese_date(parts[1])
+
+        return {
+            "title": normalize_text(title),
+            "url": news_url,
+            "content": normalize_text(content),
+            "source": source or self.default_source,
+            "published_at": published_at,
+            "crawled_at": datetime.utcnow(),
+        }
+
+
+@register_source
+class GoogleNewsSource(NewsSource):
+    """
+    Google新闻（RSS搜索接口，只有一页结果）
+    """
+    name = "google"
+    default_source = "Google新闻"
+    max_pages = 1
+    time_sorted = True
+
+    def build_url(self, keyword: str, page: int) -> str:
+        return f"https://news.google.com/rss/search?q={quote(keyword)}&hl=zh-CN&gl=CN&ceid=CN:zh-Hans"
+
+    def parse(self, body: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        news_items = []
+        # XML自带编码声明，直接解析字节
+        root = ElementTree.fromstring(body)
+
+        for entry in root.iter("item"):
+            try:
+                title = normalize_text(entry.findtext("title"))
+                news_url = (entry.findtext("link") or "").strip()
+                if not title or not news_url:
+                    continue
+
+                # 描述是转义后的HTML片段，直接去除标签和实体，不需要解析成DOM
+                content = normalize_text(entry.findtext("description"))
+
+                published_at = None
+                pub_date = entry.findtext("pubDate")
+                if pub_date:
+                    try:
+                        published_at = parsedate_to_datetime(pub_date).replace(tzinfo=None)
+                    except (TypeError, ValueError):
+                        pass
+
+                news_items.append({
+                    "title": title,
+                    "url": news_url,
+                    "content": content,
+                    "source": (entry.findtext("source") or "").strip() or self.default_source,
+                    "published_at": published_at,
+                    "crawled_at": datetime.utcnow(),
+                })
+
+            except Exception as e:
+                logger.warning(f"解析新闻项失败: {str(e)}")
+                continue
+
+        return news_items
+
+
+@register_source
+class BingNewsSource(NewsSource):
+    """
+    必应新闻
+    """
+    name = "bing"
+    default_source = "必应新闻"
+
+    def build_url(self, keyword: str, page: int) -> str:
+        return f"https://cn.bing.com/news/search?q={quote(keyword)}&first={page * 10 + 1}&FORM=HDRSC6"
+
+    _cards = compile_xpath("//" + class_xpath("div", "news-card"))
+    _title = compile_xpath(".//" + class_xpath("a", "title"))
+    _snippet = compile_xpath(".//" + class_xpath("div", "snippet"))
+
+    def parse(self, body: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        news_items = []
+        root = parse_html(body, encoding)
+        if root is None:
+            return news_items
+
+        for card in self._cards(root):
+            try:
+                title_elems = self._title(card)
+                if not title_elems or not title_elems[0].get("href"):
+                    continue
+                title_elem = title_elems[0]
+
+                content_elems = self._snippet(card)
+
+                news_items.append({
+                    "title": normalize_text(text_of(title_elem)),
+                    "url": title_elem.get("href"),
+                    "content": normalize_text(text_of(content_elems[0])) if content_elems else "",
+                    "source": card.get("data-author") or self.default_source,
+                    # 必应只给出“2小时前”这类相对时间，不做解析
+                    "published_at": None,
+                    "crawled_at": datetime.utcnow(),
+                })
+
+            except Exception as e:
+                logger.warning(f"解析新闻项失败: {str(e)}")
+                continue
+
+        return news_items
+
+
+@register_source
+class SogouNewsSource(NewsSource):
+    """
+    搜狗新闻
+    """
+    name = "sogou"
+    default_source = "搜狗新闻"
+
+    def build_url(self, keyword: str, page: int) -> str:
+        return f"https://news.sogou.com/news?query={quote(keyword)}&page={page + 1}"
+
+    _results = compile_xpath("//" + class_xpath("div", "vrwrap"))
+    _title = compile_xpath(".//h3//a")
+    _summary = compile_xpath(".//" + class_xpath("p", "star-wiki"))
+    _from = compile_xpath(".//" + class_xpath("p", "news-from"))
+
+    def parse(self, body: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        news_items = []
+        root = parse_html(body, encoding)
+        if root is None:
+            return news_items
+
+        for div in self._results(root):
+            try:
+                title_elems = self._title(div)
+                if not title_elems or not title_elems[0].get("href"):
+                    continue
+                title_elem = title_elems[0]
+
+                content_elems = self._summary(div)
+
+                source = ""
+                published_at = None
+                from_elems = self._from(div)
+                if from_elems:
+                    parts = text_of(from_elems[0]).split()
+                    if parts:
+                        source = parts[0]
+                    if len(parts) >= 2:
+                        published_at = _parse_chinese_date(parts[1])
+
+                news_items.append({
+                    "title": normalize_text(text_of(title_elem)),
+                    # 搜狗返回站内跳转的相对地址
+                    "url": urljoin("https://news.sogou.com/", title_elem.get("href")),
+                    "content": normalize_text(text_of(content_elems[0])) if content_elems else "",
+                    "source": source or self.default_source,
+                    "published_at": published_at,
+                    "crawled_at": datetime.utcnow(),
+                })
+
+            except Exception as e:
+                logger.warning(f"解析新闻项失败: {str(e)}")
+                continue
+
+        return news_items
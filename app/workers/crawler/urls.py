@@ -0,0 +1,53 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 默认端口，规范化时去掉
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+    "spm", "scm", "from", "ref", "share_token", "share_from",
+    "wfr", "isappinstalled", "tt_from",
+})
+TRACKING_PREFIXES = ("utm_", "hmsr", "hmpl", "hmcu", "hmkw", "hmci", "wt.", "mc_")
+
+
+def is_tracking_param(name: str) -> bool:
+    """
+    判断查询参数是否为跟踪参数
+    """
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    将URL规范化，用于去重
+
+    http/https统一为https，主机名转小写并去掉默认端口，
+    去掉片段、空参数和跟踪参数，并对剩余查询参数排序。
+    """
+    if not url:
+        return ""
+
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or _DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+
+    if scheme == "http":
+        scheme = "https"
+
+    path = parts.path or "/"
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not is_tracking_param(name)
+    ))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
@@ -0,0 +1,150 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.workers.crawler.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def _published_at(news_item: Dict) -> Optional[datetime]:
+    """
+    新闻的发布时间（经任务消息传递后为ISO格式字符串）
+    """
+    value = news_item.get("published_at")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, datetime) else None
+
+
+class Watermark:
+    """
+    某个关键词在某个数据源上已抓取到的最高水位
+
+    published_at为已抓取新闻中最新的发布时间，urls为最近一次抓取的新闻URL。
+    """
+
+    def __init__(self, published_at: Optional[datetime] = None, urls: Optional[List[str]] = None) -> None:
+        self.published_at = published_at
+        self.urls = urls or []
+        self._url_set = set(self.urls)
+
+    def covers(self, news_item: Dict) -> bool:
+        """
+        判断新闻是否处于水位以下（即之前已抓取过）
+
+        数据源给出的发布时间通常只精确到天，因此与水位同一天的新闻只按URL判断。
+        """
+        if canonicalize_url(news_item.get("url", "")) in self._url_set:
+            return True
+        published_at = news_item.get("published_at")
+        return bool(published_at and self.published_at and published_at < self.published_at)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "urls": self.urls,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "Watermark":
+        value = json.loads(data)
+        published_at = value.get("published_at")
+        return cls(
+            published_at=datetime.fromisoformat(published_at) if published_at else None,
+            urls=value.get("urls", []),
+        )
+
+
+class WatermarkStore:
+    """
+    按关键词和数据源保存抓取水位，并统计因提前停止翻页而节省的页数
+    """
+
+    def __init__(self, prefix: str = "crawl:watermark", max_urls: int = 100) -> None:
+        self.prefix = prefix
+        self.max_urls = max_urls
+
+    def _key(self, source: str) -> str:
+        return f"{self.prefix}:{source}"
+
+    async def get(self, source: str, keyword: str) -> Optional[Watermark]:
+        """
+        获取水位，不存在或Redis不可用时返回None（即全量抓取）
+        """
+        try:
+            data = await get_async_redis().hget(self._key(source), keyword)
+        except Exception as e:
+            logger.warning(f"读取抓取水位失败: {str(e)}")
+            return None
+        return Watermark.from_json(data) if data else None
+
+    async def update(self, source: str, keyword: str, news_items: List[Dict], previous: Optional[Watermark] = None) -> None:
+        """
+        根据本次抓取结果推进水位
+
+        URL按结果顺序（最新在前）保留，不足部分用旧水位的URL补齐。
+        只应传入已入库的新闻，否则入库失败后重新抓取时这些新闻会被当作已抓取而提前停止翻页。
+        """
+        if not news_items:
+            return
+
+        published = [published_at for published_at in map(_published_at, news_items) if published_at]
+        if previous and previous.published_at:
+            published.append(previous.published_at)
+
+        urls = []
+        seen = set()
+        for url in [canonicalize_url(item.get("url", "")) for item in news_items] + (previous.urls if previous else []):
+            if url and url not in seen:
+                seen.add(url)
+                urls.append(url)
+
+        watermark = Watermark(published_at=max(published) if published else None, urls=urls[:self.max_urls])
+        try:
+            await get_async_redis().hset(self._key(source), keyword, watermark.to_json())
+        except Exception as e:
+            logger.warning(f"保存抓取水位失败: {str(e)}")
+
+    async def record_pages_saved(self, source: str, pages: int) -> None:
+        """
+        累计数据源因提前停止翻页而节省的页数
+        """
+        if pages <= 0:
+            return
+        try:
+            await get_async_redis().hincrby(f"{self.prefix}:pages_saved", source, pages)
+        except Exception as e:
+            logger.warning(f"记录节省页数失败: {str(e)}")
+
+    async def pages_saved(self) -> Dict[str, int]:
+        """
+        获取各数据源累计节省的页数
+        """
+        values = await get_async_redis().hgetall(f"{self.prefix}:pages_saved")
+        return {source: int(count) for source, count in values.items()}
+
+
+# 全局水位存储
+watermarks = WatermarkStore()
+
+
+async def advance_watermarks(news_items: List[Dict]) -> None:
+    """
+    新闻入库后按抓取时记录的数据源（crawl_source）和规范化搜索词（crawl_query）推进水位
+    """
+    if not settings.CRAWL_WATERMARK_ENABLED:
+        return
+    groups: Dict[tuple, List[Dict]] = {}
+    for news_item in news_items:
+        source, query = news_item.get("crawl_source"), news_item.get("crawl_query")
+        if source and query:
+            groups.setdefault((source, query), []).append(news_item)
+    for (source, query), items in groups.items():
+        await watermarks.update(source, query, items, previous=await watermarks.get(source, query))
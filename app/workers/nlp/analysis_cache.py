@@ -0,0 +1,125 @@
+"""
+新闻分析结果缓存
+
+以清洗后标题和正文的哈希为键缓存情感分数和摘要：任务重试、重复投递和原文重发时直接复用，
+不再重新分析。两级缓存：进程内LRU（无网络开销）和Redis（跨进程共享，带过期时间）。
+键中包含分析版本号，修改ANALYSIS_CACHE_VERSION或切换情感后端后旧缓存自动失效。
+"""
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 缓存的分析结果字段
+CACHED_FIELDS = ("sentiment_score", "summary")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def content_hash(title: Optional[str], content: Optional[str]) -> str:
+    """
+    规范化（合并空白、统一小写）后的标题和正文的哈希
+    """
+    text = "\x00".join(_WHITESPACE.sub(" ", part or "").strip().lower() for part in (title, content))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    """
+    两级分析结果缓存，记录各级命中次数
+    """
+
+    def __init__(self, prefix: str = "nlp:analysis", local_size: Optional[int] = None) -> None:
+        self.prefix = prefix
+        self.local_size = settings.ANALYSIS_CACHE_LOCAL_SIZE if local_size is None else local_size
+        self._local: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> str:
+        return f"{settings.ANALYSIS_CACHE_VERSION}.{settings.SENTIMENT_BACKEND}"
+
+    def key(self, title: Optional[str], content: Optional[str]) -> str:
+        return f"{self.prefix}:{self.version}:{content_hash(title, content)}"
+
+    def _remember(self, key: str, result: Dict) -> None:
+        self._local[key] = result
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        读取缓存的分析结果，Redis不可用时视为未命中
+        """
+        result = self._local.get(key)
+        if result is not None:
+            self._local.move_to_end(key)
+            self.hits_local += 1
+            return result
+
+        try:
+            cached = redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"读取分析结果缓存失败: {str(e)}")
+            cached = None
+        if cached is None:
+            self.misses += 1
+            return None
+
+        result = json.loads(cached)
+        self._remember(key, result)
+        self.hits_redis += 1
+        return result
+
+    def set(self, key: str, news_item: Dict) -> None:
+        """
+        缓存新闻的分析结果字段
+        """
+        result = {field: news_item.get(field) for field in CACHED_FIELDS}
+        self._remember(key, result)
+        try:
+            redis_client.set(key, json.dumps(result, ensure_ascii=False), ex=settings.ANALYSIS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"写入分析结果缓存失败: {str(e)}")
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def counts(self) -> Dict[str, int]:
+        return {"hits_local": self.hits_local, "hits_redis": self.hits_redis, "misses": self.misses}
+
+    def merge(self, counts: Dict[str, int]) -> None:
+        """
+        累加其他进程（分析子进程）的命中计数，使当前进程的stats()包含它们
+        """
+        self.hits_local += counts.get("hits_local", 0)
+        self.hits_redis += counts.get("hits_redis", 0)
+        self.misses += counts.get("misses", 0)
+
+    def stats(self) -> Dict:
+        """
+        当前进程的命中统计（启用分析进程池时包含已合并的子进程计数）
+        """
+        lookups = self.hits_local + self.hits_redis + self.misses
+        return {
+            "version": self.version,
+            "local_entries": len(self._local),
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "hit_rate": (self.hits_local + self.hits_redis) / lookups if lookups else 0.0,
+        }
+
+
+# 每个进程一个缓存实例
+analysis_cache = AnalysisCache()
@@ -0,0 +1,217 @@
+"""
+基于Aho-Corasick自动机的多关键词匹配
+
+所有活跃关键词构成一个自动机，每篇新闻的标题和正文只需线性扫描一遍，
+即可找出其中出现的全部关键词，与关键词数量无关。
+关键词增删改时由关键词服务递增Redis中的版本号并记录变更，
+匹配器只重新加载变更的关键词，再重算失败指针。
+"""
+import logging
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.services.keyword import (
+    KEYWORD_CHANGES_KEY,
+    KEYWORD_VERSION_KEY,
+    get_keywords,
+    normalize_keyword_text,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick自动机
+
+    节点保存在并列的列表中（转移表、失败指针、输出指针、终止模式），
+    模式可以随时增删，下次匹配前按需重算失败指针。
+    """
+
+    def __init__(self) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[int] = [0]
+        self.terminal: List[Optional[str]] = [None]
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    def add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(0)
+                self.terminal.append(None)
+                self.goto[state][char] = next_state
+            state = next_state
+        self.terminal[state] = pattern
+        self._dirty = True
+
+    def remove(self, pattern: str) -> None:
+        """
+        删除模式（保留节点，只清除终止标记）
+        """
+        state = 0
+        for char in pattern:
+            state = self.goto[state].get(char)
+            if state is None:
+                return
+        self.terminal[state] = None
+        self._dirty = True
+
+    def _build_links(self) -> None:
+        """
+        广度优先计算失败指针，以及沿失败链最近的终止节点（输出指针）
+        """
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            self.output[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                link = self.fail[next_state]
+                self.output[next_state] = link if self.terminal[link] is not None else self.output[link]
+                queue.append(next_state)
+        self._dirty = False
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        扫描文本，依次返回(结束位置, 模式)
+        """
+        if self._dirty:
+            self._build_links()
+        goto, fail, output, terminal = self.goto, self.fail, self.output, self.terminal
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            node = state
+            while node:
+                if terminal[node] is not None:
+                    yield position + 1, terminal[node]
+                node = output[node]
+
+
+class KeywordMatcher:
+    """
+    活跃关键词的匹配器，多个关键词规范化后文本相同时共用一个模式
+    """
+
+    def __init__(self) -> None:
+        self.automaton = AhoCorasick()
+        self.patterns: Dict[str, Set[str]] = {}
+        self.keyword_patterns: Dict[str, str] = {}
+        self.version: Optional[int] = None
+
+    def set_keyword(self, keyword_id: str, text: Optional[str]) -> None:
+        """
+        添加、更新或（text为None时）删除关键词
+        """
+        old = self.keyword_patterns.pop(keyword_id, None)
+        if old is not None:
+            ids = self.patterns[old]
+            ids.discard(keyword_id)
+            if not ids:
+                del self.patterns[old]
+                self.automaton.remove(old)
+
+        pattern = normalize_keyword_text(text) if text else ""
+        if len(pattern) < settings.KEYWORD_MATCH_MIN_LENGTH:
+            return
+        self.keyword_patterns[keyword_id] = pattern
+        if pattern not in self.patterns:
+            self.patterns[pattern] = set()
+            self.automaton.add(pattern)
+        self.patterns[pattern].add(keyword_id)
+
+    def load(self, keywords: Iterable[Tuple[str, str]]) -> None:
+        """
+        全量重建
+        """
+        self.automaton = AhoCorasick()
+        self.patterns = {}
+        self.keyword_patterns = {}
+        for keyword_id, text in keywords:
+            self.set_keyword(keyword_id, text)
+
+    def match(self, text: str) -> Set[str]:
+        """
+        返回文本中出现的所有关键词ID
+
+        以字母或数字开头/结尾的关键词要求在单词边界上，避免"ai"匹配到"said"。
+        """
+        text = normalize_keyword_text(text or "")
+        matched: Set[str] = set()
+        for end, pattern in self.automaton.iter_matches(text):
+            start = end - len(pattern)
+            if _is_word_char(pattern[0]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(pattern[-1]) and end < len(text) and _is_word_char(text[end]):
+                continue
+            matched.update(self.patterns.get(pattern, ()))
+        return matched
+
+    async def refresh(self, db) -> None:
+        """
+        按Redis中的关键词版本号同步
+
+        版本号未变时不访问数据库；变更日志完整时只重新加载变更的关键词，否则全量重建。
+        """
+        from app.models.keyword import Keyword
+
+        client = get_async_redis()
+        version = int(await client.get(KEYWORD_VERSION_KEY) or 0)
+        if version == self.version:
+            return
+
+        changed: Optional[Set[str]] = None
+        if self.version is not None and version > self.version:
+            entries = [entry.split(":", 1) for entry in await client.lrange(KEYWORD_CHANGES_KEY, 0, -1)]
+            versions = {int(entry_version) for entry_version, _ in entries}
+            if all(v in versions for v in range(self.version + 1, version + 1)):
+                changed = {keyword_id for entry_version, keyword_id in entries if int(entry_version) > self.version}
+
+        start = time.perf_counter()
+        if changed is None:
+            keywords = await get_keywords(db, user_id=None, is_active=True, limit=None)
+            self.load((str(keyword.id), keyword.text) for keyword in keywords)
+            logger.info(
+                f"关键词匹配器全量重建: {len(self.keyword_patterns)} 个关键词，{len(self.automaton)} 个节点，"
+                f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+        else:
+            result = await db.execute(select(Keyword).where(Keyword.id.in_([UUID(keyword_id) for keyword_id in changed])))
+            found = {str(keyword.id): keyword for keyword in result.scalars().all()}
+            for keyword_id in changed:
+                keyword = found.get(keyword_id)
+                self.set_keyword(keyword_id, keyword.text if keyword is not None and keyword.is_active else None)
+            logger.info(f"关键词匹配器增量更新 {len(changed)} 个关键词")
+        self.version = version
+
+
+# 每个进程一个匹配器
+keyword_matcher = KeywordMatcher()
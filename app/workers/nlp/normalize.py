@@ -0,0 +1,118 @@
+"""
+新闻文本规范化
+
+抓取解析和新闻分析共用，先解码实体，再一次扫描完成其余处理:
+    - 解码HTML实体（&amp;、&nbsp;、&#x4e2d;等）
+    - 去除HTML标签（script/style连同内容一起去除）
+    - 合并空白（含全角空格和&nbsp;），去除控制字符和零宽字符
+    - 全角字母、数字和符号转半角，中文句读标点（，：；！？）保持不变
+
+先解码再去除标签，因此转义的标签（&lt;script&gt;）同样会被去除，不会以文字形式保存。
+结果中仍有实体或标签（如&amp;lt;解码一次后得到&lt;，或全角尖括号转半角后组成标签）时重复处理，
+因此normalize_text(normalize_text(x)) == normalize_text(x)，抓取时和分析时各规范化一次不会改变结果。
+
+解码和其余规则各是一个预编译的正则表达式，由回调函数按匹配的分组处理，
+普通文字不经过回调，纯文本的开销接近两次正则扫描。
+"""
+import html
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+# 保留的全角标点（中文句读，分句和情感分析依赖这些标点）
+KEEP_FULLWIDTH = "，：；！？"
+
+# 全角字符到半角的映射
+_FOLD = {
+    code: code - 0xFEE0
+    for code in range(0xFF01, 0xFF5F)
+    if chr(code) not in KEEP_FULLWIDTH
+}
+
+# 需要处理的字符（全角字符、控制字符和零宽字符）
+_FOLD_CHARS = "".join(re.escape(chr(code)) for code in _FOLD)
+_DROP_CHARS = r"\x00-\x08\x0e-\x1b\x7f\u200b-\u200f\u2060\ufeff"
+_DROP = re.compile(f"[{_DROP_CHARS}]")
+
+_ENTITY = r"(?:[a-zA-Z][a-zA-Z0-9]{1,31}|#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6});"
+_TAG = r"(?:[a-zA-Z/][^>]*|!--.*?--)>"
+
+_DECODE = re.compile(rf"&({_ENTITY})")
+# 以单个字符集开头，正则引擎可以快速跳过普通文字；每个分支用后顾断言确认开头的字符
+_NORMALIZE = re.compile(
+    rf"[\s<{_FOLD_CHARS}{_DROP_CHARS}]"
+    r"(?:(?<=<)(?:(?P<block>(?P<block_tag>[sS][cC][rR][iI][pP][tT]|[sS][tT][yY][lL][eE])\b[^>]*>.*?</(?P=block_tag)\s*>)"
+    rf"|(?P<tag>{_TAG}))(?P<tag_space>\s*)"
+    r"|(?<=[^\S ])(?P<space>\s*)"
+    r"|(?<= )(?P<spaces>\s+)"
+    rf"|(?<=[{_FOLD_CHARS}])(?P<fold>)"
+    # 去除的字符连同其后的空白一起匹配，两侧的空白只输出一个空格
+    rf"|(?<=[{_DROP_CHARS}])(?P<drop>[\s{_DROP_CHARS}]*))",
+    re.DOTALL,
+)
+# 规范化后仍会变化的内容（解码或全角转半角后新出现的实体或标签）
+_UNSTABLE = re.compile(rf"&{_ENTITY}|<{_TAG}", re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
+def _decode_entity(entity: str) -> str:
+    """
+    解码实体（不含开头的&），结果同样全角转半角并去除控制字符和零宽字符
+    """
+    return _DROP.sub("", html.unescape("&" + entity).translate(_FOLD))
+
+
+def _normalize_once(text: str) -> str:
+    """
+    解码实体后去除标签、合并空白、全角转半角，返回去除首尾空白后的结果
+    """
+    text = _DECODE.sub(lambda match: _decode_entity(match.group(1)), text)
+
+    # 上一个匹配的结束位置，以及此时输出是否以空白结尾（紧邻的空白只输出一个空格）
+    last_end = -1
+    ends_with_space = False
+
+    def replace(match: "re.Match") -> str:
+        nonlocal last_end, ends_with_space
+        start = match.start()
+        if start != last_end:
+            ends_with_space = start > 0 and text[start - 1] == " "
+        last_end = match.end()
+
+        kind = match.lastgroup
+        if kind == "fold":
+            ends_with_space = False
+            return chr(_FOLD[ord(match.group()[0])])
+        # 标签和去除的字符后没有空白时直接去除，其余情况输出一个空格
+        if kind == "tag_space" and not match.group(kind) or kind == "drop" and not _DROP.sub("", match.group(kind)):
+            return ""
+        if ends_with_space:
+            return ""
+        ends_with_space = True
+        return " "
+
+    return _NORMALIZE.sub(replace, text).strip()
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    规范化文本，返回去除首尾空白后的结果（再次规范化结果不变）
+    """
+    if not text:
+        return ""
+    while True:
+        result = _normalize_once(text)
+        if result == text or ("&" not in result and "<" not in result) or not _UNSTABLE.search(result):
+            return result
+        text = result
+
+
+def normalize_fields(item: Dict, fields: Iterable[str] = ("title", "content", "summary")) -> Dict:
+    """
+    规范化新闻数据中的文本字段，返回新字典
+    """
+    normalized = item.copy()
+    for field in fields:
+        if normalized.get(field):
+            normalized[field] = normalize_text(normalized[field])
+    return normalized
@@ -0,0 +1,240 @@
+"""
+多核分析进程池
+
+Celery worker以solo模式运行，CPU密集的分析（情感、摘要、实体识别）只能用一个核。
+启用ANALYSIS_POOL_ENABLED后，worker进程在worker_init时（连接broker、Redis之前）加载NLP资源并冻结GC，
+再以fork方式创建进程池，子进程通过写时复制共享已加载的词典和模型；批量分析任务把新闻分块分发到各子进程。
+
+gc.freeze()把fork前的对象移到永久代，子进程的垃圾回收不会遍历（进而写脏）这些对象所在的内存页，
+共享内存不会随运行逐渐变成私有内存。stats()给出每个子进程的吞吐量和内存（RSS、PSS、私有内存），
+用于估算机器配置。
+
+使用ProcessPoolExecutor: 子进程意外退出（如被OOM杀死）时抛出BrokenProcessPool而不是一直等待；
+整批超过ANALYSIS_POOL_TIMEOUT仍未完成时同样视为进程池故障。两种情况都会关闭进程池并抛出AnalysisPoolError，
+下次使用时重新创建，调用方可改为在当前进程处理。
+"""
+import gc
+import logging
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from celery.signals import worker_init, worker_shutdown
+
+from app.core.config import settings
+from app.workers.nlp.analysis_cache import analysis_cache
+from app.workers.nlp.resources import preload_names, resources
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def available_cores() -> int:
+    """
+    当前进程可用的CPU核数（考虑CPU亲和性限制）
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def memory_usage() -> Dict[str, float]:
+    """
+    当前进程的内存占用（MB）
+
+    Linux下读取/proc/self/smaps_rollup: rss为常驻内存，pss按共享进程数分摊共享页，
+    private为私有页（写时复制后不再共享的部分）。其他平台只有峰值RSS。
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+        return {
+            "rss": fields.get("Rss", 0.0),
+            "pss": fields.get("Pss", 0.0),
+            "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+        }
+    except OSError:
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def _run_chunk(function: Callable[[Sequence[T]], List[R]], chunk: Sequence[T]) -> Dict[str, Any]:
+    """
+    在子进程中处理一块数据，并返回CPU耗时、内存占用和这块数据的分析缓存命中计数
+    """
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    cache_start = analysis_cache.counts()
+    results = function(chunk)
+    cache_end = analysis_cache.counts()
+    return {
+        "pid": os.getpid(),
+        "items": len(chunk),
+        "cpu": time.process_time() - cpu_start,
+        "wall": time.perf_counter() - wall_start,
+        "memory": memory_usage(),
+        "cache": {name: cache_end[name] - cache_start[name] for name in cache_end},
+        "results": results,
+    }
+
+
+def _init_child() -> None:
+    """
+    子进程初始化: 补齐父进程未能预加载的资源
+    """
+    resources.preload(preload_names())
+
+
+def _ready() -> int:
+    """
+    启动时确认子进程已创建
+    """
+    time.sleep(0.05)
+    return os.getpid()
+
+
+class AnalysisPoolError(RuntimeError):
+    """
+    进程池故障（子进程异常退出或超时），进程池已关闭
+    """
+
+
+class AnalysisPool:
+    """
+    预加载资源后fork的进程池
+    """
+
+    def __init__(self, processes: Optional[int] = None, chunk_size: Optional[int] = None) -> None:
+        self.processes = processes or settings.ANALYSIS_POOL_PROCESSES or available_cores()
+        self.chunk_size = chunk_size or settings.ANALYSIS_POOL_CHUNK_SIZE
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._children: Dict[int, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """
+        预加载资源、冻结GC并创建进程池（已创建时不重复创建）
+        """
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return
+            start = time.perf_counter()
+            resources.preload(preload_names())
+            gc.collect()
+            gc.freeze()
+            context = multiprocessing.get_context("fork")
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=context, initializer=_init_child)
+            self._pid = os.getpid()
+            self._children = {}
+            # ProcessPoolExecutor按需创建子进程，立即提交任务使所有子进程现在就fork
+            wait([self._executor.submit(_ready) for _ in range(self.processes)])
+            logger.info(
+                f"分析进程池已启动: {self.processes} 个子进程，耗时 {(time.perf_counter() - start) * 1000:.0f} ms，"
+                f"主进程内存 {memory_usage().get('rss', 0):.0f} MB"
+            )
+
+    def close(self, kill: bool = False) -> None:
+        """
+        关闭进程池，kill为True时不等待正在执行的任务并终止子进程
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            owned = self._pid == os.getpid()
+            self._pid = None
+        if executor is None or not owned:
+            return
+        if kill:
+            # 卡住的子进程不会自行退出，只能直接终止
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown(wait=True)
+
+    def map(self, function: Callable[[Sequence[T]], List[R]], items: Sequence[T]) -> List[R]:
+        """
+        把items分块交给子进程处理，按原顺序返回结果
+
+        function必须是模块级函数（按名称传给子进程），接收一块数据并返回等长的结果列表。
+        子进程异常退出或整批超过ANALYSIS_POOL_TIMEOUT秒时关闭进程池并抛出AnalysisPoolError。
+        """
+        if not items:
+            return []
+        self.start()
+
+        chunk_size = max(1, min(self.chunk_size, -(-len(items) // self.processes)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        start = time.perf_counter()
+        deadline = time.monotonic() + settings.ANALYSIS_POOL_TIMEOUT
+        try:
+            futures = [self._executor.submit(_run_chunk, function, chunk) for chunk in chunks]
+            outputs = [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except BrokenProcessPool as e:
+            logger.error(f"分析子进程异常退出，重建进程池: {str(e)}")
+            self.close(kill=True)
+            raise AnalysisPoolError("分析子进程异常退出") from e
+        except FutureTimeoutError as e:
+            logger.error(f"分析进程池 {settings.ANALYSIS_POOL_TIMEOUT}s 内未完成，终止子进程并重建进程池")
+            self.close(kill=True)
+            raise AnalysisPoolError("分析进程池超时") from e
+        elapsed = time.perf_counter() - start
+
+        results: List[R] = []
+        for output in outputs:
+            results.extend(output.pop("results"))
+            child = self._children.setdefault(output["pid"], {"items": 0, "cpu": 0.0, "wall": 0.0})
+            child["items"] += output["items"]
+            child["cpu"] += output["cpu"]
+            child["wall"] += output["wall"]
+            child["memory"] = output["memory"]
+            # 缓存查询都发生在子进程中，合并到主进程的统计
+            analysis_cache.merge(output["cache"])
+        logger.info(
+            f"进程池处理 {len(items)} 条（{len(chunks)} 块），耗时 {elapsed:.2f}s，{len(items) / max(elapsed, 1e-9):.1f} 条/秒"
+        )
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        每个子进程累计处理的条数、每CPU秒处理条数和最近一次的内存占用
+        """
+        children = {
+            pid: {
+                "items": child["items"],
+                "cpu_seconds": child["cpu"],
+                "items_per_cpu_second": child["items"] / child["cpu"] if child["cpu"] else 0.0,
+                "memory_mb": child.get("memory", {}),
+            }
+            for pid, child in self._children.items()
+        }
+        return {"processes": self.processes, "parent_memory_mb": memory_usage(), "children": children}
+
+
+# 当前worker进程的分析进程池（按需启动）
+analysis_pool = AnalysisPool()
+
+
+@worker_init.connect
+def start_pool(**kwargs):
+    """
+    在worker连接broker和Redis之前创建进程池，子进程不会继承这些连接
+    """
+    if settings.ANALYSIS_POOL_ENABLED:
+        analysis_pool.start()
+
+
+@worker_shutdown.connect
+def close_pool(**kwargs):
+    analysis_pool.close()
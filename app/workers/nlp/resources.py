@@ -0,0 +1,250 @@
+"""
+NLP资源注册表
+
+分词器、情感模型等资源在每个进程中只加载一次：Celery prefork模式下在主进程fork之前预加载，
+子进程通过写时复制共享；未预加载的资源在第一次使用时加载。
+任务执行过程中不会下载任何资源，缺失的NLTK数据需要提前下载:
+
+    python -m app.workers.nlp.resources download
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import nltk
+from celery.signals import worker_init, worker_process_init
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 项目数据目录下的NLTK数据
+NLTK_DATA_DIR = settings.NLTK_DATA_DIR
+if not os.path.isabs(NLTK_DATA_DIR):
+    NLTK_DATA_DIR = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+        NLTK_DATA_DIR,
+    )
+if NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+# 需要的NLTK数据: 资源路径 -> 下载包名
+NLTK_RESOURCES = {
+    "tokenizers/punkt": "punkt",
+    "sentiment/vader_lexicon.zip": "vader_lexicon",
+}
+
+# 缺少punkt时使用的分句规则（中英文句末标点）
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？；;])\s*")
+
+
+class ResourceRegistry:
+    """
+    按名称注册资源加载函数，每个进程只加载一次并记录加载耗时
+    """
+
+    def __init__(self) -> None:
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._resources: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+        """
+        注册资源加载函数的装饰器
+        """
+        def decorator(loader: Callable[[], Any]) -> Callable[[], Any]:
+            self._loaders[name] = loader
+            return loader
+        return decorator
+
+    def get(self, name: str) -> Any:
+        """
+        获取资源，未加载时加载
+        """
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+
+        with self._lock:
+            if name not in self._resources:
+                start = time.perf_counter()
+                self._resources[name] = self._loaders[name]()
+                self._load_times[name] = time.perf_counter() - start
+                logger.info(f"NLP资源 {name} 加载完成，耗时 {self._load_times[name] * 1000:.0f} ms（进程 {os.getpid()}）")
+            return self._resources[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resources
+
+    def preload(self, names: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        预加载资源，单个资源加载失败不影响其他资源（使用时会再次尝试）
+
+        Returns:
+            各资源的加载耗时（秒）
+        """
+        for name in names if names is not None else list(self._loaders):
+            if name not in self._loaders:
+                logger.warning(f"未注册的NLP资源: {name}")
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"预加载NLP资源 {name} 失败: {str(e)}")
+        return dict(self._load_times)
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        获取各资源的加载状态和耗时
+        """
+        return {
+            name: {"loaded": name in self._resources, "load_time": self._load_times.get(name)}
+            for name in self._loaders
+        }
+
+
+# 全局资源注册表
+resources = ResourceRegistry()
+
+
+def _find_nltk_resource(resource: str) -> None:
+    """
+    检查NLTK数据是否存在，缺失时给出下载命令（不会自动下载）
+    """
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        raise LookupError(
+            f"缺少NLTK资源 {resource}，请先执行: python -m app.workers.nlp.resources download"
+        ) from None
+
+
+@resources.register("vader")
+def _load_vader() -> Any:
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    _find_nltk_resource("sentiment/vader_lexicon.zip")
+    return SentimentIntensityAnalyzer()
+
+
+@resources.register("sentence_tokenizer")
+def _load_sentence_tokenizer() -> Callable[[str], List[str]]:
+    try:
+        _find_nltk_resource("tokenizers/punkt")
+    except LookupError as e:
+        logger.warning(f"{str(e)}，改用标点规则分句")
+        return lambda text: [sentence for sentence in _SENTENCE_END.split(text) if sentence]
+
+    tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+    return tokenizer.tokenize
+
+
+@resources.register("zh_sentiment")
+def _load_zh_sentiment() -> Any:
+    from app.workers.nlp.zh_sentiment import ChineseSentimentAnalyzer
+    analyzer = ChineseSentimentAnalyzer(settings.SENTIMENT_LEXICON_DIR)
+    logger.info(f"中文情感词典共 {len(analyzer)} 个词条，Trie占用 {analyzer.trie.memory_bytes() / 1024:.0f} KB")
+    return analyzer
+
+
+@resources.register("transformer_sentiment")
+def _load_transformer_sentiment() -> Any:
+    from app.workers.nlp.transformer_sentiment import load_analyzer
+    return load_analyzer()
+
+
+# 情感分析后端 -> 资源名称
+SENTIMENT_RESOURCES = {
+    "vader": "vader",
+    "zh": "zh_sentiment",
+    "transformer": "transformer_sentiment",
+}
+
+
+def get_sentiment_analyzer(text: Optional[str] = None) -> Any:
+    """
+    按SENTIMENT_BACKEND获取当前进程共享的情感分析器
+
+    auto模式下中文为主的文本使用中文词典分析器，其余使用VADER。
+    """
+    backend = settings.SENTIMENT_BACKEND
+    if backend == "auto":
+        from app.workers.nlp.zh_sentiment import is_chinese
+        backend = "zh" if text is not None and is_chinese(text) else "vader"
+    return resources.get(SENTIMENT_RESOURCES.get(backend, "vader"))
+
+
+def sent_tokenize(text: str) -> List[str]:
+    """
+    使用当前进程共享的分句器分句
+    """
+    return resources.get("sentence_tokenizer")(text)
+
+
+def preload_names() -> List[str]:
+    """
+    worker启动时预加载的资源: NLP_PRELOAD，加上已启用的实体识别和Transformer情感模型
+    """
+    names = list(settings.NLP_PRELOAD)
+    if settings.NER_ENABLED and "spacy_ner" not in names:
+        names.append("spacy_ner")
+    if settings.SENTIMENT_BACKEND == "transformer" and "transformer_sentiment" not in names:
+        names.append("transformer_sentiment")
+    return names
+
+
+@worker_init.connect
+def preload_before_fork(**kwargs):
+    """
+    Worker主进程在fork子进程之前预加载，子进程共享已加载的资源
+    """
+    resources.preload(preload_names())
+
+
+@worker_process_init.connect
+def preload_in_child(**kwargs):
+    """
+    子进程启动时补齐未加载的资源（如主进程预加载失败或未使用prefork）
+    """
+    resources.preload(preload_names())
+
+
+def download(names: Optional[List[str]] = None) -> bool:
+    """
+    下载缺失的NLTK数据到项目数据目录（部署时执行，不在任务中调用）
+
+    Returns:
+        是否全部下载成功
+    """
+    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+    ok = True
+    for resource, package in NLTK_RESOURCES.items():
+        if names and package not in names:
+            continue
+        try:
+            nltk.data.find(resource)
+            logger.info(f"NLTK资源 {resource} 已存在")
+            continue
+        except LookupError:
+            pass
+        logger.info(f"正在下载NLTK资源 {resource} 到 {NLTK_DATA_DIR}")
+        if not nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True):
+            logger.error(f"下载NLTK资源 {resource} 失败")
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2 or sys.argv[1] not in ("download", "check"):
+        print("用法: python -m app.workers.nlp.resources download|check")
+        sys.exit(2)
+    if sys.argv[1] == "download":
+        sys.exit(0 if download(sys.argv[2:]) else 1)
+    for name, seconds in resources.preload().items():
+        print(f"{name:<20} {seconds * 1000:8.1f} ms")
+    sys.exit(0 if all(info["loaded"] for info in resources.stats().values()) else 1)
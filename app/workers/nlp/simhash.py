@@ -0,0 +1,137 @@
+"""
+SimHash近似重复检测
+
+同一篇通稿会以不同URL出现在多个网站，URL去重无法识别。
+每篇新闻计算64位SimHash指纹，分成4段16位存入Redis：
+汉明距离不超过3的两个指纹至少有一段完全相同（抽屉原理），
+因此查重只需读取4个集合，再对少量候选计算汉明距离。
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+_BAND_MASK = (1 << BAND_BITS) - 1
+_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+# 英文按单词、中文按单字切分
+_TOKEN = re.compile(r"[a-z0-9]+|[一-鿿]")
+
+
+def _shingles(text: str, size: int = 2) -> Counter:
+    """
+    连续size个词元组成的片段及其出现次数
+    """
+    tokens = _TOKEN.findall((text or "").lower())
+    if len(tokens) < size:
+        return Counter()
+    return Counter(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def simhash(text: str, min_shingles: int = 0) -> Optional[int]:
+    """
+    计算64位SimHash指纹，片段数少于min_shingles时返回None（短文本指纹不可靠）
+    """
+    shingles = _shingles(text)
+    if not shingles or len(shingles) < min_shingles:
+        return None
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+         for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+    # 每一位: 该位为1的片段权重之和减去为0的片段权重之和
+    bits = ((hashes[:, None] >> _SHIFTS) & np.uint64(1)).astype(np.int64)
+    votes = (weights[:, None] * (bits * 2 - 1)).sum(axis=0)
+    return int(((votes > 0).astype(np.uint64) << _SHIFTS).sum())
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (i * BAND_BITS)) & _BAND_MASK for i in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Redis中的SimHash分段索引
+
+    键结构（只在转载集中出现的时间窗口SIMHASH_TTL内查重）:
+        {prefix}:zband:{i}:{value}  第i段取值为value的指纹有序集合，分数为加入时间；
+                                    每次加入时删除窗口外的成员，因此持续有新闻写入时集合也不会无限增长
+        {prefix}:doc:{fingerprint}  指纹对应的原文（新闻ID、URL和情感分数），带过期时间
+    """
+
+    def __init__(self, prefix: str = "nlp:simhash") -> None:
+        self.prefix = prefix
+
+    def _band_keys(self, fingerprint: int) -> List[str]:
+        return [f"{self.prefix}:zband:{i}:{value:04x}" for i, value in enumerate(bands(fingerprint))]
+
+    def _doc_key(self, fingerprint: int) -> str:
+        return f"{self.prefix}:doc:{fingerprint:016x}"
+
+    async def find(self, fingerprint: int) -> Optional[Dict]:
+        """
+        查找汉明距离不超过SIMHASH_MAX_DISTANCE的已索引新闻
+
+        Returns:
+            最相近的原文信息（id、url、sentiment_score、distance），没有时返回None
+        """
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=False)
+        since = time.time() - settings.SIMHASH_TTL
+        for key in self._band_keys(fingerprint):
+            pipe.zrangebyscore(key, since, "+inf")
+        candidates = set()
+        for members in await pipe.execute():
+            candidates.update(int(member, 16) for member in members)
+
+        matches = sorted(
+            (hamming_distance(fingerprint, candidate), candidate) for candidate in candidates
+        )
+        for distance, candidate in matches:
+            if distance > settings.SIMHASH_MAX_DISTANCE:
+                break
+            doc = await client.get(self._doc_key(candidate))
+            if doc:
+                return {**json.loads(doc), "distance": distance}
+        return None
+
+    async def add(self, fingerprint: int, news_id: str, url: str, sentiment_score: Optional[float] = None) -> None:
+        """
+        把已入库的新闻加入索引，作为后续转载的原文
+        """
+        ttl = settings.SIMHASH_TTL
+        now = time.time()
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.set(self._doc_key(fingerprint), json.dumps({"id": news_id, "url": url, "sentiment_score": sentiment_score}), ex=ttl, nx=True)
+        for key in self._band_keys(fingerprint):
+            pipe.zadd(key, {f"{fingerprint:016x}": now})
+            pipe.zremrangebyscore(key, "-inf", now - ttl)
+            # 一段时间没有新成员的集合整体过期
+            pipe.expire(key, ttl)
+        await pipe.execute()
+
+
+# 全局近似重复索引
+near_duplicates = NearDuplicateIndex()
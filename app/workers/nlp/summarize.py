@@ -0,0 +1,173 @@
+"""
+抽取式摘要（TextRank）
+
+按中英文句末标点分句，每个句子提取哈希特征（英文单词、中文相邻两字），
+用NumPy矩阵乘法一次算出所有句子两两之间的相似度，再迭代计算TextRank得分，
+取得分最高的几句按原文顺序组成摘要。
+
+每篇文档有大小和时间预算: 句子数或字数超过上限、计算超时时退回到导语（前几句），
+避免个别超长文档拖慢整批分析。
+"""
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 句末标点（中文句号、问号、叹号、分号；英文句点需后接空白和大写字母或中文，
+# 且不在单个大写字母之后，避免在"U.S."这类缩写处断句），后面可以跟引号或括号
+_SENTENCE = re.compile(
+    r"[^。！？；!?\n]+?(?:[。！？；!?]+[”’」』\"')）]*|(?<!\b[A-Z])\.[”’\"')]*(?=\s+[A-Z\"“(一-鿿]|\s*$)|(?=\n)|$)",
+    re.DOTALL,
+)
+# 特征: 英文单词（至少两个字母或数字）、连续汉字
+_FEATURE = re.compile(r"[a-z0-9]{2,}|[一-鿿]{2,}")
+_CJK_END = re.compile(r"[一-鿿。！？；，：”’」』）]$")
+
+DAMPING = 0.85
+TOLERANCE = 1e-4
+MAX_ITERATIONS = 100
+
+
+class BudgetExceeded(Exception):
+    """
+    摘要计算超出预算
+    """
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按中英文句末标点和换行分句
+    """
+    return [sentence.strip() for sentence in _SENTENCE.findall(text or "") if sentence.strip()]
+
+
+def _features(sentence: str) -> List[int]:
+    """
+    句子的哈希特征: 英文单词本身，中文取相邻两字
+    """
+    features = set()
+    for token in _FEATURE.findall(sentence.lower()):
+        if token[0] < "一":
+            features.add(hash(token))
+        else:
+            features.update(hash(token[i:i + 2]) for i in range(len(token) - 1))
+    return list(features)
+
+
+def _join(sentences: List[str]) -> str:
+    """
+    拼接句子，中文句子之间不加空格
+    """
+    parts = [sentences[0]]
+    for previous, sentence in zip(sentences, sentences[1:]):
+        parts.append(sentence if _CJK_END.search(previous) else " " + sentence)
+    return "".join(parts)
+
+
+def textrank_scores(sentences: List[str], deadline: Optional[float] = None) -> np.ndarray:
+    """
+    计算每个句子的TextRank得分
+
+    相似度为共有特征数 / (log|Si| + log|Sj|)（Mihalcea & Tarau, 2004）。
+    超过deadline（time.perf_counter时间）时抛出BudgetExceeded。
+    """
+    rows = []
+    columns = []
+    for index, sentence in enumerate(sentences):
+        features = _features(sentence)
+        rows.extend([index] * len(features))
+        columns.extend(features)
+    count = len(sentences)
+    if not columns:
+        return np.full(count, 1.0 / count)
+
+    # 哈希值压缩成连续的列号，构造句子-特征0/1矩阵
+    _, column_index = np.unique(np.array(columns, dtype=np.int64), return_inverse=True)
+    matrix = np.zeros((count, int(column_index.max()) + 1), dtype=np.float32)
+    matrix[np.array(rows), column_index] = 1.0
+
+    overlap = matrix @ matrix.T
+    log_sizes = np.log(np.maximum(matrix.sum(axis=1), 1.0))
+    denominator = log_sizes[:, None] + log_sizes[None, :]
+    similarity = np.divide(overlap, denominator, out=np.zeros_like(overlap), where=denominator > 0)
+    np.fill_diagonal(similarity, 0.0)
+
+    # 行归一化为转移概率，孤立句子均匀跳转
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / count), where=out_weight > 0)
+
+    if deadline is not None and time.perf_counter() > deadline:
+        raise BudgetExceeded()
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1.0 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        converged = float(np.abs(updated - scores).sum()) < TOLERANCE
+        scores = updated
+        if converged:
+            break
+        if deadline is not None and time.perf_counter() > deadline:
+            raise BudgetExceeded()
+    return scores
+
+
+class Summarizer:
+    """
+    带预算的TextRank摘要生成器，记录退回导语的次数
+    """
+
+    def __init__(
+        self,
+        sentences: Optional[int] = None,
+        max_sentences: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        time_budget: Optional[float] = None,
+    ) -> None:
+        self.sentences = sentences or settings.SUMMARY_SENTENCES
+        self.max_sentences = max_sentences or settings.SUMMARY_MAX_SENTENCES
+        self.max_chars = max_chars or settings.SUMMARY_MAX_CHARS
+        self.time_budget = settings.SUMMARY_TIME_BUDGET if time_budget is None else time_budget
+        self.documents = 0
+        self.lead_size = 0
+        self.lead_time = 0
+
+    def summarize(self, text: str) -> str:
+        """
+        生成摘要，句子数不超过摘要句数时返回原文
+        """
+        self.documents += 1
+        sentences = split_sentences(text)
+        if len(sentences) <= self.sentences:
+            return text
+
+        if len(sentences) > self.max_sentences or len(text) > self.max_chars:
+            self.lead_size += 1
+            return _join(sentences[:self.sentences])
+
+        try:
+            scores = textrank_scores(sentences, time.perf_counter() + self.time_budget)
+        except BudgetExceeded:
+            self.lead_time += 1
+            logger.debug(f"摘要计算超时（{len(sentences)} 句），使用导语")
+            return _join(sentences[:self.sentences])
+
+        # 得分最高的几句按原文顺序输出，得分相同时靠前的句子优先
+        top = np.argsort(-scores, kind="stable")[:self.sentences]
+        return _join([sentences[index] for index in sorted(top)])
+
+    def stats(self) -> Dict:
+        return {
+            "documents": self.documents,
+            "lead_size": self.lead_size,
+            "lead_time": self.lead_time,
+        }
+
+
+# 每个进程一个摘要生成器
+summarizer = Summarizer()
@@ -0,0 +1,349 @@
+"""
+基于Transformer的情感分析（CPU）
+
+从本地目录加载序列分类模型（TRANSFORMER_MODEL_PATH，不会联网下载），
+可以直接用PyTorch推理（可选动态int8量化），也可以使用导出的ONNX模型:
+
+    python -m app.workers.nlp.transformer_sentiment export <模型目录> [--quantize]
+
+每个进程一个微批处理线程: 调用方提交文本后等待结果，后台线程把在TRANSFORMER_MAX_WAIT_MS内到达的文本
+（最多TRANSFORMER_MAX_BATCH_SIZE条）合并成一批做一次前向计算。批量分析时先用prefetch提交整块新闻的文本，
+逐条分析时直接取结果。推理线程在第一次提交时启动，fork出的子进程各自启动自己的线程。
+
+Celery worker以solo模式运行，同一进程内的分析请求是逐条串行到达的，等待时间内不会有其他请求可以合并，
+因此实际的批只来自process_items（批量分析任务及其进程池分块）调用_prefetch_sentiment预提交的整块文本；
+单条的process_news每次只提交标题和正文两条文本。
+"""
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+ONNX_MODEL = "model.onnx"
+ONNX_QUANTIZED_MODEL = "model.quant.onnx"
+
+_STARS = re.compile(r"^([1-5])\s*stars?$")
+
+
+def _resolve(future: Future, result: object = None, exception: Optional[BaseException] = None) -> None:
+    """
+    设置请求的结果或异常（调用方已取消的请求跳过，避免推理线程因InvalidStateError退出）
+    """
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    动态微批处理队列
+
+    后台线程取出第一条请求后最多再等待max_wait秒，凑满max_batch_size条或超时即调用predict处理整批。
+    按批大小统计批数、计算耗时和请求延迟（从提交到得到结果）。
+    """
+
+    def __init__(self, predict: Callable[[List[T]], List[R]], max_batch_size: int, max_wait: float) -> None:
+        self.predict = predict
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[T, Future, float]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[int, Dict[str, float]] = {}
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                # fork后父进程的线程和队列不可用，重新创建
+                self._queue = queue.Queue()
+                self._stats = {}
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, item: T) -> Future:
+        self._ensure_thread()
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> List[Tuple[T, Future, float]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            start = time.perf_counter()
+            try:
+                results = list(self.predict([item for item, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    _resolve(future, exception=e)
+                continue
+            end = time.perf_counter()
+
+            for (_, future, _), result in zip(batch, results):
+                _resolve(future, result)
+            if len(results) != len(batch):
+                # 结果条数不对时，没有对应结果的请求也必须结束，否则调用方会一直等待
+                error = RuntimeError(f"模型对 {len(batch)} 条输入返回了 {len(results)} 条结果")
+                logger.error(str(error))
+                for _, future, _ in batch[len(results):]:
+                    _resolve(future, exception=error)
+            stats = self._stats.setdefault(len(batch), {"batches": 0, "compute": 0.0, "latency": 0.0})
+            stats["batches"] += 1
+            stats["compute"] += end - start
+            stats["latency"] += sum(end - submitted for _, _, submitted in batch)
+
+    def stats(self) -> Dict[int, Dict[str, float]]:
+        """
+        按批大小统计: 批数、平均计算耗时（毫秒）、平均请求延迟（毫秒）、计算吞吐量（条/秒）
+        """
+        return {
+            size: {
+                "batches": stats["batches"],
+                "compute_ms": stats["compute"] / stats["batches"] * 1000,
+                "latency_ms": stats["latency"] / (stats["batches"] * size) * 1000,
+                "items_per_second": stats["batches"] * size / stats["compute"] if stats["compute"] else 0.0,
+            }
+            for size, stats in sorted(self._stats.items())
+        }
+
+
+def label_weights(id2label: Dict[int, str]) -> np.ndarray:
+    """
+    把模型的各类别映射到[-1, 1]的情感值
+
+    支持positive/negative/neutral类标签、"1 star"~"5 stars"评分标签，
+    以及没有名称的LABEL_0/LABEL_1（按负面、正面）和LABEL_0/1/2（按负面、中性、正面）。
+    """
+    labels = [id2label[index].lower() for index in range(len(id2label))]
+    weights = []
+    for label in labels:
+        stars = _STARS.match(label)
+        if stars:
+            weights.append((int(stars.group(1)) - 3) / 2)
+        elif "pos" in label:
+            weights.append(1.0)
+        elif "neg" in label:
+            weights.append(-1.0)
+        elif "neu" in label:
+            weights.append(0.0)
+        else:
+            weights = None
+            break
+    if weights is None:
+        if len(labels) == 2:
+            weights = [-1.0, 1.0]
+        elif len(labels) == 3:
+            weights = [-1.0, 0.0, 1.0]
+        else:
+            raise ValueError(f"无法识别情感模型的类别: {labels}")
+    return np.array(weights, dtype=np.float32)
+
+
+class TransformerSentimentModel:
+    """
+    本地Transformer情感分类模型，predict返回每条文本的类别概率
+    """
+
+    def __init__(
+        self,
+        path: str,
+        runtime: str = "torch",
+        quantize: bool = False,
+        max_length: int = 256,
+        num_threads: Optional[int] = None,
+    ) -> None:
+        from transformers import AutoConfig, AutoTokenizer
+
+        if not path or not os.path.isdir(path):
+            raise LookupError(f"情感模型目录不存在: {path}，请设置TRANSFORMER_MODEL_PATH")
+        self.path = path
+        self.runtime = runtime
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+        config = AutoConfig.from_pretrained(path, local_files_only=True)
+        self.weights = label_weights(config.id2label)
+
+        if runtime == "onnx":
+            import onnxruntime
+
+            model_file = os.path.join(path, ONNX_QUANTIZED_MODEL if quantize else ONNX_MODEL)
+            if not os.path.exists(model_file):
+                raise LookupError(f"ONNX模型不存在: {model_file}，请先执行: python -m app.workers.nlp.transformer_sentiment export {path}")
+            options = onnxruntime.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+            self.input_names = {node.name for node in self.session.get_inputs()}
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            if num_threads:
+                torch.set_num_threads(num_threads)
+            model = AutoModelForSequenceClassification.from_pretrained(path, local_files_only=True)
+            model.eval()
+            if quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.model = model
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """
+        返回形状为(len(texts), 类别数)的概率矩阵
+        """
+        if self.runtime == "onnx":
+            encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+            inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+            logits = self.session.run(None, inputs)[0]
+        else:
+            import torch
+
+            encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt")
+            with torch.inference_mode():
+                logits = self.model(**encoded).logits.float().numpy()
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def scores(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        返回与VADER格式一致的情感分数，compound为各类别情感值按概率加权之和
+        """
+        probabilities = self.predict(texts)
+        compounds = probabilities @ self.weights
+        positive = probabilities[:, self.weights > 0].sum(axis=1)
+        negative = probabilities[:, self.weights < 0].sum(axis=1)
+        return [
+            {
+                "neg": round(float(neg), 3),
+                "neu": round(float(max(0.0, 1.0 - pos - neg)), 3),
+                "pos": round(float(pos), 3),
+                "compound": round(float(compound), 4),
+            }
+            for neg, pos, compound in zip(negative, positive, compounds)
+        ]
+
+
+class TransformerSentimentAnalyzer:
+    """
+    通过微批处理队列调用模型的情感分析器，接口与VADER的polarity_scores一致
+    """
+
+    def __init__(self, model: TransformerSentimentModel, max_batch_size: int, max_wait: float) -> None:
+        self.model = model
+        self.batcher: MicroBatcher[str, Dict[str, float]] = MicroBatcher(model.scores, max_batch_size, max_wait)
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+
+    def prefetch(self, texts: Iterable[str]) -> None:
+        """
+        提前提交一批文本，随后的polarity_scores直接取结果
+        """
+        with self._pending_lock:
+            for text in texts:
+                if text and text not in self._pending:
+                    self._pending[text] = self.batcher.submit(text)
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        with self._pending_lock:
+            future = self._pending.pop(text, None)
+        if future is None:
+            future = self.batcher.submit(text)
+        return future.result()
+
+    def discard_prefetched(self) -> None:
+        """
+        丢弃未被使用的预提交结果（如转载或命中缓存而跳过情感分析的新闻）
+        """
+        with self._pending_lock:
+            self._pending.clear()
+
+
+def load_analyzer() -> TransformerSentimentAnalyzer:
+    start = time.perf_counter()
+    model = TransformerSentimentModel(
+        settings.TRANSFORMER_MODEL_PATH,
+        runtime=settings.TRANSFORMER_RUNTIME,
+        quantize=settings.TRANSFORMER_QUANTIZE,
+        max_length=settings.TRANSFORMER_MAX_LENGTH,
+        num_threads=settings.TRANSFORMER_NUM_THREADS,
+    )
+    logger.info(
+        f"情感模型 {settings.TRANSFORMER_MODEL_PATH} 已加载（{settings.TRANSFORMER_RUNTIME}"
+        f"{'，量化' if settings.TRANSFORMER_QUANTIZE else ''}），耗时 {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    return TransformerSentimentAnalyzer(
+        model, settings.TRANSFORMER_MAX_BATCH_SIZE, settings.TRANSFORMER_MAX_WAIT_MS / 1000
+    )
+
+
+def export_onnx(path: str, quantize: bool = False, opset: int = 14) -> str:
+    """
+    把模型目录中的PyTorch模型导出为ONNX（可选再做动态int8量化），写入同一目录
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(path, local_files_only=True)
+    model.eval()
+    sample = tokenizer(["示例文本", "sample text"], padding=True, return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    output = os.path.join(path, ONNX_MODEL)
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in names),
+        output,
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized = os.path.join(path, ONNX_QUANTIZED_MODEL)
+        quantize_dynamic(output, quantized, weight_type=QuantType.QInt8)
+        return quantized
+    return output
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 3 or sys.argv[1] != "export":
+        print("用法: python -m app.workers.nlp.transformer_sentiment export <模型目录> [--quantize]")
+        sys.exit(2)
+    print(export_onnx(sys.argv[2], quantize="--quantize" in sys.argv[3:]))
@@ -8,10 +8,14 @@ from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.workers.tasks.crawl import crawl_news
+from app.workers.tasks.analysis import train_related_index
+from app.workers.tasks.crawl import crawl_news, rebuild_seen_url_filter
 from app.workers.tasks.notification import send_daily_digest
 from app.db.session import AsyncSessionLocal
-from app.services.keyword import get_keywords
+from app.services.keyword import get_keywords, normalize_keyword_text
+from app.workers.crawler.adaptive import adaptive_schedule
+from app.workers.crawler.breaker import circuit_breaker
+from app.workers.crawler.sources import get_enabled_sources
 
 logger = logging.getLogger(__name__)
 
@@ -38,28 +42,120 @@ scheduler = AsyncIOScheduler(
 )
 
 
-async def crawl_all_keywords(source: str = "baidu", max_pages: int = 3) -> None:
+async def _available_sources(source: str = "all") -> Optional[List[str]]:
+    """
+    过滤掉熔断中的数据源，全部不可用时返回None
+    """
+    if source == "all":
+        available = [plugin.name for plugin in get_enabled_sources() if await circuit_breaker.is_available(plugin.name)]
+        if not available:
+            logger.warning("所有数据源都处于熔断状态，跳过本次抓取")
+            return None
+        return available
+    if not await circuit_breaker.is_available(source):
+        logger.warning(f"数据源 {source} 处于熔断状态，跳过本次抓取")
+        return None
+    return [source]
+
+
+async def _group_active_keywords() -> Dict[str, List]:
+    """
+    获取所有活跃关键词，按规范化文本合并
+    """
+    async with AsyncSessionLocal() as db:
+        keywords = await get_keywords(db, user_id=None, is_active=True, limit=None)
+    
+    groups: Dict[str, List] = {}
+    for keyword in keywords:
+        normalized = normalize_keyword_text(keyword.text)
+        if normalized:
+            groups.setdefault(normalized, []).append(keyword)
+    return groups
+
+
+def _dispatch_crawl(group: List, sources: List[str], max_pages: int) -> None:
+    """
+    为一组相同搜索词的关键词启动一个爬虫任务
+    """
+    query = group[0].text.strip()
+    crawl_news.delay(query, sources, max_pages, keyword_ids=[str(keyword.id) for keyword in group])
+    logger.info(f"已启动关键词 '{query}' 的爬虫任务，关联 {len(group)} 个关键词")
+
+
+async def crawl_all_keywords(source: str = "all", max_pages: int = 3) -> None:
     """
     抓取所有活跃关键词的新闻
+
+    多个用户监控的相同关键词（规范化后相同）只抓取一次，
+    结果通过news_keyword关联到所有对应的关键词。
     """
     logger.info(f"开始抓取所有关键词的新闻，来源: {source}")
     
     try:
-        # 获取所有活跃的关键词
-        async with AsyncSessionLocal() as db:
-            keywords = await get_keywords(db, user_id=None, is_active=True)
+        # 跳过熔断中的数据源
+        sources = await _available_sources(source)
+        if not sources:
+            return
+        
+        groups = await _group_active_keywords()
         
-        # 为每个关键词启动爬虫任务
-        for keyword in keywords:
-            crawl_news.delay(keyword.text, source, max_pages)
-            logger.info(f"已启动关键词 '{keyword.text}' 的爬虫任务")
+        # 每个不同的搜索词启动一个爬虫任务
+        for group in groups.values():
+            _dispatch_crawl(group, sources, max_pages)
         
-        logger.info(f"成功启动 {len(keywords)} 个关键词的爬虫任务")
+        logger.info(f"成功启动 {len(groups)} 个搜索词的爬虫任务，共 {sum(len(group) for group in groups.values())} 个关键词")
     
     except Exception as e:
         logger.error(f"抓取所有关键词的新闻失败: {str(e)}")
 
 
+async def crawl_due_keywords(source: str = "all", max_pages: int = 3) -> None:
+    """
+    自适应调度：只抓取已到期的搜索词
+
+    每个搜索词的抓取间隔由其新闻产出和关键词优先级决定（见AdaptiveSchedule），
+    新增的关键词立即抓取，停用的关键词移出调度。
+    """
+    try:
+        groups = await _group_active_keywords()
+        weights = {
+            query: adaptive_schedule.priority_weight(keyword.priority for keyword in group)
+            for query, group in groups.items()
+        }
+        await adaptive_schedule.sync(weights)
+        
+        # 数据源全部熔断时不取出到期的搜索词，等待下次检查
+        sources = await _available_sources(source)
+        if not sources:
+            return
+        
+        due = [query for query in await adaptive_schedule.pop_due() if query in groups]
+        for query in due:
+            _dispatch_crawl(groups[query], sources, max_pages)
+        
+        if due:
+            logger.info(f"自适应调度启动 {len(due)} 个到期搜索词的爬虫任务，共 {len(groups)} 个搜索词")
+    
+    except Exception as e:
+        logger.error(f"自适应调度抓取失败: {str(e)}")
+
+
+async def rebuild_seen_urls() -> None:
+    """
+    从数据库重建已抓取URL过滤器，清除写入失败或已删除新闻造成的偏差
+    """
+    rebuild_seen_url_filter.delay()
+    logger.info("已启动已抓取URL过滤器重建任务")
+
+
+async def train_related_news_index() -> None:
+    """
+    检查相关新闻索引是否需要训练倒排列表（由任务判断，不需要时直接返回）
+    """
+    if settings.RELATED_INDEX_ENABLED:
+        train_related_index.delay()
+
+
 async def send_daily_digests() -> None:
     """
     发送每日新闻摘要
@@ -79,14 +175,14 @@ def setup_scheduler() -> None:
     """
     设置定时任务
     """
-    # 每小时抓取一次所有关键词的新闻
+    # 定期检查到期的搜索词，按产出自适应调整各搜索词的抓取频率
     scheduler.add_job(
-        crawl_all_keywords,
+        crawl_due_keywords,
         'interval',
-        hours=1,
-        id='crawl_all_keywords',
+        seconds=settings.CRAWL_SCHEDULE_TICK,
+        id='crawl_due_keywords',
         replace_existing=True,
-        args=["baidu", 3]
+        args=["all", 3]
     )
     
     # 每天早上9点发送每日新闻摘要
@@ -99,6 +195,30 @@ def setup_scheduler() -> None:
         replace_existing=True
     )
     
+    # 每周日凌晨4点重建已抓取URL过滤器
+    scheduler.add_job(
+        rebuild_seen_urls,
+        'cron',
+        day_of_week='sun',
+        hour=4,
+        minute=0,
+        id='rebuild_seen_urls',
+        replace_existing=True
+    )
+    
+    # 每小时检查一次相关新闻索引，行数达到训练所需后自动训练倒排列表
+    scheduler.add_job(
+        train_related_news_index,
+        'interval',
+        hours=1,
+        id='train_related_news_index',
+        replace_existing=True
+    )
+    
     # 启动调度器
     scheduler.start()
+    
+    # 移除持久化的旧版每小时全量抓取任务，由自适应调度代替
+    if scheduler.get_job('crawl_all_keywords'):
+        scheduler.remove_job('crawl_all_keywords')
     logger.info("任务调度器已启动") 
\ No newline at end of file
@@ -1,47 +1,30 @@
 import logging
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import re
 from datetime import datetime
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.tokenize import sent_tokenize
-import time
-import os
 
 from app.workers.celery_app import celery_app, MonitoredTask
+from app.workers.crawler.engine import run_async
+from app.workers.crawler.seen import mark_seen
+from app.workers.crawler.watermark import advance_watermarks
+from app.workers.nlp.analysis_cache import analysis_cache
+from app.workers.nlp.entities import extract_entities
+from app.workers.nlp.keyword_matcher import keyword_matcher
+from app.workers.nlp.normalize import normalize_fields
+from app.workers.nlp.pool import AnalysisPoolError, analysis_pool
+from app.workers.nlp.resources import get_sentiment_analyzer
+from app.workers.nlp.simhash import near_duplicates, simhash
+from app.workers.nlp.summarize import summarizer
 from app.core.config import settings
+from app.services.related import index_news, related_index
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-# 设置NLTK数据目录为项目数据目录
-nltk_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data/nltk_data")
-os.makedirs(nltk_data_dir, exist_ok=True)
-nltk.data.path.insert(0, nltk_data_dir)
-
-# 初始化NLTK资源
-def download_nltk_data(resource, dir=nltk_data_dir):
-    """安全地下载NLTK资源"""
-    try:
-        nltk.data.find(resource)
-        logger.info(f"NLTK资源 {resource} 已存在")
-    except LookupError:
-        try:
-            logger.info(f"正在下载NLTK资源 {resource} 到 {dir}")
-            nltk.download(resource.split('/')[-1], download_dir=dir, quiet=False)
-            logger.info(f"NLTK资源 {resource} 下载完成")
-        except Exception as e:
-            logger.error(f"下载NLTK资源 {resource} 失败: {e}")
-            # 尝试使用系统默认位置
-            try:
-                logger.info(f"尝试使用系统默认位置下载NLTK资源 {resource}")
-                nltk.download(resource.split('/')[-1], quiet=False)
-            except Exception as e2:
-                logger.error(f"使用系统默认位置下载NLTK资源 {resource} 也失败: {e2}")
-
-# 下载必要的NLTK资源
-download_nltk_data('tokenizers/punkt')
-download_nltk_data('sentiment/vader_lexicon.zip')
+# 新闻URL格式
+_URL_PATTERN = re.compile(
+    r'^(https?:\/\/)?(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
+)
 
 @celery_app.task(
     bind=True,
@@ -62,61 +45,391 @@ def process_news(self, news_item: Dict) -> Dict:
     logger.info(f"开始处理新闻: {news_item.get('title', '无标题')}")
     
     try:
-        # 1. 文本清洗
-        news_item = clean_text(news_item)
-        
-        # 2. 数据验证
-        if not validate_news(news_item):
-            logger.warning(f"新闻数据验证失败: {news_item.get('title', '无标题')}")
+        processed_item = _process_item(news_item)
+        if processed_item is None:
             return news_item
+        processed_item = _add_entities([processed_item])[0]
         
-        # 3. 情感分析
-        news_item = analyze_sentiment(news_item)
-        
-        # 4. 生成摘要
-        news_item = generate_summary(news_item)
-        
-        # 5. 保存到数据库
-        # 这里应该调用数据库服务保存数据
-        # 暂时省略实现
+        # 保存到数据库
+        save_news_items([processed_item])
         
-        # 6. 触发通知任务
-        from app.workers.tasks.notification import send_news_notification
-        if news_item.get('sentiment_score', 0) < -0.5:  # 负面新闻通知
-            send_news_notification.delay(news_item)
+        # 触发通知任务
+        _notify_if_negative(processed_item)
         
         logger.info(f"成功处理新闻: {news_item.get('title', '无标题')}")
-        return news_item
+        return processed_item
     
     except Exception as e:
         logger.error(f"处理新闻失败: {str(e)}")
         self.retry(exc=e, countdown=60)
 
 
-def clean_text(news_item: Dict) -> Dict:
+@celery_app.task(
+    bind=True,
+    base=MonitoredTask,
+    max_retries=2,
+    retry_backoff=True,
+)
+def process_news_batch(self, news_items: List[Dict]) -> List[Dict]:
     """
-    清洗文本数据
+    批量处理新闻数据任务
+    
+    单条新闻处理失败时改为单独投递process_news重试，
+    不会导致整批重试。
+    
+    Args:
+        news_items: 新闻数据字典列表
+    
+    Returns:
+        处理成功的新闻数据列表
     """
-    # 复制一份，避免修改原始数据
-    cleaned_item = news_item.copy()
+    logger.info(f"开始批量处理 {len(news_items)} 条新闻")
+    
+    processed_items = []
+    invalid_count = 0
+    failed_count = 0
+    duplicate_count = 0
+    
+    # 启用进程池时分块交给子进程并行处理
+    outcomes = None
+    if settings.ANALYSIS_POOL_ENABLED:
+        try:
+            outcomes = analysis_pool.map(process_items, news_items)
+        except AnalysisPoolError as e:
+            logger.warning(f"分析进程池不可用，本批改为在当前进程处理: {str(e)}")
+    if outcomes is None:
+        outcomes = process_items(news_items)
+    
+    for news_item, (processed_item, error) in zip(news_items, outcomes):
+        if error is not None:
+            logger.error(f"处理新闻失败，改为单独重试: {news_item.get('title', '无标题')}: {error}")
+            process_news.delay(news_item)
+            failed_count += 1
+            continue
+        
+        if processed_item is None:
+            invalid_count += 1
+            continue
+        duplicate_count += int(is_duplicate(processed_item))
+        processed_items.append(processed_item)
+    
+    # 整批一次写入数据库，失败时重试整批
+    try:
+        save_news_items(processed_items)
+    except Exception as e:
+        logger.error(f"批量保存新闻失败: {str(e)}")
+        self.retry(exc=e, countdown=60)
+    
+    # 触发通知任务
+    for processed_item in processed_items:
+        _notify_if_negative(processed_item)
+    
+    cache_stats = analysis_cache.stats()
+    logger.info(
+        f"批量处理完成: 成功 {len(processed_items)} 条（其中转载 {duplicate_count} 条），"
+        f"验证失败 {invalid_count} 条，单独重试 {failed_count} 条，"
+        f"分析缓存命中率 {cache_stats['hit_rate']:.1%}（本地 {cache_stats['hits_local']}，"
+        f"Redis {cache_stats['hits_redis']}，未命中 {cache_stats['misses']}）"
+    )
+    if settings.ANALYSIS_POOL_ENABLED:
+        _log_pool_stats()
+    return processed_items
+
+
+def _log_pool_stats() -> None:
+    """
+    记录各分析子进程累计的每CPU秒处理条数和内存占用
+    """
+    for pid, child in sorted(analysis_pool.stats()['children'].items()):
+        memory = child['memory_mb']
+        logger.info(
+            f"分析子进程 {pid}: 累计 {child['items']} 条，{child['items_per_cpu_second']:.1f} 条/CPU秒，"
+            f"RSS {memory.get('rss', 0):.0f} MB，PSS {memory.get('pss', 0):.0f} MB，私有 {memory.get('private', 0):.0f} MB"
+        )
+
+
+def process_items(news_items: List[Dict]) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    逐条处理新闻（也在分析进程池的子进程中执行）
     
-    # 清洗标题
-    if 'title' in cleaned_item and cleaned_item['title']:
-        # 去除HTML标签
-        cleaned_item['title'] = re.sub(r'<[^>]+>', '', cleaned_item['title'])
-        # 去除多余空白
-        cleaned_item['title'] = re.sub(r'\s+', ' ', cleaned_item['title']).strip()
+    Returns:
+        每条新闻的(处理结果, 错误信息)，验证失败时处理结果为None
+    """
+    sid = _prefetch_sentiment(news_items)
+    outcomes = []
+    for news_item in news_items:
+        try:
+            outcomes.append((_process_item(news_item), None))
+        except Exception as e:
+            outcomes.append((None, str(e)))
+    if sid is not None:
+        sid.discard_prefetched()
+    
+    # 实体识别整块批量进行
+    processed_items = _add_entities([processed_item for processed_item, _ in outcomes])
+    return [(processed_item, error) for processed_item, (_, error) in zip(processed_items, outcomes)]
+
+
+def _process_item(news_item: Dict, sid: Optional[Any] = None) -> Optional[Dict]:
+    """
+    清洗、验证、情感分析并生成摘要，验证失败时返回None
+    
+    转载的近似重复新闻沿用原文的情感分数，跳过情感分析和摘要。
+    """
+    # 1. 文本清洗
+    news_item = clean_text(news_item)
+    
+    # 2. 数据验证
+    if not validate_news(news_item):
+        logger.warning(f"新闻数据验证失败: {news_item.get('title', '无标题')}")
+        return None
+    
+    # 3. 近似重复检测（指纹随新闻保存，入库后才加入索引）
+    fingerprint = simhash(
+        f"{news_item.get('title') or ''} {news_item.get('content') or ''}",
+        min_shingles=settings.SIMHASH_MIN_SHINGLES,
+    ) if settings.SIMHASH_ENABLED else None
+    duplicate = _find_duplicate(fingerprint) if fingerprint is not None else None
+    # 任务重试时会找到自己上次入库的索引，不算转载；旧版索引没有新闻ID，不作为原文
+    if duplicate is not None and duplicate.get('id') and duplicate['url'] != news_item['url']:
+        meta_data = dict(news_item.get('meta_data') or {})
+        meta_data.update(duplicate_of=duplicate['id'], simhash_distance=duplicate['distance'])
+        news_item = {**news_item, 'meta_data': meta_data, 'sentiment_score': duplicate.get('sentiment_score')}
+        logger.info(f"新闻与 {duplicate['url']} 近似重复，跳过分析: {news_item.get('title', '无标题')}")
+        return news_item
     
-    # 清洗内容
-    if 'content' in cleaned_item and cleaned_item['content']:
-        # 去除HTML标签
-        cleaned_item['content'] = re.sub(r'<[^>]+>', '', cleaned_item['content'])
-        # 去除多余空白
-        cleaned_item['content'] = re.sub(r'\s+', ' ', cleaned_item['content']).strip()
-        # 去除特殊字符
-        cleaned_item['content'] = re.sub(r'[^\w\s.,;:!?，。；：！？]', '', cleaned_item['content'])
+    # 4. 情感分析和生成摘要（内容相同的新闻已分析过时直接复用结果）
+    news_item = _analyze(news_item, sid=sid)
+    if fingerprint is not None:
+        news_item = {**news_item, 'simhash': fingerprint}
     
-    return cleaned_item
+    return news_item
+
+
+def _analyze(news_item: Dict, sid: Optional[Any] = None) -> Dict:
+    """
+    情感分析并生成摘要，按内容哈希缓存结果
+    
+    指定了分析器时不使用缓存（结果与默认分析器不同）。
+    """
+    use_cache = settings.ANALYSIS_CACHE_ENABLED and sid is None
+    if use_cache:
+        key = analysis_cache.key(news_item.get('title'), news_item.get('content'))
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            news_item = {**news_item, 'sentiment_score': cached.get('sentiment_score')}
+            if not news_item.get('summary') and cached.get('summary'):
+                news_item['summary'] = cached['summary']
+            return news_item
+    
+    had_summary = bool(news_item.get('summary'))
+    news_item = analyze_sentiment(news_item, sid=sid)
+    news_item = generate_summary(news_item)
+    
+    if use_cache:
+        # 新闻自带的摘要不属于分析结果，不缓存
+        analysis_cache.set(key, news_item if not had_summary else {**news_item, 'summary': None})
+    return news_item
+
+
+def _prefetch_sentiment(news_items: List[Dict]) -> Optional[Any]:
+    """
+    transformer后端: 把整块新闻的标题和正文一次提交给微批处理队列，逐条分析时直接取结果
+    
+    Returns:
+        支持预提交的情感分析器，其他后端返回None
+    """
+    if settings.SENTIMENT_BACKEND != 'transformer':
+        return None
+    try:
+        sid = get_sentiment_analyzer()
+    except Exception as e:
+        logger.warning(f"加载情感模型失败: {str(e)}")
+        return None
+    
+    texts = []
+    for news_item in news_items:
+        cleaned_item = clean_text(news_item)
+        texts.extend(cleaned_item[field] for field in ('title', 'content') if cleaned_item.get(field))
+    sid.prefetch(texts)
+    return sid
+
+
+def _add_entities(news_items: List[Optional[Dict]]) -> List[Optional[Dict]]:
+    """
+    批量识别人物、机构和地点，写入meta_data的entities
+    
+    验证失败（None）和转载的新闻跳过；识别失败时记录日志，不影响保存。
+    """
+    if not settings.NER_ENABLED:
+        return news_items
+    targets = [
+        index for index, news_item in enumerate(news_items)
+        if news_item is not None and not is_duplicate(news_item)
+    ]
+    if not targets:
+        return news_items
+    
+    try:
+        entities = extract_entities([
+            f"{news_items[index].get('title') or ''}\n{news_items[index].get('content') or ''}" for index in targets
+        ])
+    except Exception as e:
+        logger.warning(f"实体识别失败: {str(e)}")
+        return news_items
+    
+    news_items = list(news_items)
+    for index, found in zip(targets, entities):
+        meta_data = dict(news_items[index].get('meta_data') or {})
+        meta_data['entities'] = found
+        news_items[index] = {**news_items[index], 'meta_data': meta_data}
+    return news_items
+
+
+def _find_duplicate(fingerprint: int) -> Optional[Dict]:
+    """
+    查找近似重复的原文，索引不可用时视为不重复
+    """
+    try:
+        return run_async(near_duplicates.find(fingerprint))
+    except Exception as e:
+        logger.warning(f"近似重复检测失败: {str(e)}")
+        return None
+
+
+def _index_fingerprints(news_items: List[Dict], news_ids: Dict) -> None:
+    """
+    把新入库的原文（转载除外）的指纹加入近似重复索引，作为后续转载的原文，失败不影响保存
+    """
+    items = [
+        news_item for news_item in news_items
+        if news_item.get('simhash') is not None and news_item.get('url') in news_ids and not is_duplicate(news_item)
+    ]
+    if not items:
+        return
+    
+    async def add() -> None:
+        for news_item in items:
+            await near_duplicates.add(
+                news_item['simhash'], str(news_ids[news_item['url']]), news_item['url'], news_item.get('sentiment_score')
+            )
+    
+    try:
+        run_async(add())
+    except Exception as e:
+        logger.warning(f"写入近似重复索引失败: {str(e)}")
+
+
+def is_duplicate(news_item: Dict) -> bool:
+    """
+    是否为已识别的转载新闻
+    """
+    return bool((news_item.get('meta_data') or {}).get('duplicate_of'))
+
+
+def save_news_items(news_items: List[Dict]) -> None:
+    """
+    保存新闻、写入关键词关联，把URL标记为已抓取、推进抓取水位，
+    并把原文加入近似重复索引和相关新闻索引
+    """
+    if not news_items:
+        return
+    
+    from app.db.session import AsyncSessionLocal
+    from app.services.news import save_news_items as save_news
+    
+    async def save() -> Dict:
+        async with AsyncSessionLocal() as db:
+            items = await _link_matched_keywords(db, news_items)
+            news_ids = await save_news(db, news_items=items)
+        # 入库后才把URL标记为已抓取，之前任何一步失败都会在下次抓取时重新处理
+        await mark_seen(list(news_ids))
+        await advance_watermarks([item for item in news_items if item.get('url') in news_ids])
+        return news_ids
+    
+    news_ids = run_async(save())
+    _index_fingerprints(news_items, news_ids)
+    _index_related(news_items, news_ids)
+
+
+@celery_app.task(
+    bind=True,
+    base=MonitoredTask,
+)
+def train_related_index(self) -> int:
+    """
+    索引行数达到训练所需且尚未训练（或列表数配置已修改）时训练相关新闻索引的倒排列表
+
+    Returns:
+        已分配列表的行数，不需要训练时为0
+    """
+    if not settings.RELATED_INDEX_ENABLED or not related_index.needs_training():
+        return 0
+    logger.info(f"开始训练相关新闻索引: {len(related_index)} 行，{settings.RELATED_INDEX_LISTS} 个列表")
+    return related_index.train()
+
+
+def _index_related(news_items: List[Dict], news_ids: Dict) -> None:
+    """
+    把新入库的新闻追加到相关新闻索引（转载不加入），失败不影响保存
+    """
+    if not settings.RELATED_INDEX_ENABLED:
+        return
+    items = [
+        {**news_item, 'id': news_ids[news_item['url']]}
+        for news_item in news_items
+        if news_item.get('url') in news_ids and not is_duplicate(news_item)
+    ]
+    try:
+        added = index_news(items)
+        logger.debug(f"相关新闻索引追加 {added} 条")
+    except Exception as e:
+        logger.warning(f"追加相关新闻索引失败: {str(e)}")
+
+
+async def _link_matched_keywords(db, news_items: List[Dict]) -> List[Dict]:
+    """
+    用关键词自动机匹配标题和正文，把命中的关键词并入keyword_ids，入库时批量写入news_keyword
+    
+    匹配失败不影响保存，只保留抓取任务传入的关键词。
+    """
+    if not settings.KEYWORD_MATCH_ENABLED:
+        return news_items
+    try:
+        await keyword_matcher.refresh(db)
+    except Exception as e:
+        logger.warning(f"刷新关键词匹配器失败: {str(e)}")
+        if keyword_matcher.version is None:
+            return news_items
+    
+    linked_items = []
+    for news_item in news_items:
+        matched = keyword_matcher.match(f"{news_item.get('title') or ''}\n{news_item.get('content') or ''}")
+        if matched:
+            news_item = {**news_item, 'keyword_ids': sorted(matched | {str(keyword_id) for keyword_id in news_item.get('keyword_ids') or []})}
+        linked_items.append(news_item)
+    return linked_items
+
+
+def _notify_if_negative(news_item: Dict) -> None:
+    """
+    负面新闻触发通知任务，转载新闻不重复通知
+    """
+    from app.workers.tasks.notification import send_news_notification
+    if is_duplicate(news_item):
+        return
+    if (news_item.get('sentiment_score') or 0) < -0.5:  # 负面新闻通知
+        send_news_notification.delay(news_item)
+
+
+def clean_text(news_item: Dict) -> Dict:
+    """
+    清洗文本数据（去除HTML标签和实体、合并空白、全角转半角，见normalize_text）
+    
+    与早期版本不同，不再删除[\\w\\s.,;:!?，。；：！？]以外的字符，
+    引号、百分号、括号等保留在正文中（情感分析和摘要按原文处理）。
+    """
+    return normalize_fields(news_item, ('title', 'content'))
 
 
 def validate_news(news_item: Dict) -> bool:
@@ -128,10 +441,7 @@ def validate_news(news_item: Dict) -> bool:
         return False
     
     # 检查URL格式
-    url_pattern = re.compile(
-        r'^(https?:\/\/)?(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
-    )
-    if not url_pattern.match(news_item.get('url', '')):
+    if not _URL_PATTERN.match(news_item.get('url', '')):
         return False
     
     # 检查日期格式
@@ -147,15 +457,20 @@ def validate_news(news_item: Dict) -> bool:
     return True
 
 
-def analyze_sentiment(news_item: Dict) -> Dict:
+def analyze_sentiment(news_item: Dict, sid: Optional[Any] = None) -> Dict:
     """
     分析新闻情感
+    
+    Args:
+        news_item: 新闻数据
+        sid: 情感分析器，为None时按SENTIMENT_BACKEND和文本语言选择进程共享的分析器
     """
     # 复制一份，避免修改原始数据
     analyzed_item = news_item.copy()
     
-    # 初始化情感分析器
-    sid = SentimentIntensityAnalyzer()
+    # 标题和内容使用同一个分析器，以内容（缺失时以标题）判断语言
+    if sid is None:
+        sid = get_sentiment_analyzer(analyzed_item.get('content') or analyzed_item.get('title') or '')
     
     # 分析标题情感
     title_sentiment = 0
@@ -191,15 +506,7 @@ def generate_summary(news_item: Dict) -> Dict:
     if 'summary' in summarized_item and summarized_item['summary'] or not summarized_item.get('content'):
         return summarized_item
     
-    content = summarized_item['content']
-    
-    # 简单的抽取式摘要：取前2-3个句子
-    sentences = sent_tokenize(content)
-    
-    if len(sentences) <= 3:
-        summarized_item['summary'] = content
-    else:
-        # 取前3个句子作为摘要
-        summarized_item['summary'] = ' '.join(sentences[:3])
+    # TextRank抽取式摘要，超出预算时取导语
+    summarized_item['summary'] = summarizer.summarize(summarized_item['content'])
     
-    return summarized_item 
\ No newline at end of file
+    return summarized_item
@@ -1,12 +1,20 @@
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+import asyncio
 
 from app.workers.celery_app import celery_app, MonitoredTask
+from app.services.keyword import normalize_keyword_text
+from app.workers.crawler.adaptive import adaptive_schedule
+from app.workers.crawler.article import fetch_articles
+from app.workers.crawler.breaker import SourceBlockedError
+from app.workers.crawler.cache import response_cache
+from app.workers.crawler.engine import run_async
+from app.workers.crawler.proxy import proxy_pool
+from app.workers.crawler.rate_limit import rate_limiter
+from app.workers.crawler.seen import filter_unseen, rebuild_seen_urls, seen_urls
+from app.workers.crawler.sources import NewsSource, get_enabled_sources, get_source
+from app.workers.crawler.urls import canonicalize_url
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -23,39 +31,65 @@ logger = logging.getLogger(__name__)
 def crawl_news(
     self,
     keyword: str,
-    source: str = "baidu",
+    source: Union[str, List[str]] = "all",
     max_pages: int = 3,
     proxy: Optional[str] = None,
+    keyword_ids: Optional[List[str]] = None,
 ) -> List[Dict]:
     """
     抓取新闻任务
     
     Args:
         keyword: 要搜索的关键词
-        source: 数据源 (baidu, google, bing, sogou)
+        source: 数据源 (baidu, google, bing, sogou)，数据源列表，或all表示所有启用的数据源
         max_pages: 最大抓取页数
         proxy: 代理服务器地址
+        keyword_ids: 搜索结果要关联的关键词ID列表
     
     Returns:
-        抓取到的新闻列表
+        抓取到的新新闻列表（已入库的URL不会返回，也不会触发分析）
     """
     logger.info(f"开始抓取关键词 '{keyword}' 的新闻，来源: {source}")
     
     try:
-        if source == "baidu":
-            news_items = _crawl_baidu_news(keyword, max_pages, proxy)
-        elif source == "google":
-            news_items = _crawl_google_news(keyword, max_pages, proxy)
-        else:
+        sources = _resolve_sources(source)
+        if not sources:
             logger.error(f"不支持的数据源: {source}")
             return []
         
+        news_items, crawled_sources = run_async(_crawl_sources(sources, keyword, max_pages, proxy))
+        
         logger.info(f"成功抓取 {len(news_items)} 条关于 '{keyword}' 的新闻")
+        if settings.CRAWL_RATE_LIMIT_ENABLED:
+            _log_rate_limits(sources)
+        if settings.PROXY_ENABLED and not proxy:
+            _log_proxy_stats()
         
-        # 触发数据处理任务
-        from app.workers.tasks.analysis import process_news
-        for news_item in news_items:
-            process_news.delay(news_item)
+        # 跳过已入库的新闻，避免重复分析
+        crawled_count = len(news_items)
+        news_items = run_async(filter_unseen(news_items))
+        logger.info(f"其中 {len(news_items)} 条为新新闻，跳过 {crawled_count - len(news_items)} 条已抓取的新闻")
+        
+        # 上报各数据源的新新闻数，调整该搜索词的抓取间隔
+        run_async(_record_yield(keyword, crawled_sources, news_items))
+        
+        # 抓取新新闻的全文，替换结果页上的摘要片段
+        if settings.ARTICLE_FETCH_ENABLED and news_items:
+            news_items = run_async(fetch_articles(news_items))
+        
+        # 记录要关联的关键词，入库时写入news_keyword
+        if keyword_ids:
+            for news_item in news_items:
+                news_item["keyword_ids"] = keyword_ids
+        
+        if settings.CRAWL_CACHE_ENABLED:
+            _report_cache_stats()
+        
+        # 按批触发数据处理任务
+        from app.workers.tasks.analysis import process_news_batch
+        batch_size = max(settings.ANALYSIS_BATCH_SIZE, 1)
+        for start in range(0, len(news_items), batch_size):
+            process_news_batch.delay(news_items[start:start + batch_size])
         
         return news_items
     
@@ -64,84 +98,160 @@ def crawl_news(
         self.retry(exc=e, countdown=60 * (self.request.retries + 1))
 
 
-def _crawl_baidu_news(keyword: str, max_pages: int = 3, proxy: Optional[str] = None) -> List[Dict]:
-    """
-    从百度新闻抓取数据
+@celery_app.task(
+    bind=True,
+    base=MonitoredTask,
+)
+def rebuild_seen_url_filter(self) -> int:
     """
-    news_items = []
-    headers = {
-        "User-Agent": settings.USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
-    }
-    
-    proxies = {"http": proxy, "https": proxy} if proxy else None
+    从数据库重建已抓取URL过滤器
     
-    for page in range(max_pages):
+    Returns:
+        写入过滤器的URL数
+    """
+    logger.info("开始重建已抓取URL过滤器")
+    total = run_async(rebuild_seen_urls())
+    stats = run_async(seen_urls.stats())
+    logger.info(
+        f"已抓取URL过滤器: {stats['count']} 条，{len(stats['layers'])} 层，"
+        f"估算误判率 {stats['false_positive_rate']:.6f}"
+    )
+    return total
+
+
+def _log_rate_limits(sources: List[NewsSource]) -> None:
+    """
+    记录各数据源令牌桶的当前令牌数，有请求排队（令牌为负）时以info级别记录
+    """
+    for plugin in sources:
         try:
-            url = f"https://news.baidu.com/ns?word={keyword}&pn={page * 10}&cl=2&ct=1&tn=news&rn=10&ie=utf-8&bt=0&et=0"
-            
-            # 添加随机延迟，避免被封
-            time.sleep(settings.CRAWL_DELAY + random.uniform(0, 2))
-            
-            response = requests.get(url, headers=headers, proxies=proxies, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            news_divs = soup.select("div.result")
-            
-            for div in news_divs:
-                try:
-                    title_elem = div.select_one("h3 a")
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.text.strip()
-                    news_url = title_elem["href"]
-                    
-                    content_elem = div.select_one("div.c-summary")
-                    content = content_elem.text.strip() if content_elem else ""
-                    
-                    source_time = div.select_one("div.c-author")
-                    source = ""
-                    published_at = None
-                    
-                    if source_time:
-                        source_text = source_time.text.strip()
-                        parts = source_text.split()
-                        if len(parts) >= 2:
-                            source = parts[0]
-                            try:
-                                time_str = parts[1].replace("年", "-").replace("月", "-").replace("日", "")
-                                published_at = datetime.strptime(time_str, "%Y-%m-%d")
-                            except:
-                                pass
-                    
-                    news_items.append({
-                        "title": title,
-                        "url": news_url,
-                        "content": content,
-                        "source": source or "百度新闻",
-                        "published_at": published_at,
-                        "crawled_at": datetime.utcnow(),
-                    })
-                
-                except Exception as e:
-                    logger.warning(f"解析新闻项失败: {str(e)}")
-                    continue
-        
+            level = run_async(rate_limiter.fill_level(plugin.name))
         except Exception as e:
-            logger.error(f"抓取百度新闻第 {page + 1} 页失败: {str(e)}")
+            logger.warning(f"读取限速器状态失败: {str(e)}")
+            return
+        message = f"数据源 {plugin.name} 令牌桶: {level['tokens']:.1f}/{level['capacity']:.0f}，速率 {level['rate']:.2f}/秒"
+        if level["tokens"] < 0:
+            logger.info(f"{message}，排队约 {-level['tokens'] / level['rate']:.1f} 秒")
+        else:
+            logger.debug(message)
+
+
+def _log_proxy_stats() -> None:
+    """
+    记录代理池的代理数、隔离数、总体成功率和健康度最低的代理
+    """
+    try:
+        stats = run_async(proxy_pool.stats())
+    except Exception as e:
+        logger.warning(f"读取代理池状态失败: {str(e)}")
+        return
+    if not stats:
+        logger.warning("代理池为空")
+        return
+    success = sum(item["success"] for item in stats)
+    total = success + sum(item["failure"] for item in stats)
+    worst = stats[-1]
+    logger.info(
+        f"代理池: {len(stats)} 个代理，隔离 {sum(item['quarantined'] for item in stats)} 个，"
+        f"成功率 {success / max(total, 1):.1%}，健康度最低 {worst['proxy']} ({worst['health']:.3f})"
+    )
+
+
+def _report_cache_stats() -> None:
+    """
+    上报本进程的响应缓存计数并记录所有worker的累计命中率
+    """
+    try:
+        stats = run_async(response_cache.publish())
+    except Exception as e:
+        logger.warning(f"上报响应缓存统计失败: {str(e)}")
+        return
+    logger.info(
+        f"响应缓存: 命中 {stats.get('hits', 0)}，重新验证 {stats.get('revalidated', 0)}，未命中 {stats.get('misses', 0)}，"
+        f"命中率 {stats['hit_rate']:.1%}，占用 {stats.get('bytes', 0) / 1024 / 1024:.1f} MB"
+    )
+
+
+def _resolve_sources(source: Union[str, List[str]]) -> List[NewsSource]:
+    """
+    将任务参数解析为数据源插件列表
+    """
+    if source == "all":
+        return get_enabled_sources()
+    
+    names = [source] if isinstance(source, str) else source
+    sources = []
+    for name in names:
+        plugin = get_source(name)
+        if plugin is None:
+            logger.error(f"不支持的数据源: {name}")
             continue
+        sources.append(plugin)
+    return sources
+
+
+async def _crawl_sources(
+    sources: List[NewsSource], keyword: str, max_pages: int, proxy: Optional[str] = None
+) -> Tuple[List[Dict], List[str]]:
+    """
+    并发抓取多个数据源并合并结果
     
-    return news_items
+    Returns:
+        (合并后的新闻列表, 抓取成功的数据源名称列表)
+    """
+    results = await asyncio.gather(
+        *(source.crawl(keyword, max_pages, proxy) for source in sources),
+        return_exceptions=True,
+    )
+    
+    # 数据源和规范化搜索词随新闻传到入库任务，入库后据此推进抓取水位
+    query = normalize_keyword_text(keyword)
+    source_results = []
+    crawled_sources = []
+    for source, result in zip(sources, results):
+        if isinstance(result, SourceBlockedError):
+            # 被封禁的数据源直接跳过，不重试，等待熔断器恢复
+            logger.warning(f"跳过数据源 {source.name}: {str(result)}")
+            continue
+        if isinstance(result, BaseException):
+            logger.error(f"抓取{source.name}新闻失败: {str(result)}")
+            continue
+        logger.info(f"{source.name} 返回 {len(result)} 条关于 '{keyword}' 的新闻")
+        for news_item in result:
+            news_item["crawl_source"] = source.name
+            news_item["crawl_query"] = query
+        source_results.append(result)
+        crawled_sources.append(source.name)
+    
+    return _merge_news_items(source_results), crawled_sources
 
 
-def _crawl_google_news(keyword: str, max_pages: int = 3, proxy: Optional[str] = None) -> List[Dict]:
+async def _record_yield(keyword: str, crawled_sources: List[str], news_items: List[Dict]) -> None:
     """
-    从Google新闻抓取数据
+    按数据源统计新新闻数并上报给自适应调度，失败不影响抓取结果
     """
-    # 实际实现中需要处理Google新闻的抓取逻辑
-    # 这里只是一个示例框架
-    logger.info(f"Google新闻抓取功能尚未实现")
-    return [] 
\ No newline at end of file
+    if not crawled_sources:
+        return
+    new_counts = Counter(news_item.get("crawl_source") for news_item in news_items)
+    try:
+        await adaptive_schedule.record_yield(
+            normalize_keyword_text(keyword), {name: new_counts.get(name, 0) for name in crawled_sources}
+        )
+    except Exception as e:
+        logger.warning(f"记录抓取产出失败: {str(e)}")
+
+
+def _merge_news_items(source_results: List[List[Dict]]) -> List[Dict]:
+    """
+    合并多个数据源的结果，按规范化URL去重（保留先出现的条目）
+    """
+    merged = []
+    seen = set()
+    for news_items in source_results:
+        for news_item in news_items:
+            canonical_url = canonicalize_url(news_item.get("url", ""))
+            if not canonical_url or canonical_url in seen:
+                continue
+            seen.add(canonical_url)
+            merged.append(news_item)
+    return merged
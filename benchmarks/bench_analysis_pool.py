@@ -0,0 +1,95 @@
+"""
+多核分析基准测试
+
+在单进程和不同子进程数的分析进程池下运行完整的单条新闻分析（清洗、验证、情感分析、摘要），
+报告总吞吐量、每核吞吐量和各进程内存占用（RSS、PSS、私有内存），用于估算机器配置。
+基准测试关闭依赖Redis的近似重复检测和结果缓存。
+
+用法:
+    python -m benchmarks.bench_analysis_pool
+    python -m benchmarks.bench_analysis_pool --articles 2000 --processes 1 2 4 8
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+
+settings.SIMHASH_ENABLED = False
+settings.ANALYSIS_CACHE_ENABLED = False
+settings.SENTIMENT_BACKEND = "zh"
+settings.NLP_PRELOAD = ["zh_sentiment"]
+
+from app.workers.nlp.pool import AnalysisPool, available_cores, memory_usage  # noqa: E402
+from app.workers.tasks.analysis import process_items  # noqa: E402
+from benchmarks.bench_summary import make_article  # noqa: E402
+
+
+def make_items(count: int, sentences: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "title": make_article(rng, 1)[:30],
+            "url": f"https://news.example.com/article-{i}.html",
+            "content": make_article(rng, sentences),
+        }
+        for i in range(count)
+    ]
+
+
+def report(name: str, count: int, elapsed: float, cores: int, baseline: float = 0.0) -> float:
+    per_second = count / elapsed
+    speedup = f"  加速比 {per_second / baseline:5.2f}x" if baseline else ""
+    print(f"{name:<10} {per_second:9.1f} 条/秒  每核 {per_second / cores:8.1f} 条/秒{speedup}")
+    return per_second
+
+
+def format_memory(memory: Dict[str, float]) -> str:
+    return "  ".join(f"{key.upper()} {value:7.1f} MB" for key, value in memory.items())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="多核分析基准测试")
+    parser.add_argument("--articles", type=int, default=1000, help="合成新闻条数")
+    parser.add_argument("--sentences", type=int, default=30, help="每条新闻的句子数")
+    parser.add_argument("--processes", type=int, nargs="+", default=None, help="子进程数（默认1、2、4…直到可用核数）")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每块新闻条数")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    processes = args.processes or sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    items = make_items(args.articles, args.sentences)
+    print(f"可用核数: {cores}，新闻数: {len(items)}，每条 {args.sentences} 句")
+
+    # 单进程（预热后计时）
+    process_items(items[:10])
+    start = time.perf_counter()
+    outcomes = process_items(items)
+    baseline = report("单进程", len(items), time.perf_counter() - start, 1)
+    errors = [error for _, error in outcomes if error]
+    if errors:
+        print(f"处理失败 {len(errors)} 条，例如: {errors[0]}")
+        return 1
+    print(f"{'':<10} 主进程 {format_memory(memory_usage())}")
+
+    for count in processes:
+        pool = AnalysisPool(processes=count, chunk_size=args.chunk_size)
+        pool.start()
+        pool.map(process_items, items[:count * 2])
+        start = time.perf_counter()
+        pool.map(process_items, items)
+        report(f"{count} 进程", len(items), time.perf_counter() - start, count, baseline)
+        stats = pool.stats()
+        for pid, child in sorted(stats["children"].items()):
+            print(
+                f"{'':<10} 子进程 {pid:<7} {child['items']:6d} 条  {child['items_per_cpu_second']:8.1f} 条/CPU秒  "
+                f"{format_memory(child['memory_mb'])}"
+            )
+        pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
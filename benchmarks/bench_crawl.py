@@ -0,0 +1,134 @@
+"""
+爬虫吞吐量基准测试（离线回放）
+
+用录制的HTTP存档（或合成的百度结果页）回放抓取流程，报告页/秒、条/秒和每条新闻的CPU耗时。
+回放时关闭响应缓存、限速、熔断器、水位和代理池，不需要网络和Redis。
+
+录制存档: 设置环境变量 CRAWL_RECORD_DIR=data/recordings 后正常运行worker即可。
+
+用法:
+    python -m benchmarks.bench_crawl data/recordings
+    python -m benchmarks.bench_crawl --synthetic 50 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.workers.crawler.engine import run_async, set_transport
+from app.workers.crawler.replay import ReplayTransport
+from app.workers.crawler.sources import get_source
+from app.workers.tasks.crawl import _crawl_sources
+from benchmarks.bench_extract import make_synthetic_page
+
+
+def synthetic_transport(keywords: int, pages: int, **kwargs) -> ReplayTransport:
+    """
+    生成百度新闻结果页组成的合成存档
+    """
+    transport = ReplayTransport([], **kwargs)
+    source = get_source("baidu")
+    for index in range(keywords):
+        keyword = f"关键词{index}"
+        for page in range(pages):
+            transport.add(
+                source.build_url(keyword, page),
+                make_synthetic_page(index * pages + page),
+                tags={"source": source.name, "keyword": keyword, "page": page},
+            )
+    return transport
+
+
+def plan_jobs(transport: ReplayTransport) -> List[Tuple[str, List[str], int]]:
+    """
+    根据存档中的请求标签还原抓取任务: (关键词, 数据源列表, 页数)
+    """
+    pages: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for record in transport.records():
+        tags = record.get("tags") or {}
+        if "source" not in tags or "keyword" not in tags or get_source(tags["source"]) is None:
+            continue
+        sources = pages[tags["keyword"]]
+        sources[tags["source"]] = max(sources.get(tags["source"], 0), tags.get("page", 0) + 1)
+    return [(keyword, list(sources), max(sources.values())) for keyword, sources in pages.items()]
+
+
+async def run_jobs(jobs: List[Tuple[str, List[str], int]], concurrency: int) -> int:
+    """
+    按给定并发数抓取所有关键词，返回合并去重后的新闻条数
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_one(keyword: str, source_names: List[str], max_pages: int) -> int:
+        async with limit:
+            sources = [get_source(name) for name in source_names]
+            news_items, _ = await _crawl_sources(sources, keyword, max_pages)
+            return len(news_items)
+
+    return sum(await asyncio.gather(*(run_one(*job) for job in jobs)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="爬虫吞吐量基准测试（离线回放）")
+    parser.add_argument("archives", nargs="*", help="录制的存档文件或目录（支持通配符）")
+    parser.add_argument("--synthetic", type=int, default=20, help="没有指定存档时生成的合成关键词数")
+    parser.add_argument("--pages", type=int, default=3, help="合成存档每个关键词的页数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时抓取的关键词数")
+    parser.add_argument("--rounds", type=int, default=3, help="重复轮数")
+    parser.add_argument("--latency", type=float, default=None, help="每次请求的固定延迟（秒）")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="按录制耗时的比例注入延迟")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率")
+    parser.add_argument("--error-status", type=int, default=503, help="注入的错误状态码，0表示超时")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    # 只测量抓取和解析本身
+    settings.CRAWL_CACHE_ENABLED = False
+    settings.CRAWL_RATE_LIMIT_ENABLED = False
+    settings.CIRCUIT_BREAKER_ENABLED = False
+    settings.CRAWL_WATERMARK_ENABLED = False
+    settings.PROXY_ENABLED = False
+
+    options = dict(
+        latency=args.latency,
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    if args.archives:
+        transport = ReplayTransport.from_archive(args.archives, **options)
+    else:
+        transport = synthetic_transport(args.synthetic, args.pages, **options)
+    set_transport(transport)
+
+    jobs = plan_jobs(transport)
+    if not jobs:
+        print("存档中没有可回放的抓取请求（缺少数据源/关键词标签）")
+        return 1
+    print(f"关键词数: {len(jobs)}, 并发: {args.concurrency}, 轮数: {args.rounds}")
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    items = 0
+    for _ in range(args.rounds):
+        items += run_async(run_jobs(jobs, args.concurrency))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    counters = transport.counters
+    pages = counters["served"]
+    print(f"页面: {pages}  新闻: {items}  注入错误: {counters['injected_errors']}  缺失: {counters['missing']}")
+    print(f"耗时: {wall:.2f} 秒  CPU: {cpu:.2f} 秒")
+    print(f"{pages / wall:10.1f} 页/秒")
+    print(f"{items / wall:10.1f} 条/秒")
+    print(f"{cpu * 1000 / max(items, 1):10.3f} ms CPU/条")
+    print(f"{counters['bytes'] / wall / 1024 / 1024:10.2f} MB/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+百度新闻结果页解析基准测试
+
+对比lxml预编译选择器与BeautifulSoup html.parser两种解析路径，
+并校验两者输出的新闻数据完全一致。
+
+用法:
+    python -m benchmarks.bench_extract data/pages/*.html
+    python -m benchmarks.bench_extract --synthetic 50
+"""
+import argparse
+import glob
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from app.workers.crawler.extract import decode_html
+from app.workers.crawler.sources import BaiduNewsSource
+
+
+def make_synthetic_page(index: int, results: int = 10) -> bytes:
+    """
+    生成与百度新闻结构一致的结果页，用于没有保存页面时的测试
+    """
+    rng = random.Random(index)
+    blocks = []
+    for i in range(results):
+        words = "".join(rng.choice("经济市场公司发布增长科技政策投资银行数据") for _ in range(rng.randint(40, 120)))
+        blocks.append(
+            f'<div class="result c-container" id="{i + 1}">'
+            f'<h3 class="c-title"><a href="https://example.com/news/{index}/{i}.html" target="_blank">'
+            f'<em>关键词</em>新闻标题 {index}-{i} &amp; 更多</a></h3>'
+            f'<div class="c-summary c-row"><div class="c-author">新华网&nbsp;&nbsp; 2023年{rng.randint(1, 12)}月{rng.randint(1, 28)}日</div>'
+            f'{words}<!-- 注释 --><span class="c-info">百度快照</span></div>'
+            f'</div>'
+        )
+    page = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>百度新闻搜索</title>'
+        '<script>var s = "<div class=\\"result\\">";</script></head><body>'
+        '<div id="wrapper"><div id="content_left">' + "".join(blocks) + "</div></div></body></html>"
+    )
+    return page.encode("utf-8")
+
+
+def strip_volatile(items: List[Dict]) -> List[Dict]:
+    """
+    去掉每次解析都会变化的字段，便于比较
+    """
+    return [{k: v for k, v in item.items() if k != "crawled_at"} for item in items]
+
+
+def run(name: str, parse: Callable[[bytes], List[Dict]], pages: List[bytes], rounds: int) -> float:
+    """
+    运行一种解析路径并打印耗时，返回每页平均毫秒数
+    """
+    start = time.perf_counter()
+    items = 0
+    for _ in range(rounds):
+        for page in pages:
+            items += len(parse(page))
+    elapsed = time.perf_counter() - start
+    per_page = elapsed * 1000 / (rounds * len(pages))
+    print(f"{name:<12} {per_page:8.3f} ms/页  {rounds * len(pages) / elapsed:8.1f} 页/秒  {items / elapsed:10.1f} 条/秒")
+    return per_page
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="百度新闻结果页解析基准测试")
+    parser.add_argument("pages", nargs="*", help="保存的结果页文件（支持通配符）")
+    parser.add_argument("--synthetic", type=int, default=20, help="没有指定页面时生成的合成页面数")
+    parser.add_argument("--rounds", type=int, default=20, help="重复轮数")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.pages for path in sorted(glob.glob(pattern))]
+    if paths:
+        pages = [open(path, "rb").read() for path in paths]
+    else:
+        pages = [make_synthetic_page(i) for i in range(args.synthetic)]
+    print(f"页面数: {len(pages)}, 轮数: {args.rounds}")
+
+    source = BaiduNewsSource()
+    lxml_parse = lambda body: source.parse(body)
+    soup_parse = lambda body: source.parse_soup(decode_html(body))
+
+    # 校验两种解析路径输出一致
+    mismatches = 0
+    for index, page in enumerate(pages):
+        if strip_volatile(lxml_parse(page)) != strip_volatile(soup_parse(page)):
+            mismatches += 1
+            print(f"输出不一致: {paths[index] if paths else f'合成页面 {index}'}")
+    if mismatches:
+        print(f"共 {mismatches} 个页面输出不一致")
+
+    baseline = run("html.parser", soup_parse, pages, args.rounds)
+    fast = run("lxml", lxml_parse, pages, args.rounds)
+    print(f"加速比: {baseline / fast:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
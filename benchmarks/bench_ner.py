@@ -0,0 +1,82 @@
+"""
+spaCy实体识别基准测试
+
+对比逐条调用nlp()与不同batch_size、n_process下nlp.pipe的吞吐量，用于选择SPACY_BATCH_SIZE和SPACY_N_PROCESS。
+需要本地spaCy模型（SPACY_MODEL_PATH或--model）。
+
+用法:
+    python -m benchmarks.bench_ner --model /opt/models/zh_core_web_sm-3.6.0
+    python -m benchmarks.bench_ner --batch-sizes 16 64 256 --n-process 1 2 4 data/articles/*.txt
+"""
+import argparse
+import glob
+import random
+import sys
+import time
+from typing import List
+
+from app.core.config import settings
+from app.workers.nlp.entities import extract_entities
+from app.workers.nlp.resources import resources
+from benchmarks.bench_summary import make_article
+
+# 合成新闻中穿插的实体
+_NAMES = ["张伟", "李娜", "王强", "国家统计局", "中国人民银行", "华为公司", "北京", "上海", "深圳", "广东省"]
+
+
+def make_articles(count: int, sentences: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(count):
+        parts = make_article(rng, sentences).split("。")
+        articles.append("。".join(f"{rng.choice(_NAMES)}{part}" if rng.random() < 0.3 else part for part in parts))
+    return articles
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="spaCy实体识别基准测试")
+    parser.add_argument("files", nargs="*", help="新闻正文文件（每个文件一篇，支持通配符）")
+    parser.add_argument("--model", default=None, help="spaCy模型目录，默认使用SPACY_MODEL_PATH")
+    parser.add_argument("--articles", type=int, default=500, help="合成新闻篇数")
+    parser.add_argument("--sentences", type=int, default=20, help="每篇合成新闻的句子数")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64, 128, 256])
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    if args.model:
+        settings.SPACY_MODEL_PATH = args.model
+    start = time.perf_counter()
+    try:
+        nlp = resources.get("spacy_ner")
+    except (ImportError, LookupError) as e:
+        print(f"无法加载spaCy模型: {str(e)}")
+        return 1
+    print(f"模型加载: {(time.perf_counter() - start) * 1000:.0f} ms，组件: {nlp.pipe_names}")
+
+    paths = [path for pattern in args.files for path in sorted(glob.glob(pattern))]
+    articles = [open(path, encoding="utf-8").read() for path in paths] if paths else make_articles(args.articles, args.sentences)
+    articles = [article[:settings.SPACY_MAX_CHARS] for article in articles]
+    print(f"新闻数: {len(articles)}，平均 {sum(map(len, articles)) / len(articles):.0f} 字")
+
+    start = time.perf_counter()
+    for article in articles:
+        nlp(article)
+    baseline = len(articles) / (time.perf_counter() - start)
+    print(f"{'逐条nlp()':<24} {baseline:9.1f} 篇/秒")
+
+    for n_process in args.n_process:
+        settings.SPACY_N_PROCESS = n_process
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            results = extract_entities(articles, batch_size=batch_size)
+            per_second = len(articles) / (time.perf_counter() - start)
+            found = sum(len(values) for entities in results for values in entities.values())
+            print(
+                f"{f'pipe batch={batch_size} n_process={n_process}':<24} {per_second:9.1f} 篇/秒  "
+                f"加速比 {per_second / baseline:5.2f}x  实体 {found}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+新闻文本清洗基准测试
+
+对比normalize_text与原clean_text（多次re.sub）及validate_news（每次调用编译URL正则）的耗时。
+
+用法:
+    python -m benchmarks.bench_normalize
+    python -m benchmarks.bench_normalize --articles 5000 --length 2000
+    python -m benchmarks.bench_normalize data/articles/*.html
+"""
+import argparse
+import glob
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from app.workers.tasks.analysis import clean_text, validate_news
+
+_WORDS = "经济市场公司发布增长科技政策投资银行数据记者报道今年表示企业国家发展改革委员会上海北京"
+_LATIN = ["AI", "GDP", "CEO", "iPhone", "5G", "Q3", "2023"]
+_FULLWIDTH = ["ＡＩ", "ＧＤＰ", "２０２３", "（", "）", "％"]
+_MARKUP = ["<em>", "</em>", "<b>", "</b>", "<br/>", "</p>\n<p>", '<a href="https://example.com/a?x=1&amp;y=2">', "</a>"]
+_ENTITIES = ["&nbsp;", "&amp;", "&quot;", "&ldquo;", "&rdquo;", "&#8220;", "&#x4e2d;", "&mdash;"]
+
+
+def legacy_clean_text(news_item: Dict) -> Dict:
+    """
+    原clean_text实现（对照）
+    """
+    cleaned_item = news_item.copy()
+    if 'title' in cleaned_item and cleaned_item['title']:
+        cleaned_item['title'] = re.sub(r'<[^>]+>', '', cleaned_item['title'])
+        cleaned_item['title'] = re.sub(r'\s+', ' ', cleaned_item['title']).strip()
+    if 'content' in cleaned_item and cleaned_item['content']:
+        cleaned_item['content'] = re.sub(r'<[^>]+>', '', cleaned_item['content'])
+        cleaned_item['content'] = re.sub(r'\s+', ' ', cleaned_item['content']).strip()
+        cleaned_item['content'] = re.sub(r'[^\w\s.,;:!?，。；：！？]', '', cleaned_item['content'])
+    return cleaned_item
+
+
+def legacy_validate_news(news_item: Dict) -> bool:
+    """
+    原validate_news实现（对照，每次调用构造URL正则）
+    """
+    if not news_item.get('title') or not news_item.get('url'):
+        return False
+    url_pattern = re.compile(
+        r'^(https?:\/\/)?(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
+    )
+    if not url_pattern.match(news_item.get('url', '')):
+        return False
+    if 'published_at' in news_item and news_item['published_at']:
+        if not isinstance(news_item['published_at'], datetime):
+            try:
+                if isinstance(news_item['published_at'], str):
+                    datetime.fromisoformat(news_item['published_at'].replace('Z', '+00:00'))
+            except ValueError:
+                return False
+    return True
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    """
+    生成带少量标签、实体、全角字符和多余空白的新闻文本
+    """
+    parts = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.04:
+            part = rng.choice(_MARKUP)
+        elif roll < 0.07:
+            part = rng.choice(_ENTITIES)
+        elif roll < 0.09:
+            part = rng.choice(_FULLWIDTH)
+        elif roll < 0.12:
+            part = f" {rng.choice(_LATIN)} "
+        elif roll < 0.14:
+            part = rng.choice(["\n  ", "\t", "　", "  "])
+        else:
+            part = "".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 16))) + rng.choice("，，，。；")
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def make_items(count: int, length: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "title": make_text(rng, 30),
+            "url": f"https://news.example.com/{datetime(2023, 1, 1):%Y/%m/%d}/article-{i}.html?from=search",
+            "content": make_text(rng, length),
+            "published_at": "2023-06-01T08:00:00Z",
+        }
+        for i in range(count)
+    ]
+
+
+def run(name: str, process: Callable[[Dict], object], items: List[Dict], rounds: int) -> float:
+    """
+    运行一种实现并打印耗时，返回每条平均微秒数
+    """
+    chars = sum(len(item.get("title") or "") + len(item.get("content") or "") for item in items) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            process(item)
+    elapsed = time.perf_counter() - start
+    per_item = elapsed * 1e6 / (rounds * len(items))
+    print(f"{name:<18} {per_item:9.1f} us/条  {rounds * len(items) / elapsed:10.1f} 条/秒  {chars / elapsed / 1e6:8.2f} M字/秒")
+    return per_item
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="新闻文本清洗基准测试")
+    parser.add_argument("files", nargs="*", help="新闻正文或全文页面文件（每个文件一篇，支持通配符）")
+    parser.add_argument("--articles", type=int, default=2000, help="合成新闻条数")
+    parser.add_argument("--length", type=int, default=1500, help="合成新闻正文字数")
+    parser.add_argument("--rounds", type=int, default=5, help="重复轮数")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.files for path in sorted(glob.glob(pattern))]
+    if paths:
+        items = [
+            {"title": path, "url": f"https://example.com/{i}.html", "content": open(path, encoding="utf-8", errors="replace").read()}
+            for i, path in enumerate(paths)
+        ]
+    else:
+        items = make_items(args.articles, args.length)
+    print(f"新闻数: {len(items)}，平均 {sum(len(item['content']) for item in items) / len(items):.0f} 字，轮数: {args.rounds}")
+
+    baseline = run("clean_text(原)", legacy_clean_text, items, args.rounds)
+    fast = run("clean_text", clean_text, items, args.rounds)
+    print(f"清洗加速比: {baseline / fast:.1f}x")
+
+    cleaned = [clean_text(item) for item in items]
+    # 清洗结果应当是稳定的，再次清洗不变
+    unstable = sum(clean_text(item) != item for item in cleaned)
+    if unstable:
+        print(f"{unstable} 条新闻重复清洗后结果变化")
+
+    baseline = run("validate_news(原)", legacy_validate_news, cleaned, args.rounds)
+    fast = run("validate_news", validate_news, cleaned, args.rounds)
+    print(f"验证加速比: {baseline / fast:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+相关新闻索引基准测试
+
+在临时目录中建立合成向量索引（按主题聚类的归一化向量，模拟同一事件的多篇报道），报告:
+向量化速度、追加吞吐量、索引文件大小、逐行计算全部向量的查询延迟，
+以及训练倒排列表后不同probes下的查询延迟和相对逐行计算的召回率（recall@k）。
+
+用法:
+    python -m benchmarks.bench_related
+    python -m benchmarks.bench_related --rows 1000000 --lists 1024 --probes 8 16 32 64
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+from uuid import UUID
+
+import numpy as np
+
+from app.services.related import RelatedIndex, vectorize
+from benchmarks.bench_summary import make_article
+
+
+def percentiles(latencies: List[float]) -> str:
+    values = np.array(latencies) * 1000
+    return f"p50 {np.percentile(values, 50):7.2f} ms  p95 {np.percentile(values, 95):7.2f} ms"
+
+
+def make_vectors(rng: np.random.Generator, centers: np.ndarray, count: int, noise: float) -> np.ndarray:
+    vectors = centers[rng.integers(0, len(centers), count)] + rng.standard_normal((count, centers.shape[1]), dtype=np.float32) * noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="相关新闻索引基准测试")
+    parser.add_argument("--rows", type=int, default=1000000, help="索引行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--topics", type=int, default=20000, help="合成主题数")
+    parser.add_argument("--noise", type=float, default=0.03, help="每维噪声标准差")
+    parser.add_argument("--queries", type=int, default=200, help="查询次数")
+    parser.add_argument("--brute-queries", type=int, default=20, help="逐行计算的查询次数")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=1024, help="倒排列表数")
+    parser.add_argument("--probes", type=int, nargs="+", default=[8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    articles = [(make_article(random.Random(i), 1)[:30], make_article(random.Random(i), 20)) for i in range(500)]
+    start = time.perf_counter()
+    for title, content in articles:
+        vectorize(title, content, args.dim)
+    print(f"向量化: {len(articles) / (time.perf_counter() - start):.0f} 篇/秒（每篇约 {len(articles[0][1])} 字）")
+
+    centers = rng.standard_normal((args.topics, args.dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    with tempfile.TemporaryDirectory() as directory:
+        index = RelatedIndex(directory, args.dim)
+        start = time.perf_counter()
+        batch = 100000
+        for offset in range(0, args.rows, batch):
+            count = min(batch, args.rows - offset)
+            ids = [UUID(int=offset + i + 1) for i in range(count)]
+            index.add(ids, make_vectors(rng, centers, count, args.noise))
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"追加: {len(index)} 行，{len(index) / elapsed:.0f} 行/秒，索引文件 {size / 1024 / 1024:.0f} MB")
+
+        queries = make_vectors(rng, centers, args.queries, args.noise)
+        latencies = []
+        truth = []
+        for query in queries[:args.brute_queries]:
+            start = time.perf_counter()
+            truth.append({news_id for news_id, _ in index.search(query, args.k, probes=0)})
+            latencies.append(time.perf_counter() - start)
+        print(f"{'逐行计算':<12} {percentiles(latencies)}")
+
+        try:
+            start = time.perf_counter()
+            index.train(args.lists)
+            print(f"训练 {args.lists} 个列表: {time.perf_counter() - start:.1f}s")
+        except ValueError as e:
+            print(f"跳过训练: {str(e)}")
+            return 0
+
+        for probes in args.probes:
+            latencies = []
+            found = 0
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                results = index.search(query, args.k, probes=probes)
+                latencies.append(time.perf_counter() - start)
+                if i < len(truth):
+                    found += len(truth[i] & {news_id for news_id, _ in results})
+            recall = found / max(1, sum(len(expected) for expected in truth))
+            print(f"{f'probes={probes}':<12} {percentiles(latencies)}  recall@{args.k} {recall:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
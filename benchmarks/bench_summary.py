@@ -0,0 +1,85 @@
+"""
+TextRank摘要基准测试
+
+用合成的中英文新闻（或指定的正文文件）测量摘要吞吐量、单篇耗时分布和退回导语的比例。
+
+用法:
+    python -m benchmarks.bench_summary
+    python -m benchmarks.bench_summary --articles 500 --sentences 20 80 300
+    python -m benchmarks.bench_summary data/articles/*.txt
+"""
+import argparse
+import glob
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from app.workers.nlp.summarize import Summarizer, split_sentences
+
+_ZH = "经济市场公司发布增长科技政策投资银行数据记者报道今年表示企业国家发展改革委员会消费就业价格出口制造"
+_EN = "market growth bank policy investment data report company economy inflation rate trade export price".split()
+
+
+def make_article(rng: random.Random, sentences: int) -> str:
+    """
+    生成中英文混合的合成新闻，约五分之一为英文句子
+    """
+    parts = []
+    for _ in range(sentences):
+        if rng.random() < 0.2:
+            words = [rng.choice(_EN) for _ in range(rng.randint(6, 20))]
+            parts.append(" " + " ".join(words).capitalize() + ". ")
+        else:
+            chars = "".join(rng.choice(_ZH) for _ in range(rng.randint(12, 40)))
+            parts.append(chars + rng.choice("。。。！？；"))
+    return "".join(parts).strip()
+
+
+def run(name: str, summarizer: Summarizer, articles: List[str]) -> None:
+    """
+    逐篇生成摘要，打印吞吐量、耗时分位数和退回导语的次数
+    """
+    latencies = []
+    start = time.perf_counter()
+    for article in articles:
+        begin = time.perf_counter()
+        summarizer.summarize(article)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    stats = summarizer.stats()
+    print(
+        f"{name:<12} {len(articles) / elapsed:9.1f} 篇/秒  p50 {np.percentile(latencies_ms, 50):7.2f} ms  "
+        f"p99 {np.percentile(latencies_ms, 99):7.2f} ms  max {latencies_ms.max():7.2f} ms  "
+        f"导语(超长) {stats['lead_size']}  导语(超时) {stats['lead_time']}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="TextRank摘要基准测试")
+    parser.add_argument("files", nargs="*", help="新闻正文文件（每个文件一篇，支持通配符）")
+    parser.add_argument("--articles", type=int, default=300, help="每种长度的合成新闻篇数")
+    parser.add_argument("--sentences", type=int, nargs="+", default=[10, 30, 100, 300], help="合成新闻的句子数")
+    parser.add_argument("--budget", type=float, default=None, help="每篇时间预算（秒），默认使用SUMMARY_TIME_BUDGET")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.files for path in sorted(glob.glob(pattern))]
+    if paths:
+        articles = [open(path, encoding="utf-8").read() for path in paths]
+        sentence_counts = [len(split_sentences(article)) for article in articles]
+        print(f"新闻数: {len(articles)}，平均 {np.mean(sentence_counts):.0f} 句")
+        run("文件", Summarizer(time_budget=args.budget), articles)
+        return 0
+
+    rng = random.Random(0)
+    for sentences in args.sentences:
+        articles = [make_article(rng, sentences) for _ in range(args.articles)]
+        run(f"{sentences} 句", Summarizer(time_budget=args.budget), articles)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
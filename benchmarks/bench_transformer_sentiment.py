@@ -0,0 +1,109 @@
+"""
+Transformer情感分析微批处理基准测试
+
+对不同的最大批大小（TRANSFORMER_MAX_BATCH_SIZE），把一批新闻文本提交给微批处理队列，
+报告总吞吐量，以及按实际批大小统计的平均计算耗时、平均请求延迟和计算吞吐量。
+不指定--model时在临时目录创建一个随机初始化的小型BERT模型（只用于测量，不代表真实模型的耗时）。
+需要transformers和torch（--runtime onnx时还需要onnxruntime）。
+
+用法:
+    python -m benchmarks.bench_transformer_sentiment
+    python -m benchmarks.bench_transformer_sentiment --model /opt/models/sentiment --runtime onnx --quantize
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.bench_summary import make_article
+
+
+def make_texts(count: int, sentences: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [make_article(rng, sentences) for _ in range(count)]
+
+
+def make_tiny_model(path: str, texts: List[str]) -> None:
+    """
+    用基准文本的字符作为词表，保存一个随机初始化的两层BERT分类模型
+    """
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    chars = sorted({char for text in texts for char in text if not char.isspace()})
+    with open(f"{path}/vocab.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + chars))
+    tokenizer = BertTokenizerFast(f"{path}/vocab.txt")
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=512,
+        num_labels=3,
+        id2label={0: "negative", 1: "neutral", 2: "positive"},
+        label2id={"negative": 0, "neutral": 1, "positive": 2},
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Transformer情感分析微批处理基准测试")
+    parser.add_argument("--model", default=None, help="本地模型目录，默认创建随机初始化的小模型")
+    parser.add_argument("--runtime", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--quantize", action="store_true", help="使用int8量化模型")
+    parser.add_argument("--texts", type=int, default=256, help="合成文本条数")
+    parser.add_argument("--sentences", type=int, default=3, help="每条文本的句子数")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=None, help="推理线程数")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    try:
+        from app.workers.nlp.transformer_sentiment import (
+            TransformerSentimentAnalyzer,
+            TransformerSentimentModel,
+            export_onnx,
+        )
+
+        texts = make_texts(args.texts, args.sentences)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = args.model
+            if path is None:
+                path = tmp
+                make_tiny_model(path, texts)
+                if args.runtime == "onnx":
+                    export_onnx(path, quantize=args.quantize)
+            start = time.perf_counter()
+            model = TransformerSentimentModel(
+                path, runtime=args.runtime, quantize=args.quantize, max_length=args.max_length, num_threads=args.threads
+            )
+            print(f"模型加载: {(time.perf_counter() - start) * 1000:.0f} ms，文本数: {len(texts)}")
+            model.scores(texts[:4])
+            print(f"{'最大批':>6} {'总吞吐量':>10}  {'实际批':>6} {'批数':>6} {'计算ms':>8} {'延迟ms':>8} {'计算吞吐量':>10}")
+
+            for max_batch_size in args.batch_sizes:
+                analyzer = TransformerSentimentAnalyzer(model, max_batch_size, args.max_wait_ms / 1000)
+                start = time.perf_counter()
+                analyzer.prefetch(texts)
+                for text in texts:
+                    analyzer.polarity_scores(text)
+                per_second = len(texts) / (time.perf_counter() - start)
+                for i, (size, stats) in enumerate(analyzer.batcher.stats().items()):
+                    print(
+                        f"{max_batch_size if i == 0 else '':>6} {f'{per_second:.1f} 条/秒' if i == 0 else '':>10}  "
+                        f"{size:>6} {stats['batches']:>6} {stats['compute_ms']:8.1f} {stats['latency_ms']:8.1f} "
+                        f"{stats['items_per_second']:8.1f} 条/秒"
+                    )
+    except (ImportError, LookupError) as e:
+        print(f"无法加载情感模型: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
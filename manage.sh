@@ -326,6 +326,11 @@ clean() {
 install_deps() {
     echo -e "${BLUE}安装依赖...${NC}"
     cd "$SCRIPT_DIR" && $PYTHON -m pip install -r requirements.txt
+    
+    # 下载NLP数据（worker运行时不会自动下载）
+    echo -e "${BLUE}下载NLTK数据...${NC}"
+    mkdir -p "$SCRIPT_DIR/data/nltk_data"
+    cd "$SCRIPT_DIR" && $PYTHON -m app.workers.nlp.resources download
 }
 
 # 更新依赖
@@ -298,6 +298,7 @@ def main():
     parser.add_argument("--with-beat", action="store_true", help="同时启动Celery Beat调度器")
     parser.add_argument("--celery-only", action="store_true", help="仅启动Celery服务（不启动API）")
     parser.add_argument("--celery-uid", type=str, help="指定运行Celery的用户ID或用户名")
+    parser.add_argument("--analysis-processes", type=int, help="Celery Worker批量分析使用的进程数（0表示可用CPU核数），不指定时单进程分析")
     
     # 数据库参数
     parser.add_argument("--init-db", action="store_true", help="初始化数据库")
@@ -357,6 +358,13 @@ def main():
         else:
             logger.warning("当前用户为root，建议使用--celery-uid指定非root用户运行Celery")
     
+    # 多进程分析（Worker仍以solo模式运行，批量分析任务内部使用进程池）
+    if args.analysis_processes is not None:
+        os.environ["ANALYSIS_POOL_ENABLED"] = "true"
+        if args.analysis_processes > 0:
+            os.environ["ANALYSIS_POOL_PROCESSES"] = str(args.analysis_processes)
+        logger.info(f"启用多进程分析: {args.analysis_processes or '可用CPU核数'} 个进程")
+    
     # 启动Celery Worker
     if args.with_celery or args.celery_only:
         celery_thread = threading.Thread(target=run_celery_worker, args=(celery_uid,))
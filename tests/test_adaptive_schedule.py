@@ -0,0 +1,53 @@
+"""
+自适应调度: 抓取间隔的计算和到期搜索词的认领
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.workers.crawler.adaptive import AdaptiveSchedule
+from app.workers.crawler.engine import run_async
+
+NOW = 1_700_000_000.0
+
+
+def test_interval_for_clamps_to_configured_range():
+    assert AdaptiveSchedule.interval_for({}) == settings.CRAWL_SCHEDULE_MAX_INTERVAL
+    assert AdaptiveSchedule.interval_for({"baidu": 1e6}) == settings.CRAWL_SCHEDULE_MIN_INTERVAL
+    rate = settings.CRAWL_SCHEDULE_TARGET_YIELD * 3600 / 5000
+    assert AdaptiveSchedule.interval_for({"baidu": rate / 2, "bing": rate / 2}) == pytest.approx(5000)
+    assert AdaptiveSchedule.interval_for({"baidu": rate}, weight=2.0) == pytest.approx(2500)
+
+
+def test_pop_due_reschedules_by_current_interval(fake_redis):
+    schedule = AdaptiveSchedule()
+    run_async(schedule.sync({"新闻": 1.0, "热点": 2.0}, now=NOW - 10))
+    run_async(fake_redis.hset(f"{schedule.prefix}:yield:热点", mapping={"baidu:rate": 3.0, "bing:rate": 1.5}))
+
+    assert sorted(run_async(schedule.pop_due(now=NOW))) == ["新闻", "热点"]
+    for query in ("新闻", "热点"):
+        due_at = run_async(fake_redis.zscore(f"{schedule.prefix}:due", query))
+        assert due_at == NOW + run_async(schedule.interval(query))
+    assert run_async(schedule.pop_due(now=NOW)) == []
+
+
+def test_concurrent_pop_due_claims_each_query_once(fake_redis):
+    schedule = AdaptiveSchedule()
+    queries = {f"关键词{i}": 1.0 for i in range(20)}
+    run_async(schedule.sync(queries, now=NOW - 10))
+
+    async def pop_concurrently():
+        return await asyncio.gather(*(schedule.pop_due(now=NOW) for _ in range(5)))
+
+    claimed = [query for result in run_async(pop_concurrently()) for query in result]
+    assert sorted(claimed) == sorted(queries)
+
+
+def test_sync_adds_new_and_removes_inactive_queries(fake_redis):
+    schedule = AdaptiveSchedule()
+    run_async(schedule.sync({"a": 1.0, "b": 1.0}, now=NOW))
+    run_async(schedule.sync({"b": 1.5, "c": 1.0}, now=NOW))
+
+    assert {item["query"] for item in run_async(schedule.stats())} == {"b", "c"}
+    assert run_async(fake_redis.hget(f"{schedule.prefix}:weight", "b")) == "1.5"
@@ -0,0 +1,123 @@
+"""
+数据源熔断器: 封禁判断、并发累计失败时只熔断一次、失败计数过期，以及半开探测失败加倍冷却
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.workers.crawler.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, detect_block
+from app.workers.crawler.engine import run_async
+
+
+@pytest.mark.parametrize(
+    "status, body, blocked",
+    [
+        (200, b"<html>results</html>", False),
+        (403, b"", True),
+        (429, b"", True),
+        (503, b"", False),
+        (503, b"<html>Service Unavailable</html>", False),
+        (503, b"<html><title>\xe7\x99\xbe\xe5\xba\xa6\xe5\xae\x89\xe5\x85\xa8\xe9\xaa\x8c\xe8\xaf\x81</title></html>", True),
+        (200, b"<div class='g-recaptcha'></div>", True),
+    ],
+)
+def test_detect_block(status, body, blocked):
+    assert (detect_block(status, body) is not None) == blocked
+
+
+def test_opens_after_threshold(fake_redis):
+    breaker = CircuitBreaker()
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD - 1):
+        run_async(breaker.record_failure("baidu", "HTTP 403"))
+    assert run_async(breaker.state("baidu"))["state"] == CLOSED
+
+    run_async(breaker.record_failure("baidu", "HTTP 403"))
+    state = run_async(breaker.state("baidu"))
+    assert state["state"] == OPEN
+    assert state["retry_after"] == pytest.approx(settings.CIRCUIT_OPEN_SECONDS, abs=5)
+    # 打开状态不随失败计数过期
+    assert run_async(fake_redis.ttl(f"{breaker.prefix}:baidu")) == -1
+
+
+def test_concurrent_failures_open_once(fake_redis, caplog):
+    breaker = CircuitBreaker()
+
+    async def fail_concurrently():
+        await asyncio.gather(*(breaker.record_failure("bing", "HTTP 429") for _ in range(10)))
+
+    with caplog.at_level("WARNING", logger="app.workers.crawler.breaker"):
+        run_async(fail_concurrently())
+
+    assert len([r for r in caplog.records if "熔断" in r.getMessage()]) == 1
+    state = run_async(breaker.state("bing"))
+    assert state["state"] == OPEN
+    assert state["failures"] == 10
+
+
+def test_failure_count_expires(fake_redis):
+    breaker = CircuitBreaker()
+    run_async(breaker.record_failure("google", "HTTP 403"))
+
+    ttl = run_async(fake_redis.ttl(f"{breaker.prefix}:google"))
+    assert 0 < ttl <= settings.CIRCUIT_FAILURE_WINDOW
+
+
+def test_failed_probe_doubles_cooldown(fake_redis):
+    breaker = CircuitBreaker()
+    key = f"{breaker.prefix}:baidu"
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+        run_async(breaker.record_failure("baidu", "HTTP 403"))
+    run_async(fake_redis.hset(key, "open_until", time.time() - 1))
+    assert run_async(breaker.state("baidu"))["state"] == HALF_OPEN
+
+    assert run_async(breaker.before_request("baidu"))
+    run_async(breaker.record_failure("baidu", "HTTP 403"))
+
+    state = run_async(breaker.state("baidu"))
+    assert state["state"] == OPEN
+    assert state["retry_after"] == pytest.approx(settings.CIRCUIT_OPEN_SECONDS * 2, abs=5)
+    assert not run_async(fake_redis.exists(f"{key}:probe"))
+
+    run_async(breaker.record_success("baidu"))
+    assert run_async(breaker.state("baidu"))["state"] == CLOSED
+
+
+@pytest.fixture
+def replay(fake_redis, monkeypatch):
+    from app.workers.crawler.engine import set_transport
+    from app.workers.crawler.replay import ReplayTransport
+
+    for name, value in [
+        ("CRAWL_CACHE_ENABLED", False),
+        ("CRAWL_RATE_LIMIT_ENABLED", False),
+        ("PROXY_ENABLED", False),
+        ("CIRCUIT_BREAKER_ENABLED", True),
+    ]:
+        monkeypatch.setattr(settings, name, value)
+    transport = ReplayTransport([])
+    set_transport(transport)
+    yield transport
+    set_transport(None)
+
+
+def test_fetch_counts_503_only_with_block_fingerprint(replay):
+    from app.workers.crawler.breaker import SourceBlockedError
+    from app.workers.crawler.sources import NewsSource
+
+    class Source(NewsSource):
+        name = "breaker-test"
+
+    replay.add("http://unavailable.test/", b"<html>Service Unavailable</html>", status=503)
+    replay.add("http://captcha.test/", b"<html><div class='g-recaptcha'></div></html>", status=503)
+    source = Source()
+
+    with pytest.raises(Exception) as raised:
+        run_async(source.fetch("http://unavailable.test/"))
+    assert not isinstance(raised.value, SourceBlockedError)
+    assert run_async(CircuitBreaker().state("breaker-test"))["failures"] == 0
+
+    with pytest.raises(SourceBlockedError):
+        run_async(source.fetch("http://captcha.test/"))
+    assert run_async(CircuitBreaker().state("breaker-test"))["failures"] == 1
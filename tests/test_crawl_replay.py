@@ -0,0 +1,140 @@
+"""
+通过回放传输层离线测试抓取流程: 解析多页结果、合并多个数据源、按水位提前停止翻页、
+过期缓存的条件请求，以及注入的超时
+"""
+from datetime import datetime
+from urllib.parse import quote
+
+import pytest
+
+from app.core.config import settings
+from app.workers.crawler import sources
+from app.workers.crawler.cache import ResponseCache
+from app.workers.crawler.engine import run_async, set_transport
+from app.workers.crawler.replay import ReplayTransport
+from app.workers.crawler.sources import BaiduNewsSource
+from app.workers.crawler.watermark import Watermark, watermarks
+from app.workers.tasks.crawl import _crawl_sources
+
+
+def result_page(items) -> bytes:
+    """
+    与百度新闻结构一致的结果页，items为(URL, 标题, 日期)
+    """
+    blocks = "".join(
+        f'<div class="result c-container"><h3 class="c-title"><a href="{url}">{title}</a></h3>'
+        f'<div class="c-summary c-row"><div class="c-author">新华网&nbsp;&nbsp; {date}</div>正文 {title}</div></div>'
+        for url, title, date in items
+    )
+    return f'<html><body><div id="content_left">{blocks}</div></body></html>'.encode("utf-8")
+
+
+def page_items(page: int, count: int = 3):
+    return [
+        (f"https://example.com/news/{page}/{i}.html", f"新闻{page}-{i}", f"2023年10月{20 - page}日")
+        for i in range(count)
+    ]
+
+
+class MirrorSource(BaiduNewsSource):
+    name = "mirror"
+
+    def build_url(self, keyword: str, page: int) -> str:
+        return f"https://mirror.example.test/search?q={quote(keyword)}&page={page}"
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    for name, value in [
+        ("CRAWL_CACHE_ENABLED", False),
+        ("CRAWL_RATE_LIMIT_ENABLED", False),
+        ("CIRCUIT_BREAKER_ENABLED", False),
+        ("PROXY_ENABLED", False),
+        ("CRAWL_WATERMARK_ENABLED", False),
+        ("CRAWL_HTML_PARSER", "lxml"),
+    ]:
+        monkeypatch.setattr(settings, name, value)
+    transport = ReplayTransport([])
+    set_transport(transport)
+    yield transport
+    set_transport(None)
+
+
+def add_pages(transport: ReplayTransport, source, keyword: str, pages: int) -> None:
+    for page in range(pages):
+        transport.add(source.build_url(keyword, page), result_page(page_items(page)))
+
+
+def test_crawl_parses_all_pages(replay):
+    source = BaiduNewsSource()
+    add_pages(replay, source, "经济", 3)
+
+    items = run_async(source.crawl("经济", max_pages=3))
+
+    assert [item["url"] for item in items] == [url for page in range(3) for url, _, _ in page_items(page)]
+    assert items[0]["title"] == "新闻0-0"
+    assert items[0]["source"] == "新华网"
+    assert items[0]["published_at"] == datetime(2023, 10, 20)
+    assert replay.counters["served"] == 3
+
+
+def test_crawl_sources_merges_and_tags(replay):
+    baidu, mirror = BaiduNewsSource(), MirrorSource()
+    add_pages(replay, baidu, "China GDP", 1)
+    # 镜像源返回同一篇新闻的http和跟踪参数写法，以及一篇独有的新闻
+    replay.add(mirror.build_url("China GDP", 0), result_page([
+        ("http://example.com/news/0/0.html?utm_source=rss", "新闻0-0", "2023年10月20日"),
+        ("https://example.com/only-mirror.html", "独家", "2023年10月20日"),
+    ]))
+
+    items, crawled = run_async(_crawl_sources([baidu, mirror], "China GDP", 1))
+
+    assert crawled == ["baidu", "mirror"]
+    assert len(items) == 4
+    assert items[-1]["url"] == "https://example.com/only-mirror.html"
+    assert {(item["crawl_source"], item["crawl_query"]) for item in items} == {("baidu", "china gdp"), ("mirror", "china gdp")}
+
+
+def test_watermark_stops_paging(replay, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_WATERMARK_ENABLED", True)
+    source = BaiduNewsSource()
+    add_pages(replay, source, "经济", 3)
+    # 上次抓取已经入库第0页
+    run_async(watermarks.update("baidu", "经济", [{"url": url} for url, _, _ in page_items(0)], Watermark()))
+
+    items = run_async(source.crawl("经济", max_pages=3))
+
+    assert len(items) == 3
+    assert replay.counters["served"] == 1
+    assert run_async(watermarks.pages_saved()) == {"baidu": 2}
+
+
+def test_stale_cache_is_revalidated(replay, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "CRAWL_CACHE_DEFAULT_TTL", 0)
+    monkeypatch.setattr(sources, "response_cache", ResponseCache(str(tmp_path / "responses.db"), 1024 * 1024))
+    source = BaiduNewsSource()
+    url = source.build_url("经济", 0)
+    body = result_page(page_items(0))
+    replay.add(url, body, headers={"ETag": '"v1"'})
+    replay.add(url, b"", status=304)
+
+    assert run_async(source.fetch(url)) == (body, "utf-8")
+    assert run_async(source.fetch(url)) == (body, "utf-8")
+    assert sources.response_cache.counters["misses"] == 1
+    assert sources.response_cache.counters["revalidated"] == 1
+
+
+def test_injected_timeouts_yield_empty_pages(replay):
+    source = BaiduNewsSource()
+    add_pages(replay, source, "经济", 2)
+    replay.error_rate = 1.0
+    replay.error_status = 0
+
+    assert run_async(source.crawl("经济", max_pages=2)) == []
+    assert replay.counters["injected_errors"] == 2
+
+
+def test_missing_urls_are_not_fatal(replay):
+    assert run_async(BaiduNewsSource().crawl("没有录制", max_pages=1)) == []
+    assert replay.counters["missing"] == 1
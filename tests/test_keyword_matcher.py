@@ -0,0 +1,81 @@
+"""
+关键词匹配: Aho-Corasick自动机（重叠模式、增删后重算失败指针）和关键词匹配器的单词边界、规范化
+"""
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.workers.nlp.keyword_matcher import AhoCorasick, KeywordMatcher
+
+
+def brute_force_matches(patterns, text):
+    return sorted(
+        (start + len(pattern), pattern)
+        for pattern in patterns
+        for start in range(len(text))
+        if text.startswith(pattern, start)
+    )
+
+
+def test_overlapping_patterns():
+    automaton = AhoCorasick()
+    for pattern in ("he", "she", "his", "hers"):
+        automaton.add(pattern)
+
+    assert sorted(automaton.iter_matches("ushers")) == [(4, "he"), (4, "she"), (6, "hers")]
+
+
+def test_matches_agree_with_brute_force_after_updates():
+    rng = random.Random(0)
+    alphabet = "ab新闻"
+    automaton = AhoCorasick()
+    patterns = set()
+    for _ in range(200):
+        pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        if pattern in patterns and rng.random() < 0.5:
+            automaton.remove(pattern)
+            patterns.discard(pattern)
+        else:
+            automaton.add(pattern)
+            patterns.add(pattern)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert sorted(automaton.iter_matches(text)) == brute_force_matches(patterns, text), text
+
+
+def test_remove_missing_pattern_is_noop():
+    automaton = AhoCorasick()
+    automaton.add("新闻")
+    automaton.remove("新闻联播")
+    assert list(automaton.iter_matches("新闻联播")) == [(2, "新闻")]
+
+
+@pytest.fixture
+def matcher():
+    matcher = KeywordMatcher()
+    matcher.load([("ai", "AI"), ("chip", "芯片"), ("chip2", " 芯片 "), ("ev", "新能源汽车"), ("x", "x")])
+    return matcher
+
+
+def test_keyword_matcher_word_boundaries(matcher):
+    assert matcher.match("ＡＩ芯片发布") == {"ai", "chip", "chip2"}
+    assert matcher.match("He said the plan would fail") == set()
+    assert matcher.match("OpenAI releases new model") == set()
+    assert matcher.match("AI-driven chips") == {"ai"}
+    assert matcher.match("新能源汽车销量") == {"ev"}
+
+
+def test_keyword_matcher_skips_short_keywords(matcher):
+    assert settings.KEYWORD_MATCH_MIN_LENGTH > 1
+    assert "x" not in matcher.keyword_patterns
+    assert matcher.match("x marks the spot") == set()
+
+
+def test_keyword_matcher_update_and_delete(matcher):
+    matcher.set_keyword("chip", None)
+    assert matcher.match("芯片") == {"chip2"}
+
+    matcher.set_keyword("chip2", "半导体")
+    assert matcher.match("芯片") == set()
+    assert matcher.match("半导体行业") == {"chip2"}
+    assert "芯片" not in matcher.patterns
@@ -0,0 +1,62 @@
+"""
+新闻文本规范化: 标签、实体、空白、全角字符，以及重复规范化结果不变
+"""
+import random
+
+import pytest
+
+from app.workers.nlp.normalize import normalize_fields, normalize_text
+from app.workers.tasks.analysis import clean_text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("<p>你好</p>\n<p>世界</p>", "你好 世界"),
+        ("<b>粗体</b>文字", "粗体文字"),
+        ("前<script>alert(1)</script>后", "前后"),
+        ("前<STYLE type='text/css'>p {}</STYLE>后", "前后"),
+        ("注释<!-- 广告 -->之后", "注释之后"),
+        ("A&amp;B &quot;引号&quot; &#x4e2d;&#25991;", 'A&B "引号" 中文'),
+        ("技术&nbsp;&nbsp;发展", "技术 发展"),
+        ("ＡＩ　技术，ＧＤＰ增长２０２３％！", "AI 技术，GDP增长2023%！"),
+        ("  多个\t\n 空白  ", "多个 空白"),
+        ("零宽​字符\x00", "零宽字符"),
+        ("零宽 ​ 两侧空白", "零宽 两侧空白"),
+        ("价格上涨 5% (同比)", "价格上涨 5% (同比)"),
+        ("x < y", "x < y"),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_escaped_tags_are_removed_not_stored():
+    assert normalize_text("&lt;script&gt;alert(1)&lt;/script&gt;正文") == "正文"
+    assert normalize_text("＜b＞全角尖括号＜/b＞") == "全角尖括号"
+
+
+def test_double_escaped_entities_decode_to_a_fixed_point():
+    assert normalize_text("a &amp;lt; b") == "a < b"
+    assert normalize_text("&amp;amp;lt;b&amp;gt;x") == "x"
+
+
+def test_normalize_is_idempotent():
+    rng = random.Random(0)
+    alphabet = list("ab <>/&;#x 　ＡＢ＜＞\n\t​") + [
+        "&amp;", "&lt;", "&gt;", "&nbsp;", "&#60;", "&#xff21;", "&#x200b;",
+        "<b>", "</b>", "<script>", "</script>", "<!--", "-->", "新闻",
+    ]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        once = normalize_text(text)
+        assert normalize_text(once) == once, repr(text)
+
+
+def test_crawl_then_analysis_cleaning_is_stable():
+    item = {"title": "标题&amp;lt;", "content": "<p>正文&nbsp;内容</p>", "url": "https://example.com/a"}
+    crawled = normalize_fields(item)
+    assert clean_text(crawled) == crawled
+    assert crawled["content"] == "正文 内容"
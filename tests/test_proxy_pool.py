@@ -0,0 +1,147 @@
+"""
+代理池: 健康度加权选择、连续失败隔离、成功率过低移出，以及通过本地替身代理的真实请求
+"""
+import random
+import socket
+import time
+
+import pytest
+from aiohttp import web
+
+from app.core.config import settings
+from app.workers.crawler.engine import run_async
+from app.workers.crawler.proxy import ProxyPool, proxy_pool
+from app.workers.crawler.sources import NewsSource
+
+
+@pytest.fixture
+def pool(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "PROXY_API_URL", None)
+    monkeypatch.setattr(settings, "PROXY_MIN_POOL_SIZE", 0)
+    run_async(fake_redis.sadd(f"{proxy_pool.prefix}:pool", "http://good:1", "http://bad:1"))
+    return proxy_pool
+
+
+def report(pool: ProxyPool, proxy: str, success: bool, times: int = 1, latency: float = 0.1) -> None:
+    for _ in range(times):
+        run_async(pool.report(proxy, success, latency))
+
+
+def stats_by_proxy(pool: ProxyPool) -> dict:
+    return {item["proxy"]: item for item in run_async(pool.stats())}
+
+
+def test_health_prefers_successful_fast_proxies():
+    fresh = ProxyPool.health({})
+    reliable = ProxyPool.health({"success": "20", "failure": "0", "latency": "0.2"})
+    slow = ProxyPool.health({"success": "20", "failure": "0", "latency": "5"})
+    failing = ProxyPool.health({"success": "0", "failure": "20", "latency": "0.2"})
+
+    assert reliable > fresh > failing
+    assert reliable > slow
+
+
+def test_pick_is_weighted_by_health(pool):
+    report(pool, "http://good:1", True, times=10)
+    report(pool, "http://bad:1", False, times=settings.PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+
+    random.seed(0)
+    picks = [run_async(pool.pick()) for _ in range(200)]
+
+    assert picks.count("http://good:1") > 150
+    assert picks.count("http://bad:1") > 0
+
+
+def test_quarantine_after_consecutive_failures(pool, fake_redis):
+    report(pool, "http://bad:1", False, times=settings.PROXY_MAX_CONSECUTIVE_FAILURES)
+
+    assert stats_by_proxy(pool)["http://bad:1"]["quarantined"]
+    assert {run_async(pool.pick()) for _ in range(20)} == {"http://good:1"}
+
+    # 隔离到期后重新参与选择，过期的隔离记录被清理
+    run_async(fake_redis.zadd(f"{pool.prefix}:quarantine", {"http://bad:1": time.time() - 1}))
+    assert not stats_by_proxy(pool)["http://bad:1"]["quarantined"]
+    assert run_async(fake_redis.zcard(f"{pool.prefix}:quarantine")) == 0
+
+
+def test_success_resets_consecutive_failures(pool):
+    report(pool, "http://bad:1", False, times=settings.PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+    report(pool, "http://bad:1", True)
+    report(pool, "http://bad:1", False, times=settings.PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+
+    assert not stats_by_proxy(pool)["http://bad:1"]["quarantined"]
+
+
+def test_evicts_proxy_below_min_success_rate(pool, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "PROXY_MIN_SAMPLES", 10)
+    monkeypatch.setattr(settings, "PROXY_MAX_CONSECUTIVE_FAILURES", 100)
+    report(pool, "http://bad:1", True, times=2)
+    report(pool, "http://bad:1", False, times=8)
+
+    assert "http://bad:1" not in stats_by_proxy(pool)
+    assert not run_async(fake_redis.exists(f"{pool.prefix}:stats:http://bad:1"))
+
+    # 移出后迟到的上报不会重新创建统计
+    report(pool, "http://bad:1", True)
+    assert not run_async(fake_redis.exists(f"{pool.prefix}:stats:http://bad:1"))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class EchoSource(NewsSource):
+    name = "proxy-test"
+
+
+def test_fetch_through_local_proxy_reports_results(pool, fake_redis, monkeypatch):
+    """
+    本地HTTP服务充当代理（收到绝对URI的请求直接应答），另一个端口没有监听，模拟失效的代理
+    """
+    seen = []
+
+    async def handle(request: web.Request) -> web.Response:
+        seen.append(str(request.url))
+        return web.Response(text="<html>ok</html>", content_type="text/html")
+
+    async def start() -> web.AppRunner:
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        return runner
+
+    runner = run_async(start())
+    good = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    dead = f"http://127.0.0.1:{_free_port()}"
+    run_async(fake_redis.delete(f"{pool.prefix}:pool"))
+    run_async(fake_redis.sadd(f"{pool.prefix}:pool", good, dead))
+    for name, value in [
+        ("PROXY_ENABLED", True),
+        ("CRAWL_CACHE_ENABLED", False),
+        ("CRAWL_RATE_LIMIT_ENABLED", False),
+        ("CIRCUIT_BREAKER_ENABLED", False),
+    ]:
+        monkeypatch.setattr(settings, name, value)
+
+    random.seed(1)
+    source = EchoSource()
+    bodies = []
+    try:
+        for _ in range(20):
+            try:
+                bodies.append(run_async(source.fetch("http://news.example.test/search?q=1"))[0])
+            except Exception:
+                pass
+    finally:
+        run_async(runner.cleanup())
+
+    stats = stats_by_proxy(pool)
+    assert bodies and all(body == b"<html>ok</html>" for body in bodies)
+    assert stats[good]["success"] == len(bodies) == len(seen)
+    assert seen[0].startswith("http://news.example.test/search")
+    assert stats[dead]["failure"] == settings.PROXY_MAX_CONSECUTIVE_FAILURES
+    assert stats[dead]["quarantined"]
@@ -0,0 +1,47 @@
+"""
+分布式令牌桶: 突发容量、排队等待，以及按Redis服务器时间补充令牌
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.workers.crawler import rate_limit
+from app.workers.crawler.engine import run_async
+from app.workers.crawler.rate_limit import RedisTokenBucket
+
+
+@pytest.fixture
+def bucket(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_RATE_LIMITS", {"test": 20.0})
+    monkeypatch.setattr(settings, "CRAWL_RATE_BURST", 2)
+    return RedisTokenBucket(prefix="test:ratelimit")
+
+
+def test_burst_then_queue_in_arrival_order(bucket):
+    async def acquire_concurrently():
+        return await asyncio.gather(*(bucket.acquire("test") for _ in range(5)))
+
+    waits = run_async(acquire_concurrently())
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.05, 0.1, 0.15], abs=0.01)
+
+
+def test_refill_uses_server_time_not_worker_clock(bucket, monkeypatch):
+    run_async(bucket.acquire("test", tokens=2))
+
+    # 本机时钟快了一小时也不会把桶补满
+    class SkewedTime:
+        @staticmethod
+        def time():
+            return time.time() + 3600
+
+    monkeypatch.setattr(rate_limit, "time", SkewedTime, raising=False)
+    assert run_async(bucket.fill_level("test"))["tokens"] < 1
+    assert run_async(bucket.acquire("test")) > 0
+
+
+def test_fill_level_reports_full_bucket_when_unused(bucket):
+    assert run_async(bucket.fill_level("test")) == {"tokens": 2.0, "capacity": 2.0, "rate": 20.0}
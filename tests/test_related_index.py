@@ -0,0 +1,110 @@
+"""
+相关新闻索引: 向量化、逐行查询与训练倒排列表后的查询、排除自身和重复ID、训练后追加的行
+"""
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services.related import MIN_ROWS_PER_LIST, RelatedIndex, vectorize
+
+DIM = 64
+
+
+def make_id(i: int) -> uuid.UUID:
+    return uuid.UUID(int=i + 1)
+
+
+def clustered_vectors(clusters: int, per_cluster: int, seed: int = 0) -> np.ndarray:
+    """
+    围绕若干随机中心生成的单位向量，同一簇内的向量彼此接近
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    vectors = np.repeat(centers, per_cluster, axis=0) + rng.normal(scale=0.1, size=(clusters * per_cluster, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return RelatedIndex(directory=str(tmp_path), dim=DIM)
+
+
+def test_vectorize_is_normalized_and_title_weighted():
+    vector = vectorize("央行降准", "央行宣布下调存款准备金率", dim=DIM)
+    assert vector.dtype == np.float32
+    assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-5)
+    assert vectorize(None, None, dim=DIM).tolist() == [0.0] * DIM
+
+    query = vectorize("降准", None, dim=DIM)
+    same_title = vectorize("央行降准", "其他内容", dim=DIM)
+    same_content = vectorize("其他标题", "央行降准", dim=DIM)
+    assert float(query @ same_title) > float(query @ same_content) > 0
+
+
+def test_search_returns_most_similar_first(index):
+    vectors = clustered_vectors(4, 10)
+    ids = [make_id(i) for i in range(len(vectors))]
+    assert index.add(ids, vectors) == len(vectors)
+    assert len(index) == len(vectors)
+
+    results = index.search(vectors[0], k=5, probes=0)
+    assert results[0] == (ids[0], pytest.approx(1.0, abs=1e-3))
+    assert all(news_id in ids[:10] for news_id, _ in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+    excluded = index.search(vectors[0], k=5, exclude=ids[0], probes=0)
+    assert ids[0] not in [news_id for news_id, _ in excluded]
+    assert index.search(-vectors[0], k=5, min_similarity=0.5, probes=0) == []
+
+
+def test_add_skips_zero_vectors_and_duplicate_ids(index):
+    vectors = clustered_vectors(1, 3)
+    vectors[2] = 0.0
+    assert index.add([make_id(0), make_id(0), make_id(1)], vectors) == 1
+    assert index.add([make_id(0)], vectors[:1]) == 0
+    assert [news_id for news_id, _ in index.search(vectors[0], k=5, probes=0)] == [make_id(0)]
+
+
+def test_trained_search_probes_nearest_lists(index):
+    lists = 4
+    per_cluster = MIN_ROWS_PER_LIST * 3
+    vectors = clustered_vectors(lists, per_cluster)
+    ids = [make_id(i) for i in range(len(vectors))]
+    index.add(ids, vectors)
+
+    assert index.needs_training(lists)
+    assert index.train(lists) == len(vectors)
+    assert not index.needs_training(lists)
+
+    for row in range(0, len(vectors), per_cluster // 2):
+        exhaustive = index.search(vectors[row], k=5, probes=0)
+        # 计算全部列表时与逐行计算一致
+        assert index.search(vectors[row], k=5, probes=lists) == exhaustive
+        # 只计算最近的列表时仍能找到自身，且结果都来自同一簇
+        probed = index.search(vectors[row], k=5, probes=1)
+        assert probed[0][0] == ids[row]
+        cluster = row // per_cluster
+        assert all(ids.index(news_id) // per_cluster == cluster for news_id, _ in probed)
+
+
+def test_rows_added_after_training_are_assigned_to_lists(index):
+    lists = 2
+    vectors = clustered_vectors(lists, MIN_ROWS_PER_LIST * 2)
+    index.add([make_id(i) for i in range(len(vectors))], vectors)
+    index.train(lists)
+
+    new_vector = vectors[0] + np.random.default_rng(1).normal(scale=0.05, size=DIM).astype(np.float32)
+    new_vector /= np.linalg.norm(new_vector)
+    new_id = make_id(1000)
+    assert index.add([new_id], new_vector[None, :]) == 1
+
+    assert index._lists_on_disk(len(index)) == len(index)
+    assert new_id in [news_id for news_id, _ in index.search(new_vector, k=3, probes=1)]
+
+
+def test_train_requires_enough_rows(index):
+    index.add([make_id(0)], clustered_vectors(1, 1))
+    assert not index.needs_training(4)
+    with pytest.raises(ValueError):
+        index.train(4)
@@ -0,0 +1,102 @@
+"""
+已抓取URL过滤器: 各层的参数、实际误判率、写满后扩层、批量判重，以及重建期间新入库的URL不会丢失
+"""
+import math
+
+import pytest
+
+from app.workers.crawler.engine import run_async
+from app.workers.crawler.seen import ScalableBloomFilter
+
+
+def test_layer_params_match_bloom_formulas():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.001)
+
+    # m = -n·ln(p) / ln(2)², k = m/n·ln(2)
+    assert bloom.layer_params(0) == (1000, 14378, 10)
+    capacity, bits, hashes = bloom.layer_params(1)
+    assert capacity == 2000
+    assert bits == math.ceil(-2000 * math.log(0.0005) / math.log(2) ** 2)
+    assert hashes == 11
+
+
+def test_total_error_rate_is_bounded_by_geometric_series():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01, tightening=0.5)
+    total = 0.0
+    for index in range(20):
+        capacity, bits, hashes = bloom.layer_params(index)
+        total += (1 - math.exp(-hashes * capacity / bits)) ** hashes
+    assert total < 0.01 / (1 - 0.5) * 1.05
+
+
+def test_positions_are_stable_and_in_range():
+    positions = ScalableBloomFilter._positions("https://example.com/a", 14378, 10)
+
+    assert positions == ScalableBloomFilter._positions("https://example.com/a", 14378, 10)
+    assert len(positions) == 10
+    assert all(0 <= position < 14378 for position in positions)
+
+
+def test_false_positive_rate_near_design_and_grows_layers(fake_redis):
+    bloom = ScalableBloomFilter(prefix="test:seen", initial_capacity=500, error_rate=0.01)
+    members = [f"https://example.com/news/{i}" for i in range(500)]
+    for start in range(0, len(members), 100):
+        run_async(bloom.add_many(members[start:start + 100]))
+
+    assert all(run_async(bloom.contains_many(members)))
+    others = [f"https://example.org/other/{i}" for i in range(5000)]
+    false_positives = sum(run_async(bloom.contains_many(others)))
+    assert false_positives / len(others) < 0.02
+
+    # 误判为已存在的元素不计数，再写入一批使首层写满
+    run_async(bloom.add_many([f"https://example.com/more/{i}" for i in range(100)]))
+    stats = run_async(bloom.stats())
+    assert 590 <= stats["count"] <= 600
+    assert len(stats["layers"]) == 2
+    run_async(bloom.add_many(["https://example.com/after-growth"]))
+    assert run_async(bloom.stats())["layers"][1]["count"] == 1
+    assert all(run_async(bloom.contains_many(members + ["https://example.com/after-growth"])))
+
+
+def test_add_many_reports_previously_seen(fake_redis):
+    bloom = ScalableBloomFilter(prefix="test:seen", initial_capacity=1000)
+
+    assert run_async(bloom.add_many(["a", "b"])) == [False, False]
+    assert run_async(bloom.add_many(["b", "c"])) == [True, False]
+    assert run_async(bloom.contains_many(["a", "c", "d"])) == [True, True, False]
+
+
+def test_rebuild_keeps_urls_added_while_rebuilding(fake_redis):
+    bloom = ScalableBloomFilter(prefix="test:seen", initial_capacity=1000)
+    run_async(bloom.add_many(["old", "deleted"]))
+
+    async def values():
+        yield "old"
+        # 重建过程中另一个worker入库的新URL
+        await bloom.add_many(["saved-during-rebuild"])
+        yield "from-db"
+
+    assert run_async(bloom.rebuild(values(), batch_size=1)) == 2
+
+    assert run_async(bloom.contains_many(["old", "from-db", "saved-during-rebuild", "deleted"])) == [
+        True, True, True, False,
+    ]
+    assert run_async(bloom.stats())["generation"] == 1
+    assert not run_async(fake_redis.exists("test:seen:rebuilding"))
+    assert not run_async(fake_redis.keys("test:seen:0:*"))
+
+
+def test_failed_rebuild_keeps_current_generation(fake_redis):
+    bloom = ScalableBloomFilter(prefix="test:seen", initial_capacity=1000)
+    run_async(bloom.add_many(["old"]))
+
+    async def values():
+        yield "new"
+        raise RuntimeError("数据库断开")
+
+    with pytest.raises(RuntimeError):
+        run_async(bloom.rebuild(values(), batch_size=1))
+
+    assert run_async(bloom.stats())["generation"] == 0
+    assert run_async(bloom.contains_many(["old", "new"])) == [True, False]
+    assert not run_async(fake_redis.exists("test:seen:rebuilding"))
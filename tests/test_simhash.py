@@ -0,0 +1,71 @@
+"""
+SimHash近似重复检测: 汉明距离、分段（距离不超过3时至少一段相同），以及转载稿的查重
+"""
+import random
+
+from app.core.config import settings
+from app.workers.crawler.engine import run_async
+from app.workers.nlp.simhash import BANDS, FINGERPRINT_BITS, NearDuplicateIndex, bands, hamming_distance, simhash
+
+ARTICLE = (
+    "国家统计局今天发布数据，前三季度国内生产总值同比增长百分之五点二，其中第三季度增长百分之四点九。"
+    "消费对经济增长的贡献率明显提升，最终消费支出拉动经济增长三点九个百分点。"
+    "高技术制造业投资保持较快增长，新能源汽车、太阳能电池等产品产量大幅增加。"
+    "就业形势总体稳定，九月份全国城镇调查失业率为百分之五，比上月下降零点二个百分点。"
+    "居民收入继续增加，全国居民人均可支配收入实际增长百分之五点九，农村居民收入增速快于城镇居民。"
+    "国家统计局新闻发言人表示，国民经济持续恢复向好，积极因素累积增多，全年目标有望顺利实现。"
+)
+REPRINT = "【转载】" + ARTICLE.replace("今天", "今日") + "（来源：新华社）"
+UNRELATED = (
+    "本赛季联赛进入收官阶段，主队在主场以三比一击败对手，"
+    "前锋梅开二度，门将多次扑出险球，球队积分升至榜首，球迷在赛后庆祝胜利。"
+)
+
+
+def test_hamming_distance():
+    assert hamming_distance(0, 0) == 0
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(0, (1 << 64) - 1) == 64
+
+
+def test_bands_reassemble_fingerprint():
+    fingerprint = 0x0123456789ABCDEF
+    parts = bands(fingerprint)
+    assert len(parts) == BANDS
+    assert sum(part << (i * FINGERPRINT_BITS // BANDS) for i, part in enumerate(parts)) == fingerprint
+
+
+def test_close_fingerprints_share_a_band():
+    rng = random.Random(0)
+    for _ in range(2000):
+        a = rng.getrandbits(FINGERPRINT_BITS)
+        b = a
+        for bit in rng.sample(range(FINGERPRINT_BITS), 3):
+            b ^= 1 << bit
+        assert any(x == y for x, y in zip(bands(a), bands(b)))
+
+
+def test_simhash_distance_reflects_similarity():
+    original = simhash(ARTICLE)
+    assert simhash(ARTICLE) == original
+    assert 0 <= original < 1 << FINGERPRINT_BITS
+    assert hamming_distance(original, simhash(REPRINT)) <= settings.SIMHASH_MAX_DISTANCE
+    assert hamming_distance(original, simhash(UNRELATED)) > 10
+
+
+def test_short_text_has_no_fingerprint():
+    assert simhash("") is None
+    assert simhash("短") is None
+    assert simhash("很短的标题", min_shingles=settings.SIMHASH_MIN_SHINGLES) is None
+
+
+def test_index_finds_reprint_not_unrelated(fake_redis):
+    index = NearDuplicateIndex(prefix="test:simhash")
+    run_async(index.add(simhash(ARTICLE), "news-1", "https://example.com/original", 0.4))
+
+    found = run_async(index.find(simhash(REPRINT)))
+    assert found["id"] == "news-1"
+    assert found["url"] == "https://example.com/original"
+    assert found["sentiment_score"] == 0.4
+    assert found["distance"] <= settings.SIMHASH_MAX_DISTANCE
+    assert run_async(index.find(simhash(UNRELATED))) is None
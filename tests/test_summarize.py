@@ -0,0 +1,84 @@
+"""
+TextRank摘要: 分句、与其他句子重合最多的句子得分最高，以及超出大小或时间预算时退回导语
+"""
+import numpy as np
+import pytest
+
+from app.workers.nlp.summarize import BudgetExceeded, Summarizer, split_sentences, textrank_scores
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("经济增长。市场回暖！前景如何？", ["经济增长。", "市场回暖！", "前景如何？"]),
+        ("他说：“会议结束了。”随后离开", ["他说：“会议结束了。”", "随后离开"]),
+        ("第一行没有标点\n第二行", ["第一行没有标点", "第二行"]),
+        ("U.S. officials said growth slowed. The Fed met!", ["U.S. officials said growth slowed.", "The Fed met!"]),
+        ("Prices rose 3.5 percent. 中国市场", ["Prices rose 3.5 percent.", "中国市场"]),
+        ("", []),
+    ],
+)
+def test_split_sentences(text, expected):
+    assert split_sentences(text) == expected
+
+
+SENTENCES = [
+    "央行宣布下调存款准备金率，释放长期资金约一万亿元。",
+    "分析人士认为，下调存款准备金率有助于降低银行资金成本。",
+    "下调存款准备金率释放的长期资金将支持实体经济发展。",
+    "今天北京天气晴朗，气温适宜。",
+]
+
+
+def test_textrank_ranks_central_sentence_highest():
+    scores = textrank_scores(SENTENCES)
+
+    assert scores.shape == (4,)
+    assert float(scores.sum()) == pytest.approx(1.0, abs=1e-3)
+    assert int(np.argmin(scores)) == 3
+    assert min(scores[:3]) > scores[3]
+
+
+def test_textrank_without_features_is_uniform():
+    assert textrank_scores(["。", "！"]).tolist() == [0.5, 0.5]
+
+
+def test_textrank_raises_after_deadline():
+    with pytest.raises(BudgetExceeded):
+        textrank_scores(SENTENCES, deadline=0.0)
+
+
+def test_summary_keeps_original_order():
+    summarizer = Summarizer(sentences=2)
+    summary = summarizer.summarize("".join(SENTENCES))
+
+    assert "天气" not in summary
+    assert split_sentences(summary) == [s for s in SENTENCES if s in summary]
+    assert len(split_sentences(summary)) == 2
+
+
+def test_short_text_is_returned_unchanged():
+    text = "只有一句话。"
+    assert Summarizer(sentences=3).summarize(text) == text
+
+
+def test_falls_back_to_lead_over_budget():
+    text = "".join(SENTENCES)
+    lead = "".join(SENTENCES[:2])
+
+    by_size = Summarizer(sentences=2, max_sentences=3)
+    assert by_size.summarize(text) == lead
+    by_chars = Summarizer(sentences=2, max_chars=10)
+    assert by_chars.summarize(text) == lead
+    by_time = Summarizer(sentences=2, time_budget=-1.0)
+    assert by_time.summarize(text) == lead
+
+    assert by_size.stats() == {"documents": 1, "lead_size": 1, "lead_time": 0}
+    assert by_time.stats() == {"documents": 1, "lead_size": 0, "lead_time": 1}
+
+
+def test_english_sentences_are_joined_with_spaces():
+    text = "Stocks rose sharply. Investors cheered the rate cut. Analysts expect stocks to keep rising. It rained."
+    summary = Summarizer(sentences=2).summarize(text)
+    assert "  " not in summary
+    assert summary.count(". ") == 1
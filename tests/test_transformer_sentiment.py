@@ -0,0 +1,125 @@
+"""
+transformer情感分析: 微批处理队列（不依赖模型）和随机初始化的小模型（需要transformers和torch）
+"""
+import threading
+import time
+
+import pytest
+
+from app.workers.nlp.transformer_sentiment import MicroBatcher, TransformerSentimentAnalyzer, label_weights
+
+
+class RecordingPredict:
+    def __init__(self) -> None:
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, items):
+        with self._lock:
+            self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_micro_batcher_flushes_full_batch_before_deadline():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait=30.0)
+
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(8)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert results == [i * 2 for i in range(8)]
+    assert time.perf_counter() - start < 5
+    assert [len(batch) for batch in predict.batches] == [4, 4]
+    assert batcher.stats()[4]["batches"] == 2
+
+
+def test_micro_batcher_flushes_partial_batch_at_deadline():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=100, max_wait=0.05)
+
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(3)]
+    results = [future.result(timeout=5) for future in futures]
+    elapsed = time.perf_counter() - start
+
+    assert results == [0, 2, 4]
+    assert predict.batches == [[0, 1, 2]]
+    assert 0.04 <= elapsed < 5
+    stats = batcher.stats()[3]
+    assert stats["batches"] == 1
+    assert stats["latency_ms"] >= 40
+
+
+def test_micro_batcher_propagates_errors():
+    def fail(items):
+        raise RuntimeError("模型出错")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, max_wait=0.01)
+    with pytest.raises(RuntimeError):
+        batcher.submit("text").result(timeout=5)
+
+
+def test_micro_batcher_fails_requests_without_results():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items[:2]], max_batch_size=4, max_wait=30.0)
+
+    futures = [batcher.submit(i) for i in range(4)]
+
+    assert [future.result(timeout=5) for future in futures[:2]] == [0, 2]
+    for future in futures[2:]:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    # 推理线程继续处理后续请求
+    assert [batcher.submit(i) for i in range(4)][0].result(timeout=5) == 0
+
+
+def test_label_weights():
+    assert label_weights({0: "NEGATIVE", 1: "POSITIVE"}).tolist() == [-1.0, 1.0]
+    assert label_weights({0: "LABEL_0", 1: "LABEL_1", 2: "LABEL_2"}).tolist() == [-1.0, 0.0, 1.0]
+    assert label_weights({i: f"{i + 1} stars" for i in range(5)}).tolist() == [-1.0, -0.5, 0.0, 0.5, 1.0]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_path(tmp_path_factory):
+    pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    path = tmp_path_factory.mktemp("tiny-sentiment")
+    chars = sorted(set("今天股市大涨投资者信心增强公司业绩下滑亏损严重good bad news"))
+    with open(path / "vocab.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + [char for char in chars if char.strip()]))
+    tokenizer = transformers.BertTokenizerFast(str(path / "vocab.txt"))
+    config = transformers.BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=32,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=64,
+        num_labels=3,
+        id2label={0: "negative", 1: "neutral", 2: "positive"},
+        label2id={"negative": 0, "neutral": 1, "positive": 2},
+    )
+    transformers.BertForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_tiny_model_scores_through_micro_batcher(tiny_model_path, quantize):
+    from app.workers.nlp.transformer_sentiment import TransformerSentimentModel
+
+    model = TransformerSentimentModel(tiny_model_path, quantize=quantize, max_length=32, num_threads=1)
+    analyzer = TransformerSentimentAnalyzer(model, max_batch_size=4, max_wait=0.05)
+    texts = ["今天股市大涨", "公司业绩下滑", "投资者信心增强", "亏损严重", "good news"]
+
+    analyzer.prefetch(texts)
+    scores = [analyzer.polarity_scores(text) for text in texts]
+    analyzer.discard_prefetched()
+
+    for score in scores:
+        assert set(score) == {"neg", "neu", "pos", "compound"}
+        assert -1.0 <= score["compound"] <= 1.0
+        assert score["neg"] + score["neu"] + score["pos"] == pytest.approx(1.0, abs=0.01)
+    stats = analyzer.batcher.stats()
+    assert max(stats) <= 4
+    assert sum(size * stats[size]["batches"] for size in stats) == len(texts)
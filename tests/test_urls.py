@@ -0,0 +1,52 @@
+"""
+URL规范化: 同一篇新闻的不同写法规范化后相同，影响内容的部分保持不变
+"""
+import pytest
+
+from app.workers.crawler.urls import canonicalize_url, is_tracking_param
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://News.Example.com/a", "https://news.example.com/a"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:80/a", "https://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com:8443/a"),
+        ("https://example.com./a", "https://example.com/a"),
+        ("https://example.com", "https://example.com/"),
+        ("https://example.com/a#comments", "https://example.com/a"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?utm_source=x&id=5&fbclid=y&spm=z", "https://example.com/a?id=5"),
+        ("https://example.com/a?UTM_Campaign=x&id=5", "https://example.com/a?id=5"),
+        ("https://example.com/a?id=&page=2", "https://example.com/a?page=2"),
+        ("  https://example.com/a  ", "https://example.com/a"),
+        ("https://example.com/A/B", "https://example.com/A/B"),
+        ("https://example.com:bad/a", "https://example.com/a"),
+        ("", ""),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_variants_of_the_same_article_collapse():
+    variants = [
+        "http://www.example.com/news/1.html?id=7&utm_medium=rss",
+        "https://WWW.example.com:443/news/1.html?id=7#top",
+        "https://www.example.com/news/1.html?from=timeline&id=7&share_token=abc",
+    ]
+    assert len({canonicalize_url(url) for url in variants}) == 1
+
+
+def test_canonicalize_is_idempotent():
+    url = canonicalize_url("HTTP://Example.com:80/路径?b=中文&a=1&utm_source=x#frag")
+    assert canonicalize_url(url) == url
+
+
+@pytest.mark.parametrize(
+    "name, tracking",
+    [("utm_source", True), ("Hmsr", True), ("WT.mc_id", True), ("fbclid", True), ("id", False), ("page", False)],
+)
+def test_is_tracking_param(name, tracking):
+    assert is_tracking_param(name) == tracking
@@ -0,0 +1,81 @@
+"""
+中文情感分析: 双数组Trie的最长匹配（与逐词比较的结果一致）、分词和否定/程度修饰
+"""
+import random
+
+import pytest
+
+from app.workers.nlp.zh_sentiment import ChineseSentimentAnalyzer, DoubleArrayTrie, is_chinese
+
+
+def brute_force_longest_match(words, text, start):
+    best = (-1, -1)
+    for word, value in words.items():
+        if word and text.startswith(word, start) and start + len(word) > best[0]:
+            best = (start + len(word), value)
+    return best
+
+
+def test_longest_match_prefers_longest_word():
+    trie = DoubleArrayTrie({"不": 0, "不断": 1, "不断增长": 2, "增长": 3})
+
+    assert trie.longest_match("不断增长中", 0) == (4, 2)
+    assert trie.longest_match("不断下降", 0) == (2, 1)
+    assert trie.longest_match("不好", 0) == (1, 0)
+    assert trie.longest_match("不断增长", 2) == (4, 3)
+    assert trie.longest_match("增加", 0) == (-1, -1)
+    assert trie.longest_match("未知字符", 0) == (-1, -1)
+    assert trie.longest_match("不断", 2) == (-1, -1)
+
+
+def test_longest_match_agrees_with_brute_force():
+    rng = random.Random(0)
+    alphabet = "上下不好涨跌增长abc"
+    words = {}
+    while len(words) < 300:
+        words.setdefault("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))), len(words))
+    trie = DoubleArrayTrie(words)
+
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet + "xy") for _ in range(rng.randint(1, 12)))
+        for start in range(len(text)):
+            assert trie.longest_match(text, start) == brute_force_longest_match(words, text, start), (text, start)
+
+
+def test_empty_trie_and_memory():
+    trie = DoubleArrayTrie({})
+    assert trie.longest_match("任何文本", 0) == (-1, -1)
+    assert DoubleArrayTrie({"增长": 0}).memory_bytes() > 0
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return ChineseSentimentAnalyzer()
+
+
+def test_segment_uses_maximum_matching(analyzer):
+    assert analyzer.segment("业绩不断增长") == ["业", "绩", "不断", "增长"]
+
+
+def test_negation_and_degree_modifiers(analyzer):
+    positive = analyzer.polarity_scores("公司业绩增长")["compound"]
+    strong = analyzer.polarity_scores("公司业绩大幅增长")["compound"]
+    negated = analyzer.polarity_scores("公司业绩没有增长")["compound"]
+
+    assert positive > 0
+    assert strong > positive
+    assert negated < 0
+    # "不断"是中性词，不会翻转后面的情感
+    assert analyzer.polarity_scores("业绩不断增长")["compound"] > 0
+    assert analyzer.polarity_scores("股价下滑，亏损扩大")["compound"] < 0
+    assert analyzer.polarity_scores("今天召开会议") == {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+
+
+def test_clause_punctuation_resets_modifiers(analyzer):
+    assert analyzer.polarity_scores("没有，增长")["compound"] > 0
+
+
+def test_is_chinese():
+    assert is_chinese("今天股市大涨，投资者信心增强")
+    assert not is_chinese("Stocks rallied today as investors regained confidence")
+    assert not is_chinese("")